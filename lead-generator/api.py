@@ -4,15 +4,27 @@ Flask REST API für Lead Generation Dashboard
 Stellt Daten für das HTML-Dashboard bereit
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
-import psycopg2
 from psycopg2.extras import RealDictCursor
 import os
-from datetime import datetime
+import io
+import time
+import csv
+import json
+import zlib
+import base64
+import binascii
+import itertools
+from urllib.parse import urlencode
+from datetime import date, datetime, timedelta
+from db_pool import ConnectionPool
+from metrics import CONTENT_TYPE, REGISTRY, cache_collector
+from result_cache import ResultCache
+from search import LeadSearch
 
 app = Flask(__name__)
-CORS(app)  # Erlaube Cross-Origin Requests
+CORS(app, expose_headers=['X-Next-Cursor', 'Link'])  # Erlaube Cross-Origin Requests
 
 # Datenbank-Konfiguration
 DB_CONFIG = {
@@ -22,79 +34,212 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', '')
 }
 
+# Gemeinsamer Connection-Pool (pro gunicorn-Worker, fork-sicher)
+db_pool = ConnectionPool(
+    DB_CONFIG,
+    minconn=int(os.getenv('DB_POOL_MIN', '1')),
+    maxconn=int(os.getenv('DB_POOL_MAX', '10')),
+    timeout=float(os.getenv('DB_POOL_TIMEOUT', '5'))
+)
+
+
+# Unscharfe Suche (pg_trgm, siehe database_schema.sql)
+lead_search = LeadSearch(threshold=float(os.getenv('SEARCH_THRESHOLD', '0.3')))
+
+# Spalten der Lead-Liste (fields=) und Sortierschlüssel der Keyset-Pagination
+LEAD_LIST_FIELDS = (
+    'id', 'company_name', 'address', 'phone', 'website', 'score', 'status',
+    'sent_at', 'followup_count', 'response_received', 'created_at'
+)
+KEYSET_COLUMNS = ('score', 'created_at', 'id')
+MAX_PAGE_SIZE = 1000
+
+# Ergebnis-Cache für Aggregat-Endpoints (pro Worker; Schreib-Endpoints invalidieren)
+result_cache = ResultCache(ttl=float(os.getenv('API_CACHE_TTL', '60')),
+                           max_entries=int(os.getenv('API_CACHE_MAX_ENTRIES', '1024')))
+
 
 def get_db_connection():
-    """Erstellt Datenbankverbindung"""
-    return psycopg2.connect(**DB_CONFIG)
+    """Checkt eine Verbindung aus dem Pool aus (Kontextmanager)"""
+    return db_pool.connection()
+
+
+# Metriken (pro gunicorn-Worker; Prometheus summiert über alle Targets)
+API_LATENCY = REGISTRY.histogram(
+    'leadgen_api_request_duration_seconds', 'Dauer der API-Requests', ['endpoint', 'method', 'status'])
+
+
+def collect_pool():
+    """Pool-Auslastung beim Scrape (Werte aus db_pool.stats())"""
+    pool = db_pool.stats()
+    yield ('leadgen_db_pool_connections', 'gauge', 'Verbindungen im Pool',
+           [({'state': 'in_use'}, pool['in_use']), ({'state': 'idle'}, pool['idle'])])
+    yield ('leadgen_db_pool_checkouts_total', 'counter', 'Ausgecheckte Verbindungen', [({}, pool['checkouts'])])
+    yield ('leadgen_db_pool_timeouts_total', 'counter', 'Timeouts beim Auschecken', [({}, pool['timeouts'])])
+    yield ('leadgen_db_pool_wait_max_seconds', 'gauge', 'Längste Wartezeit auf eine Verbindung',
+           [({}, pool['wait_max_ms'] / 1000)])
+
+
+def collect_queues():
+    """Warteschlangen-Tiefe (eine Abfrage pro Scrape)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT 'email_queue', status, COUNT(*) FROM email_queue
+            WHERE status IN ('queued', 'sending') GROUP BY status
+            UNION ALL
+            SELECT kind, status, COUNT(*) FROM campaign_jobs
+            WHERE status IN ('pending', 'running', 'failed') GROUP BY kind, status
+        """)
+        rows = cursor.fetchall()
+        cursor.close()
+    yield ('leadgen_queue_depth', 'gauge', 'Einträge in E-Mail- und Job-Warteschlange',
+           [({'queue': queue, 'status': status}, count) for queue, status, count in rows])
+
+
+REGISTRY.register_collector(collect_pool)
+REGISTRY.register_collector(collect_queues)
+REGISTRY.register_collector(cache_collector('leadgen_api', lambda: {'result': result_cache}))
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def observe_request(response):
+    # Streaming-Exporte: gemessen bis zum ersten Chunk (Header gesendet)
+    start = g.pop('request_start', None)
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        API_LATENCY.labels(endpoint, request.method, response.status_code).observe(time.perf_counter() - start)
+    return response
+
+
+def encode_cursor(score, created_at, lead_id) -> str:
+    """Opaker Cursor aus dem Sortierschlüssel des letzten Leads einer Seite"""
+    raw = json.dumps([score, created_at.isoformat(), lead_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> tuple:
+    """Gegenstück zu encode_cursor; ValueError bei ungültigem Token"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        score, created_at, lead_id = json.loads(raw)
+        return int(score), datetime.fromisoformat(created_at), int(lead_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError(f'Ungültiger Cursor: {token}') from e
+
+
+def parse_fields(value: str) -> list:
+    """Feldauswahl für /api/leads (Whitelist, Standard: alle Listenfelder)"""
+    if not value:
+        return list(LEAD_LIST_FIELDS)
+    fields = [f.strip() for f in value.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in LEAD_LIST_FIELDS]
+    if unknown:
+        raise ValueError(f"Unbekannte Felder: {', '.join(unknown)}")
+    return fields
+
+
+def cached_json(key, tags, load):
+    """JSON-Antwort aus dem Ergebnis-Cache mit ETag (304 bei If-None-Match)"""
+    body, etag = result_cache.get_or_compute(key, tags, lambda: app.json.dumps(load()))
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Browser soll immer revalidieren - dank ETag meist mit 304
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Liefert Kampagnen-Statistiken"""
+    def load():
+        with get_db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            cursor.execute("SELECT * FROM campaign_stats")
+            stats = cursor.fetchone()
+            
+            cursor.close()
+        
+        return dict(stats) if stats else {}
+    
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cursor.execute("SELECT * FROM campaign_stats")
-        stats = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        
-        return jsonify(dict(stats) if stats else {})
+        return cached_json('stats', ['stats'], load)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/leads', methods=['GET'])
 def get_leads():
-    """Liefert alle Leads (mit optionalem Filter)"""
+    """Liefert Leads seitenweise (Keyset-Pagination, optionaler Filter und Feldauswahl)
+
+    Parameter: status, limit, cursor (aus X-Next-Cursor), fields=id,company_name,...
+    Ist eine weitere Seite vorhanden, steht der Cursor in X-Next-Cursor und im Link-Header.
+    """
     try:
-        # Query-Parameter
         status = request.args.get('status')
-        limit = request.args.get('limit', 50)
-        
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        query = """
-        SELECT 
-            id,
-            company_name,
-            address,
-            phone,
-            website,
-            score,
-            status,
-            sent_at,
-            followup_count,
-            response_received,
-            created_at
-        FROM leads_email_campaign
-        """
-        
-        # Filter nach Status
+        limit = min(max(int(request.args.get('limit', 50)), 1), MAX_PAGE_SIZE)
+        after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        conditions = []
+        params = []
         if status:
-            query += f" WHERE status = %s"
-            cursor.execute(query + " ORDER BY score DESC, created_at DESC LIMIT %s", (status, limit))
-        else:
-            cursor.execute(query + " ORDER BY score DESC, created_at DESC LIMIT %s", (limit,))
-        
-        leads = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+            conditions.append("status = %s")
+            params.append(status)
+        if after:
+            # Zeilenvergleich passt zur Sortierung und nutzt idx_leads_keyset
+            conditions.append("(COALESCE(score, 0), created_at, id) < (%s, %s, %s)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        # Sortierschlüssel immer mitlesen, ausgegeben werden nur die angefragten Felder
+        columns = [f for f in fields if f not in KEYSET_COLUMNS] + list(KEYSET_COLUMNS)
+        
+        with get_db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            cursor.execute(f"""
+                SELECT {', '.join(columns)}, COALESCE(score, 0) AS sort_score
+                FROM leads_email_campaign
+                {where}
+                ORDER BY COALESCE(score, 0) DESC, created_at DESC, id DESC
+                LIMIT %s
+            """, params + [limit + 1])
+            
+            leads = cursor.fetchall()
+            
+            cursor.close()
+        
+        has_more = len(leads) > limit
+        leads = leads[:limit]
         
         # Konvertiere datetime zu ISO-Format
         result = []
         for lead in leads:
-            lead_dict = dict(lead)
+            lead_dict = {key: lead[key] for key in fields}
             for key in ['sent_at', 'created_at']:
                 if lead_dict.get(key):
                     lead_dict[key] = lead_dict[key].isoformat()
             result.append(lead_dict)
         
-        return jsonify(result)
+        response = jsonify(result)
+        if has_more:
+            last = leads[-1]
+            token = encode_cursor(last['sort_score'], last['created_at'], last['id'])
+            next_args = request.args.to_dict()
+            next_args['cursor'] = token
+            response.headers['X-Next-Cursor'] = token
+            response.headers['Link'] = f'<{request.base_url}?{urlencode(next_args)}>; rel="next"'
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -103,17 +248,16 @@ def get_leads():
 def get_lead(lead_id):
     """Liefert Details zu einem spezifischen Lead"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        with get_db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
         
-        cursor.execute("""
-            SELECT * FROM leads_email_campaign WHERE id = %s
-        """, (lead_id,))
+            cursor.execute("""
+                SELECT * FROM leads_email_campaign WHERE id = %s
+            """, (lead_id,))
         
-        lead = cursor.fetchone()
+            lead = cursor.fetchone()
         
-        cursor.close()
-        conn.close()
+            cursor.close()
         
         if not lead:
             return jsonify({'error': 'Lead not found'}), 404
@@ -135,20 +279,22 @@ def mark_response(lead_id):
         data = request.get_json()
         notes = data.get('notes', '')
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("""
-            UPDATE leads_email_campaign 
-            SET response_received = TRUE, 
-                response_date = %s,
-                notes = %s
-            WHERE id = %s
-        """, (datetime.now(), notes, lead_id))
+            cursor.execute("""
+                UPDATE leads_email_campaign 
+                SET response_received = TRUE, 
+                    response_date = %s,
+                    notes = %s
+                WHERE id = %s
+            """, (datetime.now(), notes, lead_id))
         
-        conn.commit()
-        cursor.close()
-        conn.close()
+            conn.commit()
+            cursor.close()
+        
+        # Antworten fließen in Statistik, Timeline und Top-Performer ein
+        result_cache.invalidate('stats', 'timeline', 'top-performers')
         
         return jsonify({'success': True, 'message': 'Lead als beantwortet markiert'})
     except Exception as e:
@@ -162,18 +308,19 @@ def update_notes(lead_id):
         data = request.get_json()
         notes = data.get('notes', '')
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("""
-            UPDATE leads_email_campaign 
-            SET notes = %s
-            WHERE id = %s
-        """, (notes, lead_id))
+            cursor.execute("""
+                UPDATE leads_email_campaign 
+                SET notes = %s
+                WHERE id = %s
+            """, (notes, lead_id))
         
-        conn.commit()
-        cursor.close()
-        conn.close()
+            conn.commit()
+            cursor.close()
+        
+        # Notizen sind in keinem gecachten Ergebnis enthalten - keine Invalidierung nötig
         
         return jsonify({'success': True, 'message': 'Notizen aktualisiert'})
     except Exception as e:
@@ -183,25 +330,25 @@ def update_notes(lead_id):
 @app.route('/api/timeline', methods=['GET'])
 def get_timeline():
     """Liefert Timeline der gesendeten E-Mails (letzte 30 Tage)"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cursor.execute("""
-            SELECT 
-                DATE(sent_at) as date,
-                COUNT(*) as emails_sent,
-                COUNT(CASE WHEN response_received THEN 1 END) as responses
-            FROM leads_email_campaign
-            WHERE sent_at > NOW() - INTERVAL '30 days'
-            GROUP BY DATE(sent_at)
-            ORDER BY date DESC
-        """)
-        
-        timeline = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+    def load():
+        with get_db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            # Tages-Rollup wird per Trigger gepflegt (siehe database_schema.sql)
+            cursor.execute("""
+                SELECT 
+                    day as date,
+                    emails_sent,
+                    responses
+                FROM campaign_daily
+                WHERE day >= (NOW() - INTERVAL '30 days')::date
+                  AND emails_sent > 0
+                ORDER BY day DESC
+            """)
+            
+            timeline = cursor.fetchall()
+            
+            cursor.close()
         
         result = []
         for entry in timeline:
@@ -209,8 +356,10 @@ def get_timeline():
             if entry_dict.get('date'):
                 entry_dict['date'] = entry_dict['date'].isoformat()
             result.append(entry_dict)
-        
-        return jsonify(result)
+        return result
+    
+    try:
+        return cached_json('timeline', ['timeline'], load)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -218,140 +367,199 @@ def get_timeline():
 @app.route('/api/top-performers', methods=['GET'])
 def get_top_performers():
     """Liefert die besten Leads (höchster Score)"""
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)  # Begrenzt auch die Cache-Schlüssel
+    
+    def load():
+        with get_db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            cursor.execute("""
+                SELECT 
+                    company_name,
+                    score,
+                    status,
+                    response_received,
+                    website
+                FROM leads_email_campaign
+                ORDER BY score DESC
+                LIMIT %s
+            """, (limit,))
+            
+            top_leads = cursor.fetchall()
+            
+            cursor.close()
+        
+        return [dict(lead) for lead in top_leads]
+    
     try:
-        limit = request.args.get('limit', 10)
-        
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cursor.execute("""
-            SELECT 
-                company_name,
-                score,
-                status,
-                response_received,
-                website
-            FROM leads_email_campaign
-            ORDER BY score DESC
-            LIMIT %s
-        """, (limit,))
-        
-        top_leads = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
-        
-        return jsonify([dict(lead) for lead in top_leads])
+        return cached_json(('top-performers', limit), ['top-performers'], load)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/search', methods=['GET'])
 def search_leads():
-    """Sucht Leads nach Firmenname"""
+    """Sucht Leads nach Firmenname, Adresse oder Website (unscharf, Umlaut-tolerant)
+
+    Parameter: q, mode=fuzzy|prefix (Autocomplete), limit (max. 50)
+    """
+    query = request.args.get('q', '')
+    mode = request.args.get('mode', 'fuzzy')
+    if mode not in ('fuzzy', 'prefix'):
+        return jsonify({'error': f'Unbekannter Modus: {mode}'}), 400
     try:
-        query = request.args.get('q', '')
-        
-        if not query:
-            return jsonify([])
-        
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cursor.execute("""
-            SELECT 
-                id,
-                company_name,
-                address,
-                score,
-                status,
-                website
-            FROM leads_email_campaign
-            WHERE company_name ILIKE %s
-            ORDER BY score DESC
-            LIMIT 20
-        """, (f'%{query}%',))
-        
-        results = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
-        
-        return jsonify([dict(lead) for lead in results])
+        limit = min(max(int(request.args.get('limit', 20)), 1), 50)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            results = lead_search.search(cursor, query, mode=mode, limit=limit)
+            
+            cursor.close()
+        
+        return jsonify([dict(lead, similarity=round(float(lead['similarity']), 3)) for lead in results])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/export', methods=['GET'])
 def export_leads():
-    """Exportiert Leads als CSV"""
+    """Exportiert Leads als CSV (gestreamt, optional gzip)
+
+    Filter: status, from / to (ISO-Datum, created_at; to inklusive des ganzen Tages), min_score
+    gzip=1 liefert leads_export.csv.gz
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cursor.execute("""
-            SELECT 
-                company_name,
-                address,
-                phone,
-                website,
-                score,
-                status,
-                sent_at,
-                response_received
-            FROM leads_email_campaign
-            ORDER BY score DESC
-        """)
-        
-        leads = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
-        
-        # CSV-Header
-        csv_data = "Firma,Adresse,Telefon,Website,Score,Status,Gesendet,Antwort\n"
-        
-        # CSV-Zeilen
-        for lead in leads:
-            csv_data += f"{lead['company_name']},"
-            csv_data += f"{lead['address'] or ''},"
-            csv_data += f"{lead['phone'] or ''},"
-            csv_data += f"{lead['website'] or ''},"
-            csv_data += f"{lead['score']},"
-            csv_data += f"{lead['status']},"
-            csv_data += f"{lead['sent_at'] or ''},"
-            csv_data += f"{'Ja' if lead['response_received'] else 'Nein'}\n"
-        
-        from flask import Response
-        return Response(
-            csv_data,
-            mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=leads_export.csv'}
-        )
+        conditions = []
+        params = []
+        
+        if request.args.get('status'):
+            conditions.append("status = %s")
+            params.append(request.args['status'])
+        if request.args.get('from'):
+            conditions.append("created_at >= %s")
+            params.append(datetime.fromisoformat(request.args['from']))
+        if request.args.get('to'):
+            to = request.args['to']
+            try:
+                # Reines Datum: der ganze Tag gehört dazu (created_at hat eine Uhrzeit)
+                end = datetime.combine(date.fromisoformat(to) + timedelta(days=1), datetime.min.time())
+                conditions.append("created_at < %s")
+            except ValueError:
+                end = datetime.fromisoformat(to)
+                conditions.append("created_at <= %s")
+            params.append(end)
+        if request.args.get('min_score'):
+            conditions.append("score >= %s")
+            params.append(int(request.args['min_score']))
+    except ValueError as e:
+        return jsonify({'error': f'Ungültiger Filter: {e}'}), 400
+    
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""
+        SELECT 
+            company_name,
+            address,
+            phone,
+            website,
+            score,
+            status,
+            sent_at,
+            response_received
+        FROM leads_email_campaign
+        {where}
+        ORDER BY score DESC
+    """
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        
+        def flush():
+            data = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return data
+        
+        with get_db_connection() as conn:
+            # Benannter Cursor = serverseitig, Zeilen kommen in Batches statt fetchall()
+            cursor = conn.cursor(name='leads_export')
+            cursor.itersize = 2000
+            cursor.execute(query, params)
+            
+            writer.writerow(['Firma', 'Adresse', 'Telefon', 'Website', 'Score', 'Status', 'Gesendet', 'Antwort'])
+            yield flush()
+            
+            for company_name, address, phone, website, score, status, sent_at, response_received in cursor:
+                writer.writerow([
+                    company_name, address, phone, website, score, status, sent_at,
+                    'Ja' if response_received else 'Nein'
+                ])
+                if buffer.tell() > 65536:
+                    yield flush()
+            
+            cursor.close()
+        yield flush()
+    
+    def generate_gzip(chunks):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip-Container
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode('utf-8'))
+            if data:
+                yield data
+        yield compressor.flush()
+    
+    try:
+        chunks = generate_csv()
+        # Ersten Chunk vorab erzeugen, damit DB-Fehler noch als JSON-Fehler gemeldet werden
+        first = next(chunks)
+        body = itertools.chain([first], chunks)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    
+    if compress:
+        return Response(
+            generate_gzip(body),
+            mimetype='application/gzip',
+            headers={'Content-Disposition': 'attachment; filename=leads_export.csv.gz'}
+        )
+    return Response(
+        body,
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=leads_export.csv'}
+    )
 
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health-Check Endpoint"""
+    """Health-Check Endpoint (SELECT 1 über den Pool plus Pool-Zustand)"""
+    error = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        cursor.close()
-        conn.close()
-        
-        return jsonify({
-            'status': 'healthy',
-            'timestamp': datetime.now().isoformat(),
-            'database': 'connected'
-        })
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
     except Exception as e:
-        return jsonify({
-            'status': 'unhealthy',
-            'error': str(e)
-        }), 503
+        error = str(e)
+    healthy = error is None
+    
+    return jsonify({
+        'status': 'healthy' if healthy else 'unhealthy',
+        'timestamp': datetime.now().isoformat(),
+        'database': 'connected' if healthy else 'error',
+        'error': error,
+        'pool': db_pool.stats()
+    }), 200 if healthy else 503
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus-Scrape-Endpoint"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
 
 
 if __name__ == '__main__':
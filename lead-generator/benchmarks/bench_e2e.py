@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+End-to-End-Benchmark: run_campaign, --deliver und send_followups komplett offline
+
+Google Places, OpenAI, Websites, DNS und SMTP werden durch lokale Fakes ersetzt
+(benchmarks/fakes.py), die Datenbank ist eine Wegwerf-Datenbank mit
+database_schema.sql. Jede Größe läuft in einem eigenen Prozess, damit die
+Spitzen-RSS pro Lauf vergleichbar ist.
+
+Datenbank:
+  Standard: temporäre Datenbank auf dem Server aus DB_HOST / DB_USER / DB_PASSWORD
+            (braucht CREATEDB; wird nach jedem Lauf gelöscht)
+  --initdb: eigener Wegwerf-Cluster über initdb/pg_ctl (Unix-Socket, kein TCP)
+
+Ausgabe: JSON (leads/s, p50/p99 je Schritt und Dienst, Spitzen-RSS) auf stdout
+oder nach --output; Pipeline-Ausgaben landen in --log.
+
+Verwendung:
+  python benchmarks/bench_e2e.py --scales 100,10000 --output e2e.json
+  python benchmarks/bench_e2e.py --initdb --scales 100000 --openai-latency-ms 800
+  python benchmarks/bench_e2e.py --scales 10000 --baseline e2e_v1.json   # Exit 1 bei Regression
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from queue import Empty
+
+import psycopg2
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import start_fake  # noqa: E402
+
+SCHEMA_PATH = os.path.join(BENCH_DIR, '..', 'database_schema.sql')
+
+
+class ThrowawayPostgres:
+    """Legt pro Lauf eine frische Datenbank an - auf einem vorhandenen Server oder eigenem Cluster"""
+
+    def __init__(self, initdb: bool = False, pg_bin: str = None, keep: bool = False):
+        self.initdb = initdb
+        self.pg_bin = pg_bin
+        self.keep = keep
+        self.datadir = None
+        self.server = {
+            'host': os.getenv('DB_HOST', 'localhost'),
+            'port': int(os.getenv('DB_PORT', '5432')),
+            'user': os.getenv('DB_USER', 'postgres'),
+            'password': os.getenv('DB_PASSWORD', ''),
+        }
+
+    def _tool(self, name: str) -> str:
+        path = os.path.join(self.pg_bin, name) if self.pg_bin else shutil.which(name)
+        if not path or not os.path.exists(path):
+            raise RuntimeError(f"{name} nicht gefunden - --pg-bin angeben (z.B. /usr/lib/postgresql/16/bin)")
+        return path
+
+    def __enter__(self):
+        if self.initdb:
+            self.datadir = tempfile.mkdtemp(prefix='leadgen-pg-')
+            with socket.socket() as s:
+                s.bind(('127.0.0.1', 0))
+                port = s.getsockname()[1]
+            subprocess.run([self._tool('initdb'), '-D', self.datadir, '-U', 'postgres', '--auth=trust',
+                            '--no-sync'], check=True, stdout=subprocess.DEVNULL)
+            # Messwerte sollen die Pipeline zeigen, nicht fsync der Platte
+            options = f"-p {port} -k {self.datadir} -c listen_addresses='' -c fsync=off -c synchronous_commit=off"
+            subprocess.run([self._tool('pg_ctl'), '-D', self.datadir, '-o', options, '-w', '-l',
+                            os.path.join(self.datadir, 'server.log'), 'start'], check=True, stdout=subprocess.DEVNULL)
+            self.server = {'host': self.datadir, 'port': port, 'user': 'postgres', 'password': ''}
+        return self
+
+    def __exit__(self, *exc):
+        if self.datadir:
+            subprocess.run([self._tool('pg_ctl'), '-D', self.datadir, '-m', 'immediate', 'stop'],
+                           stdout=subprocess.DEVNULL)
+            shutil.rmtree(self.datadir, ignore_errors=True)
+
+    def _admin(self):
+        conn = psycopg2.connect(database='postgres', **self.server)
+        conn.autocommit = True
+        return conn
+
+    def create_database(self, name: str) -> dict:
+        """Frische Datenbank mit database_schema.sql; liefert Verbindungsparameter"""
+        admin = self._admin()
+        cursor = admin.cursor()
+        cursor.execute(f'DROP DATABASE IF EXISTS "{name}"')
+        cursor.execute(f'CREATE DATABASE "{name}"')
+        admin.close()
+
+        params = dict(self.server, database=name)
+        conn = psycopg2.connect(**params)
+        with open(SCHEMA_PATH, encoding='utf-8') as f:
+            conn.cursor().execute(f.read())
+        conn.commit()
+        conn.close()
+        return params
+
+    def drop_database(self, name: str):
+        if self.keep:
+            return
+        admin = self._admin()
+        admin.cursor().execute(f'DROP DATABASE IF EXISTS "{name}"')
+        admin.close()
+
+
+def percentile(sorted_samples, q: float) -> float:
+    """Nearest-Rank-Perzentil"""
+    return sorted_samples[max(0, min(len(sorted_samples) - 1, math.ceil(q * len(sorted_samples)) - 1))]
+
+
+def record_histogram_samples():
+    """Speichert zusätzlich jede Einzelmessung der Metrik-Histogramme (exakte p50/p99 statt Buckets)"""
+    import metrics
+
+    samples = defaultdict(list)
+    observe = metrics._HistogramChild.observe
+
+    def recording_observe(child, seconds):
+        samples[id(child)].append(seconds)
+        observe(child, seconds)
+
+    metrics._HistogramChild.observe = recording_observe
+    return samples
+
+
+def summarize_samples(samples) -> dict:
+    """p50/p99 je Histogramm und Label-Kombination, z.B. stage/enrich oder http/places/2xx"""
+    from metrics import REGISTRY, Histogram
+
+    result = {}
+    for metric in REGISTRY._metrics.values():
+        if not isinstance(metric, Histogram):
+            continue
+        short = metric.name.replace('leadgen_', '').replace('_duration_seconds', '').replace('_seconds', '')
+        for key, child in metric._items():
+            values = sorted(samples.get(id(child), ()))
+            if not values:
+                continue
+            result['/'.join((short,) + key)] = {
+                'count': len(values),
+                'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+                'p99_ms': round(percentile(values, 0.99) * 1000, 3),
+                'max_ms': round(values[-1] * 1000, 3),
+                'total_s': round(sum(values), 3),
+            }
+    return dict(sorted(result.items()))
+
+
+def count(cursor, query: str) -> int:
+    cursor.execute(query)
+    return cursor.fetchone()[0]
+
+
+def run_pipeline(scale: int, options: dict, db: dict, ports: dict, results):
+    """Läuft im eigenen Prozess: Kampagne, Versand, Follow-ups gegen die Fakes"""
+    cache_dir = tempfile.mkdtemp(prefix='leadgen-cache-')
+    os.environ.update({
+        'PLACES_BASE_URL': f"http://127.0.0.1:{ports['places']}/maps/api/place",
+        'OPENAI_BASE_URL': f"http://127.0.0.1:{ports['openai']}/v1",
+        'OPENAI_API_KEY': 'bench',
+        'GOOGLE_MAPS_API_KEY': 'bench',
+        'PGPORT': str(db['port']),
+        # Lokale Fakes nie über einen Proxy ansprechen
+        'NO_PROXY': '*',
+        'no_proxy': '*',
+    })
+    samples = record_histogram_samples()
+    import lead_generation
+
+    lead_generation.CONFIG.update({
+        'db_host': db['host'], 'db_name': db['database'], 'db_user': db['user'], 'db_password': db['password'],
+        'smtp_host': '127.0.0.1', 'smtp_port': ports['smtp'], 'smtp_password': '', 'smtp_starttls': False,
+        'smtp_pool_size': options['smtp_pool_size'],
+        'cache_path': os.path.join(cache_dir, 'lead_cache.sqlite3'),
+        'places_page_delay': 0,
+        'max_pages_per_tile': options['max_pages_per_tile'],
+        # Limits, die sonst den Durchsatz begrenzen statt der Pipeline selbst
+        'campaign_top_leads': scale,
+        'max_emails_per_day': scale * 3,
+        'delay_between_emails': 0,
+        'openai_requests_per_minute': 10 ** 9,
+        'openai_tokens_per_minute': 10 ** 12,
+        'enrichment_concurrency': options['concurrency'],
+        'crawl_concurrency': options['concurrency'],
+        'crawl_host_delay': 0,
+        'dns_nameservers': ['127.0.0.1'],
+        'dns_port': ports['dns'],
+        'generation_concurrency': options['generation_concurrency'],
+        'worker_batch_size': options['batch_size'],
+    })
+
+    phases = {}
+    log = open(options['log'], 'a', encoding='utf-8')
+    with contextlib.redirect_stdout(log):
+        print(f"\n===== Benchmark {scale} Places ({datetime.now():%Y-%m-%d %H:%M:%S}) =====")
+        generator = lead_generation.LeadGenerator(concurrency=options['concurrency'])
+
+        start = time.perf_counter()
+        generator.run_campaign(concurrency=options['concurrency'])
+        phases['campaign'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        generator.deliver(wait=False)
+        phases['deliver'] = time.perf_counter() - start
+
+        # Versand liegt "3 Tage zurück", damit plan_followups alle Leads findet
+        cursor = generator.db_conn.cursor()
+        cursor.execute("UPDATE leads_email_campaign SET sent_at = sent_at - INTERVAL '4 days' WHERE status = 'sent'")
+        generator.db_conn.commit()
+        start = time.perf_counter()
+        for _ in range(options['followup_rounds']):
+            if not generator.plan_followups():
+                break
+            generator.work(('followup',))
+        generator.deliver(wait=False)
+        phases['followup'] = time.perf_counter() - start
+
+        counts = {
+            'places': generator.discovery_stats['unique_places'],
+            'places_api_calls': generator.discovery_stats['api_calls'],
+            'leads_saved': count(cursor, "SELECT COUNT(*) FROM leads_email_campaign"),
+            'emails_sent': count(cursor, "SELECT COUNT(*) FROM email_queue WHERE status = 'sent' AND kind = 'initial'"),
+            'followups_sent': count(cursor, "SELECT COUNT(*) FROM email_queue WHERE status = 'sent' AND kind = 'followup'"),
+            'jobs_failed': count(cursor, "SELECT COUNT(*) FROM campaign_jobs WHERE status = 'failed'"),
+            'undeliverable': count(cursor, "SELECT COUNT(*) FROM campaign_places WHERE outcome = 'undeliverable'"),
+        }
+        cursor.close()
+        generator.close()
+    log.close()
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    results.put({
+        'scale': scale,
+        'counts': counts,
+        'seconds': {name: round(value, 3) for name, value in phases.items()},
+        'places_per_sec': round(counts['places'] / phases['campaign'], 2),
+        'leads_per_sec': round(counts['leads_saved'] / phases['campaign'], 2),
+        'emails_per_sec': round(counts['emails_sent'] / phases['deliver'], 2) if phases['deliver'] else None,
+        'followups_per_sec': round(counts['followups_sent'] / phases['followup'], 2) if phases['followup'] else None,
+        'stages': summarize_samples(samples),
+        # ru_maxrss in KiB (Linux)
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    })
+
+
+def wait_for_result(worker, queue) -> dict:
+    """Ergebnis des Pipeline-Prozesses; bricht ab, falls dieser vorher stirbt"""
+    while True:
+        try:
+            return queue.get(timeout=1)
+        except Empty:
+            if not worker.is_alive():
+                raise RuntimeError(f"Pipeline-Prozess beendet mit Exit-Code {worker.exitcode} - siehe --log")
+
+
+def count_tiles() -> int:
+    """Anzahl Suchkacheln mit der aktuellen Konfiguration (Fake verteilt die Places darauf)"""
+    from lead_generation import LeadGenerator
+    return sum(1 for _ in LeadGenerator().search_tiles())
+
+
+def compare(results, baseline_path: str, tolerance: float):
+    """Vergleicht mit einem früheren Lauf; liefert Liste der Regressionen"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {run['scale']: run for run in json.load(f)['results']}
+    regressions = []
+    for run in results:
+        old = baseline.get(run['scale'])
+        if not old:
+            continue
+        if run['leads_per_sec'] < old['leads_per_sec'] * (1 - tolerance):
+            regressions.append(f"{run['scale']}: leads/s {old['leads_per_sec']} -> {run['leads_per_sec']}")
+        for stage, stats in run['stages'].items():
+            before = old['stages'].get(stage)
+            # Sub-Millisekunden-Schwankungen sind Rauschen
+            if before and stats['p99_ms'] > 1 and stats['p99_ms'] > before['p99_ms'] * (1 + tolerance):
+                regressions.append(f"{run['scale']}: {stage} p99 {before['p99_ms']} ms -> {stats['p99_ms']} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-End-Benchmark mit lokalen Fakes')
+    parser.add_argument('--scales', default='100,10000', help='Anzahl Places je Lauf, z.B. 100,10000,100000')
+    parser.add_argument('--concurrency', type=int, default=16, help='Parallele Anreicherung')
+    parser.add_argument('--generation-concurrency', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--smtp-pool-size', type=int, default=1)
+    parser.add_argument('--followup-rounds', type=int, default=20, help='plan_followups-Runden (je bis zu 10 Leads)')
+    parser.add_argument('--page-size', type=int, default=20, help='Places pro Ergebnisseite')
+    parser.add_argument('--places-latency-ms', type=float, default=80)
+    parser.add_argument('--openai-latency-ms', type=float, default=400)
+    parser.add_argument('--site-latency-ms', type=float, default=120)
+    parser.add_argument('--smtp-latency-ms', type=float, default=30)
+    parser.add_argument('--site-kb', type=int, default=60, help='Größe der Fake-Websites')
+    parser.add_argument('--website-ratio', type=float, default=0.8, help='Anteil der Places mit Website')
+    parser.add_argument('--nxdomain-ratio', type=float, default=0.05, help='Anteil der Mail-Domains ohne DNS-Eintrag')
+    parser.add_argument('--initdb', action='store_true', help='Eigenen Wegwerf-Cluster starten')
+    parser.add_argument('--pg-bin', help='Verzeichnis mit initdb/pg_ctl')
+    parser.add_argument('--keep-db', action='store_true', help='Datenbanken nach dem Lauf behalten')
+    parser.add_argument('--log', default=os.devnull, help='Ausgaben der Pipeline')
+    parser.add_argument('--output', help='JSON-Datei (Standard: stdout)')
+    parser.add_argument('--baseline', help='Früheres Ergebnis; Exit 1 bei Regression')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Erlaubte Verschlechterung für --baseline')
+    args = parser.parse_args()
+    scales = [int(value) for value in args.scales.split(',') if value.strip()]
+
+    fakes = []
+    ports = {}
+    for kind, options, host in (
+        ('openai', {'latency_ms': args.openai_latency_ms, 'body_sentences': 12}, '127.0.0.1'),
+        ('sites', {'latency_ms': args.site_latency_ms, 'page_kb': args.site_kb}, '0.0.0.0'),
+        ('smtp', {'latency_ms': args.smtp_latency_ms}, '127.0.0.1'),
+        ('dns', {'nxdomain_ratio': args.nxdomain_ratio}, '127.0.0.1'),
+    ):
+        process, ports[kind] = start_fake(kind, options, host)
+        fakes.append(process)
+
+    tiles = count_tiles()
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    try:
+        with ThrowawayPostgres(args.initdb, args.pg_bin, args.keep_db) as postgres:
+            for scale in scales:
+                per_tile = math.ceil(scale / tiles)
+                places, ports['places'] = start_fake('places', {
+                    'latency_ms': args.places_latency_ms, 'places': scale, 'per_tile': per_tile,
+                    'page_size': args.page_size, 'website_ratio': args.website_ratio,
+                    'site_port': ports['sites'],
+                })
+                name = f"leadgen_bench_{scale}"
+                db = postgres.create_database(name)
+                options = {
+                    'concurrency': args.concurrency,
+                    'generation_concurrency': args.generation_concurrency,
+                    'batch_size': args.batch_size,
+                    'smtp_pool_size': args.smtp_pool_size,
+                    'followup_rounds': args.followup_rounds,
+                    'max_pages_per_tile': math.ceil(per_tile / args.page_size),
+                    'log': args.log,
+                }
+                queue = ctx.Queue()
+                worker = ctx.Process(target=run_pipeline, args=(scale, options, db, dict(ports), queue))
+                worker.start()
+                try:
+                    result = wait_for_result(worker, queue)
+                finally:
+                    worker.join()
+                    places.terminate()
+                    postgres.drop_database(name)
+                results.append(result)
+                print(f"✓ {scale:>7} Places: {result['leads_per_sec']} Leads/s, "
+                      f"Spitzen-RSS {result['peak_rss_mb']} MB", file=sys.stderr)
+    finally:
+        for process in fakes:
+            process.terminate()
+
+    report = {
+        'benchmark': 'e2e',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'settings': {key: value for key, value in vars(args).items()
+                     if key not in ('output', 'baseline', 'log', 'pg_bin')},
+        'results': results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"✗ Regression {line}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Lead-Liste mit OFFSET gegen Keyset-Pagination auf (score, created_at, id)
+
+Legt eine TEMP-Tabelle mit --rows Zeilen und dem Index aus database_schema.sql an
+und misst die Antwortzeit einer Seite an verschiedenen Positionen.
+Verbindung über DB_HOST / DB_NAME / DB_USER / DB_PASSWORD.
+
+Verwendung:
+  python benchmarks/bench_pagination.py --rows 1000000
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import psycopg2
+
+TEMP_TABLE = """
+CREATE TEMP TABLE leads_email_campaign (
+    id SERIAL PRIMARY KEY,
+    company_name VARCHAR(255) NOT NULL,
+    address TEXT,
+    phone VARCHAR(50),
+    website VARCHAR(500),
+    score INTEGER,
+    status VARCHAR(50) DEFAULT 'pending',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP,
+    followup_count INTEGER DEFAULT 0,
+    response_received BOOLEAN DEFAULT FALSE
+)
+"""
+
+FILL = """
+INSERT INTO leads_email_campaign (company_name, address, website, score, status, created_at)
+SELECT
+    'Kanzlei ' || i,
+    'Karl-Marx-Straße ' || i || ', 12043 Berlin',
+    'https://kanzlei-' || i || '.de',
+    (random() * 100)::int,
+    (ARRAY['pending', 'queued', 'sent'])[1 + (i % 3)],
+    NOW() - (random() * interval '365 days')
+FROM generate_series(1, %s) AS i
+"""
+
+INDEX = """
+CREATE INDEX idx_leads_keyset
+ON leads_email_campaign((COALESCE(score, 0)) DESC, created_at DESC, id DESC)
+"""
+
+COLUMNS = "id, company_name, address, phone, website, score, status, sent_at, followup_count, response_received, created_at"
+ORDER = "ORDER BY COALESCE(score, 0) DESC, created_at DESC, id DESC"
+
+
+def timed(cursor, query, params, repeat):
+    """Median der Laufzeit in ms und die letzte Ergebnismenge"""
+    samples = []
+    rows = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Pagination /api/leads')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        database=os.getenv('DB_NAME', 'n8n'),
+        user=os.getenv('DB_USER', 'postgres'),
+        password=os.getenv('DB_PASSWORD', '')
+    )
+    cursor = conn.cursor()
+    cursor.execute(TEMP_TABLE)
+    start = time.perf_counter()
+    cursor.execute(FILL, (args.rows,))
+    cursor.execute(INDEX)
+    cursor.execute("ANALYZE leads_email_campaign")
+    conn.commit()
+    print(f"{args.rows:,} Zeilen angelegt in {time.perf_counter() - start:.1f}s\n")
+
+    print(f"{'Offset':>10}  {'OFFSET (alt)':>14}  {'Keyset (neu)':>14}")
+    offsets = [0, 1000, 10000, 100000, args.rows // 2, args.rows - args.page_size]
+    for offset in sorted({o for o in offsets if 0 <= o < args.rows}):
+        t_offset, _ = timed(cursor, f"""
+            SELECT {COLUMNS} FROM leads_email_campaign {ORDER} LIMIT %s OFFSET %s
+        """, (args.page_size, offset), args.repeat)
+
+        # Sortierschlüssel der Zeile vor der Seite = Cursor, den der Client mitschicken würde
+        if offset:
+            cursor.execute(f"""
+                SELECT COALESCE(score, 0), created_at, id FROM leads_email_campaign {ORDER}
+                LIMIT 1 OFFSET %s
+            """, (offset - 1,))
+            after = cursor.fetchone()
+            t_keyset, _ = timed(cursor, f"""
+                SELECT {COLUMNS} FROM leads_email_campaign
+                WHERE (COALESCE(score, 0), created_at, id) < (%s, %s, %s)
+                {ORDER} LIMIT %s
+            """, after + (args.page_size,), args.repeat)
+        else:
+            t_keyset, _ = timed(cursor, f"""
+                SELECT {COLUMNS} FROM leads_email_campaign {ORDER} LIMIT %s
+            """, (args.page_size,), args.repeat)
+
+        print(f"{offset:>10,}  {t_offset:>11.2f} ms  {t_keyset:>11.2f} ms")
+
+    cursor.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
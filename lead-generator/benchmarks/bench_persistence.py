@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Lead-Persistenz pro Zeile (INSERT + Commit, Status-Update per company_name)
+gegen LeadWriter (Multi-Row-INSERT, ein Commit pro Batch, Status-Update per id)
+
+Arbeitet auf einer TEMP-Tabelle gleichen Namens - echte Daten bleiben unberührt.
+Verbindung über DB_HOST / DB_NAME / DB_USER / DB_PASSWORD.
+
+Verwendung:
+  python benchmarks/bench_persistence.py --leads 10000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from persistence import LeadWriter  # noqa: E402
+
+TEMP_TABLE = """
+CREATE TEMP TABLE leads_email_campaign (
+    id SERIAL PRIMARY KEY,
+    company_name VARCHAR(255) NOT NULL,
+    address TEXT,
+    phone VARCHAR(50),
+    website VARCHAR(500),
+    score INTEGER,
+    rating NUMERIC(2,1),
+    user_ratings_total INTEGER,
+    email VARCHAR(255),
+    email_subject TEXT,
+    email_body TEXT,
+    status VARCHAR(50) DEFAULT 'pending',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP,
+    place_id VARCHAR(255) UNIQUE,
+    geohash VARCHAR(12),
+    UNIQUE(company_name, address)
+)
+"""
+
+
+def make_leads(n: int, run: str):
+    """Synthetische Leads mit eindeutigem Namen pro Lauf"""
+    return [{
+        'name': f"Kanzlei {run}-{i}",
+        'address': f"Karl-Marx-Straße {i}, 12043 Berlin",
+        'phone': '030 1234567',
+        'website': f"https://kanzlei-{run}-{i}.de",
+        'score': 50,
+        'rating': 4.5,
+        'user_ratings_total': 42,
+        'email_subject': 'KI-Automatisierung für Ihre Kanzlei',
+        'email_body': 'Guten Tag, ...' * 20,
+    } for i in range(n)]
+
+
+def legacy_path(conn, leads):
+    """Bisheriger Ablauf: save_lead + update_email_status je Lead"""
+    for lead in leads:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO leads_email_campaign
+            (company_name, address, phone, website, score, email_subject, email_body, status, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (company_name, address) DO NOTHING
+        """, (lead['name'], lead['address'], lead['phone'], lead['website'], lead['score'],
+              lead['email_subject'], lead['email_body'], 'pending', datetime.now()))
+        conn.commit()
+        cursor.close()
+
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE leads_email_campaign SET status = %s, sent_at = %s WHERE company_name = %s
+        """, ('sent', datetime.now(), lead['name']))
+        conn.commit()
+        cursor.close()
+
+
+def batched_path(conn, leads, batch_size):
+    """Neuer Ablauf: LeadWriter.save_many + update_status per id"""
+    writer = LeadWriter(conn, batch_size=batch_size)
+    ids = writer.save_many(leads)
+    writer.update_status([lead_id for lead_id in ids if lead_id], 'sent', sent_at=datetime.now())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Lead-Persistenz')
+    parser.add_argument('--leads', type=int, default=10000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        database=os.getenv('DB_NAME', 'n8n'),
+        user=os.getenv('DB_USER', 'postgres'),
+        password=os.getenv('DB_PASSWORD', '')
+    )
+    cursor = conn.cursor()
+    cursor.execute(TEMP_TABLE)
+    conn.commit()
+
+    start = time.perf_counter()
+    legacy_path(conn, make_leads(args.leads, 'alt'))
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched_path(conn, make_leads(args.leads, 'neu'), args.batch_size)
+    t_batched = time.perf_counter() - start
+
+    cursor.execute("SELECT COUNT(*) FROM leads_email_campaign WHERE status = 'sent'")
+    print(f"{args.leads} Leads je Variante ({cursor.fetchone()[0]} gespeichert)")
+    print(f"  pro Zeile (alt):  {t_legacy:.2f}s  ({args.leads / t_legacy:,.0f} Leads/s)")
+    print(f"  gebündelt (neu):  {t_batched:.2f}s  ({args.leads / t_batched:,.0f} Leads/s)")
+    print(f"  Faktor: {t_legacy / t_batched:.1f}x")
+    cursor.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bisheriges score_lead (pro Place, Keyword-Schleife)
+gegen RuleSet.score_batch
+
+Verwendung:
+  python benchmarks/bench_scoring.py --places 200000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scoring import HIGH_POTENTIAL_KEYWORDS, RuleSet  # noqa: E402
+
+
+def legacy_score_lead(place: dict) -> int:
+    """Bisherige Implementierung aus lead_generation.score_lead"""
+    score = 0
+    name = place.get('name', '').lower()
+    for keyword in HIGH_POTENTIAL_KEYWORDS:
+        if keyword in name:
+            score += 30
+            break
+    rating = place.get('rating', 0)
+    if rating >= 4.0:
+        score += 10
+    if place.get('user_ratings_total', 0) > 20:
+        score += 10
+    return score
+
+
+def make_places(n: int):
+    """Synthetische Places mit realistischen Namen"""
+    prefixes = ['Bäckerei', 'Kanzlei', 'Steuerberater', 'Café', 'Friseur', 'Spedition', 'Praxis', 'Galerie']
+    surnames = ['Müller', 'Schmidt', 'Yilmaz', 'Nowak', 'Weber', 'Becker', 'Wagner', 'Kaya']
+    return [{
+        'name': f"{random.choice(prefixes)} {random.choice(surnames)} {random.choice(['GmbH', 'UG', '& Co.', ''])}",
+        'rating': round(random.uniform(1, 5), 1),
+        'user_ratings_total': random.randint(0, 200),
+    } for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Lead-Scoring')
+    parser.add_argument('--places', type=int, default=200000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    places = make_places(args.places)
+    rules = RuleSet()
+
+    start = time.perf_counter()
+    legacy = [legacy_score_lead(place) for place in places]
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = rules.score_batch(places)
+    t_batch = time.perf_counter() - start
+
+    assert legacy == batch, 'Scores weichen ab'
+    print(f"{args.places} Places")
+    print(f"  score_lead (alt):  {t_legacy:.3f}s  ({args.places / t_legacy:,.0f} Places/s)")
+    print(f"  score_batch (neu): {t_batch:.3f}s  ({args.places / t_batch:,.0f} Places/s)")
+    print(f"  Faktor: {t_legacy / t_batch:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/search mit ILIKE '%q%' gegen Trigramm-Suche und Präfix-Autocomplete
+
+Setzt pg_trgm und lead_search_fold() aus database_schema.sql voraus.
+Arbeitet auf einer TEMP-Tabelle gleichen Namens - echte Daten bleiben unberührt.
+Verbindung über DB_HOST / DB_NAME / DB_USER / DB_PASSWORD.
+
+Verwendung:
+  python benchmarks/bench_search.py --rows 1000000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from search import LeadSearch  # noqa: E402
+
+TEMP_TABLE = """
+CREATE TEMP TABLE leads_email_campaign (
+    id SERIAL PRIMARY KEY,
+    company_name VARCHAR(255) NOT NULL,
+    address TEXT,
+    website VARCHAR(500),
+    score INTEGER,
+    status VARCHAR(50) DEFAULT 'pending'
+)
+"""
+
+# Namen aus Berufsgruppe + Nachname + Zusatz, Umlaute und ß absichtlich gemischt
+FILL = """
+INSERT INTO leads_email_campaign (company_name, address, website, score)
+SELECT
+    (ARRAY['Kanzlei', 'Steuerberatung', 'Praxis', 'Immobilien', 'Architekturbüro'])[1 + i % 5] || ' ' ||
+    (ARRAY['Müller', 'Schröder', 'Weiß', 'Bäcker', 'Groß', 'Schäfer', 'Köhler', 'Jäger', 'Krüger', 'Hoffmann'])
+        [1 + (i / 5) % 10] || ' ' || i,
+    (ARRAY['Karl-Marx-Straße', 'Sonnenallee', 'Hermannstraße', 'Weserstraße'])[1 + i % 4] || ' ' || (i % 200) ||
+        ', 12043 Berlin',
+    'https://www.lead-' || i || '.de',
+    (random() * 100)::int
+FROM generate_series(1, %s) AS i
+"""
+
+INDEXES = [
+    "CREATE INDEX ON leads_email_campaign USING gin (lead_search_fold(company_name) gin_trgm_ops)",
+    "CREATE INDEX ON leads_email_campaign USING gin (lead_search_fold(address) gin_trgm_ops)",
+    "CREATE INDEX ON leads_email_campaign USING gin (lead_search_fold(website) gin_trgm_ops)",
+    'CREATE INDEX ON leads_email_campaign((lead_search_fold(company_name)) COLLATE "C")',
+]
+
+LEGACY_QUERY = """
+SELECT id, company_name, address, score, status, website
+FROM leads_email_campaign
+WHERE company_name ILIKE %s
+ORDER BY score DESC
+LIMIT 20
+"""
+
+# (Suchbegriff, Modus) - Tippfehler, Umschreibungen und Autocomplete
+QUERIES = [
+    ('Schröder 4711', 'fuzzy'),
+    ('Schroeder 4711', 'fuzzy'),
+    ('Schreoder 4711', 'fuzzy'),
+    ('lead-123456', 'fuzzy'),
+    ('Weiss 99', 'fuzzy'),
+    ('Steuerb', 'prefix'),
+    ('Ka', 'prefix'),
+]
+
+
+def timed(run, repeat):
+    """Median der Laufzeit in ms und das letzte Ergebnis"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Lead-Suche')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        database=os.getenv('DB_NAME', 'n8n'),
+        user=os.getenv('DB_USER', 'postgres'),
+        password=os.getenv('DB_PASSWORD', '')
+    )
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    cursor.execute(TEMP_TABLE)
+    start = time.perf_counter()
+    cursor.execute(FILL, (args.rows,))
+    for index in INDEXES:
+        cursor.execute(index)
+    cursor.execute("ANALYZE leads_email_campaign")
+    conn.commit()
+    print(f"{args.rows:,} Zeilen inkl. Indizes angelegt in {time.perf_counter() - start:.1f}s\n")
+
+    search = LeadSearch()
+
+    def legacy(q):
+        cursor.execute(LEGACY_QUERY, (f'%{q}%',))
+        return cursor.fetchall()
+
+    print(f"{'Suchbegriff':<18} {'Modus':<7} {'ILIKE (alt)':>12} {'neu':>10}  Treffer  bester Treffer")
+    for q, mode in QUERIES:
+        t_legacy, _ = timed(lambda: legacy(q), args.repeat)
+        t_new, rows = timed(lambda: search.search(cursor, q, mode=mode), args.repeat)
+        conn.rollback()
+        best = rows[0]['company_name'] if rows else '-'
+        print(f"{q:<18} {mode:<7} {t_legacy:>9.2f} ms {t_new:>7.2f} ms  {len(rows):>7}  {best}")
+
+    cursor.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
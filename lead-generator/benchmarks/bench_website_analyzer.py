@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Micro-Benchmark: Website-Analyse alt (ganze Seite + .lower() + 10 Scans)
+gegen Streaming-Analyse mit Byte-Limit und Early-Exit
+
+Verwendung:
+  python benchmarks/bench_website_analyzer.py                   # synthetische Fixtures
+  python benchmarks/bench_website_analyzer.py --fixtures ./html # gespeicherte HTML-Seiten
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from website_analyzer import MANUAL_INDICATORS, MODERN_TECH, analyze_chunks  # noqa: E402
+
+
+def legacy_analyze(text: str) -> dict:
+    """Bisherige Implementierung aus lead_generation.analyze_website"""
+    html = text.lower()
+    automation_potential = sum(5 for indicator in MANUAL_INDICATORS if indicator in html)
+    is_modern = any(tech in html for tech in MODERN_TECH)
+    return {'automation_potential': automation_potential, 'is_modern': is_modern, 'length': len(html)}
+
+
+def chunked(data: bytes, max_bytes: int, chunk_size: int = 16384):
+    """Simuliert iter_text_chunks ohne Netzwerk"""
+    data = data[:max_bytes]
+    for i in range(0, len(data), chunk_size):
+        yield data[i:i + chunk_size].decode('utf-8', errors='ignore')
+
+
+def make_fixtures(directory: str, sizes_mb):
+    """Erzeugt große HTML-Seiten mit Keywords an zufälligen Positionen"""
+    filler = '<div class="Row"><p>Lorem ipsum dolor sit amet, Beratung & Service</p></div>\n'
+    paths = []
+    for size in sizes_mb:
+        blocks = [filler] * int(size * 1024 * 1024 / len(filler))
+        for keyword in MANUAL_INDICATORS[:4] + ['React']:
+            blocks.insert(random.randrange(len(blocks)), f'<span>{keyword.title()}</span>\n')
+        path = os.path.join(directory, f'page_{size}mb.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('<!DOCTYPE html><html><body>\n' + ''.join(blocks) + '</body></html>')
+        paths.append(path)
+    return paths
+
+
+def bench(func, repeat: int) -> float:
+    """Beste Laufzeit aus repeat Durchläufen in Sekunden"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Website-Analyse')
+    parser.add_argument('--fixtures', help='Verzeichnis mit gespeicherten .html-Dateien')
+    parser.add_argument('--max-bytes', type=int, default=512 * 1024, help='Byte-Limit der Streaming-Analyse')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(42)
+    tmp = None
+    if args.fixtures:
+        paths = sorted(os.path.join(args.fixtures, f) for f in os.listdir(args.fixtures) if f.endswith('.html'))
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        paths = make_fixtures(tmp.name, [0.5, 2, 8])
+
+    print(f"{'Fixture':<24}{'Größe':>10}{'Alt (ms)':>12}{'Stream (ms)':>14}{'Stream ∞ (ms)':>16}  Ergebnis")
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        data = text.encode('utf-8')
+
+        old = legacy_analyze(text)
+        capped = analyze_chunks(chunked(data, args.max_bytes))
+        uncapped = analyze_chunks(chunked(data, len(data)))
+
+        t_old = bench(lambda: legacy_analyze(data.decode('utf-8')), args.repeat)
+        t_capped = bench(lambda: analyze_chunks(chunked(data, args.max_bytes)), args.repeat)
+        t_uncapped = bench(lambda: analyze_chunks(chunked(data, len(data))), args.repeat)
+
+        same = (old['automation_potential'], old['is_modern']) == \
+            (uncapped['automation_potential'], uncapped['is_modern'])
+        print(f"{os.path.basename(path):<24}{len(text) // 1024:>8}KB"
+              f"{t_old * 1000:>12.2f}{t_capped * 1000:>14.2f}{t_uncapped * 1000:>16.2f}"
+              f"  {'identisch' if same else 'ABWEICHUNG'} (mit Limit: {capped['automation_potential']}"
+              f"/{old['automation_potential']} Punkte)")
+
+    if tmp:
+        tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Lokale Stand-ins für alle externen Dienste (Benchmarks und Tests)
+
+- PlacesHandler:  Google Places Text Search + Details mit Pagination und Latenz
+- OpenAIHandler:  OpenAI-kompatibles /v1/chat/completions
+- SiteHandler:    statische Website-Farm (jede Website unter eigener Loopback-Adresse, mit Impressum)
+- SMTPSink:       nimmt E-Mails an und verwirft sie
+- DNSStub:        autoritativer Stub-Resolver (UDP) für die MX-Prüfung
+
+Jeder Dienst läuft über start_fake() in einem eigenen Prozess, damit weder
+GIL noch Speicherbedarf der Fakes in die Messung des Pipeline-Prozesses eingehen.
+"""
+
+import json
+import multiprocessing
+import random
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import dns.message
+import dns.rcode
+import dns.rdataclass
+import dns.rdatatype
+import dns.rrset
+
+# Namen qualifizieren sich über die Keyword-Regel aus scoring.py
+BUSINESS_TYPES = ['Steuerberater', 'Hausverwaltung', 'Kanzlei', 'Immobilien', 'Werbeagentur',
+                  'Spedition', 'Versicherung', 'Recruiting', 'Bäckerei', 'Friseur']
+STREETS = ['Karl-Marx-Straße', 'Sonnenallee', 'Hermannstraße', 'Weserstraße', 'Richardstraße']
+PAGE_KEYWORDS = ['Anfrage', 'Kontaktformular', 'telefonisch', 'manuell', 'persönlich', 'Verwaltung']
+
+
+def site_host(index: int) -> str:
+    """Eigene Loopback-Adresse pro Website (127.0.0.0/8) - eigenes Per-Host-Limit wie in echt"""
+    index += 2  # 127.0.0.1 bleibt den übrigen Fakes
+    return f"127.{(index >> 16) & 0xff}.{(index >> 8) & 0xff}.{index & 0xff}"
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # viele parallele Worker ohne abgewiesene Verbindungen
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-Alive wie bei den echten APIs
+
+    def _sleep(self):
+        latency = self.server.options.get('latency_ms', 0) / 1000
+        if latency:
+            # Leichte Streuung (±25 %), damit p99 nicht gleich p50 ist
+            time.sleep(latency * random.uniform(0.75, 1.25))
+
+    def _send(self, status: int, body: bytes, content_type: str = 'application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status: int = 200):
+        self._send(status, json.dumps(payload).encode('utf-8'))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PlacesHandler(_FakeHandler):
+    """Text Search liefert pro Kachel per_tile Places (Seiten à page_size), Details je Place"""
+
+    def do_GET(self):
+        self._sleep()
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path.endswith('/textsearch/json'):
+            self._send_json(self.server.text_search(params))
+        elif url.path.endswith('/details/json'):
+            self._send_json(self.server.details(params.get('place_id', '')))
+        else:
+            self._send_json({'status': 'NOT_FOUND'}, 404)
+
+
+class PlacesServer(_Server):
+    def __init__(self, address, options):
+        super().__init__(address, PlacesHandler)
+        self.options = options
+        self._tiles = {}  # location -> Blocknummer in Reihenfolge der ersten Anfrage
+        self._lock = threading.Lock()
+
+    def _tile_range(self, location: str):
+        per_tile, total = self.options['per_tile'], self.options['places']
+        with self._lock:
+            block = self._tiles.setdefault(location, len(self._tiles))
+        start = min(block * per_tile, total)
+        return start, min(start + per_tile, total)
+
+    def text_search(self, params):
+        if 'pagetoken' in params:
+            location, offset = params['pagetoken'].rsplit('|', 1)
+            offset = int(offset)
+        else:
+            location, offset = params.get('location', ''), 0
+        start, end = self._tile_range(location)
+        page_size = self.options['page_size']
+        first = start + offset
+        last = min(first + page_size, end)
+        response = {'status': 'OK' if last > first else 'ZERO_RESULTS',
+                    'results': [self.place(i) for i in range(first, last)]}
+        if last < end:
+            response['next_page_token'] = f"{location}|{offset + page_size}"
+        return response
+
+    @staticmethod
+    def place(i: int):
+        return {
+            'place_id': f"bench-{i}",
+            'name': f"{BUSINESS_TYPES[i % len(BUSINESS_TYPES)]} Bench {i}",
+            'formatted_address': f"{STREETS[i % len(STREETS)]} {i % 200 + 1}, 12043 Berlin",
+            'rating': round(3.5 + (i % 16) / 10, 1),
+            'user_ratings_total': i % 80,
+            'types': ['establishment'],
+            # Raster mit ca. 35-55 m Abstand - Nachbarn landen in angrenzenden Geohash-Zellen
+            'geometry': {'location': {'lat': 52.45 + (i // 300) * 0.0005, 'lng': 13.40 + (i % 300) * 0.0005}},
+        }
+
+    def details(self, place_id: str):
+        try:
+            i = int(place_id.rsplit('-', 1)[1])
+        except (IndexError, ValueError):
+            return {'status': 'INVALID_REQUEST'}
+        result = {
+            'name': self.place(i)['name'],
+            'formatted_phone_number': f"030 {1000000 + i}",
+            'business_status': 'OPERATIONAL',
+        }
+        # Ein Teil der Places hat keine Website (wird in der Pipeline übersprungen)
+        if random.Random(i).random() < self.options['website_ratio']:
+            result['website'] = f"http://{site_host(i)}:{self.options['site_port']}/"
+        return {'status': 'OK', 'result': result}
+
+
+class OpenAIHandler(_FakeHandler):
+    """Minimales /v1/chat/completions im OpenAI-Format inkl. usage"""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        self._sleep()
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json({'error': {'message': 'not found'}}, 404)
+            return
+        prompt = ''.join(message.get('content', '') for message in request.get('messages', []))
+        content = ("BETREFF: Weniger Verwaltung, mehr Mandate | BODY: Guten Tag, "
+                   + "wir automatisieren wiederkehrende Abläufe. " * self.server.options['body_sentences'])
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        self._send_json({
+            'id': f"chatcmpl-bench-{time.monotonic_ns()}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'gpt-4o-mini'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens},
+        })
+
+
+class SiteHandler(_FakeHandler):
+    """Gleiche Seite für jede Host-Adresse; Größe und Keyword-Dichte konfigurierbar
+
+    /impressum nennt eine Adresse je Host, robots.txt fehlt (404) wie bei vielen echten Sites.
+    """
+
+    def do_GET(self):
+        self._sleep()
+        path = urlparse(self.path).path
+        if path == '/':
+            self._send(200, self.server.page, 'text/html; charset=utf-8')
+        elif path == '/impressum':
+            host = self.headers.get('Host', '').split(':')[0]
+            self._send(200, make_impressum(host), 'text/html; charset=utf-8')
+        else:
+            self._send(404, b'Not Found', 'text/plain')
+
+
+def make_page(size_kb: int) -> bytes:
+    """HTML-Seite mit Indikatoren für manuelle Prozesse, verteilt über die ganze Seite"""
+    filler = '<div class="row"><p>Beratung und Service in Neukölln seit 1998.</p></div>\n'
+    blocks = [filler] * max(1, size_kb * 1024 // len(filler))
+    step = max(1, len(blocks) // (len(PAGE_KEYWORDS) + 1))
+    for n, keyword in enumerate(PAGE_KEYWORDS):
+        blocks.insert((n + 1) * step, f'<p>{keyword}</p>\n')
+    blocks.append('<footer><a href="/impressum">Impressum</a></footer>\n')
+    return ('<!DOCTYPE html><html><body>\n' + ''.join(blocks) + '</body></html>').encode('utf-8')
+
+
+def make_impressum(host: str) -> bytes:
+    """Impressum mit Kontaktadresse - Loopback-Adressen haben keine Domain, daher ein Name je Host"""
+    local = host.replace('.', '-')
+    return (f'<!DOCTYPE html><html><body><h1>Impressum</h1>'
+            f'<p>E-Mail: <a href="mailto:kontakt@site-{local}.de">kontakt@site-{local}.de</a></p>'
+            f'</body></html>').encode('utf-8')
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Genug SMTP für smtplib: EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT (ohne TLS/AUTH)
+
+    Optionen für Verbindungsabbrüche: drop_after (Verbindung nach n angenommenen
+    Nachrichten still schließen, wie ein Server-Idle-Timeout) und drop_in_data
+    (nach dem Nachrichteninhalt ohne Antwort schließen).
+    """
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode('ascii'))
+
+    def handle(self):
+        self.reply('220 bench-smtp ESMTP')
+        accepted = 0
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('ascii', errors='replace').strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250-bench-smtp')
+                self.reply('250 SIZE 10485760')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+                self.server.count_message()
+                if self.server.options.get('drop_in_data'):
+                    return
+                latency = self.server.options.get('latency_ms', 0) / 1000
+                if latency:
+                    time.sleep(latency * random.uniform(0.75, 1.25))
+                self.reply('250 OK queued')
+                accepted += 1
+                if accepted == self.server.options.get('drop_after'):
+                    return
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+    def __init__(self, address, options):
+        super().__init__(address, SMTPHandler)
+        self.options = options
+        self.received = 0  # übertragene Nachrichten (auch ohne Bestätigung)
+        self._lock = threading.Lock()
+
+    def count_message(self):
+        with self._lock:
+            self.received += 1
+
+
+class DNSHandler(socketserver.BaseRequestHandler):
+    """Antwortet für jede Domain mit MX mail.<domain> - Ausnahmen über das erste Label:
+
+    nxdomain.*  NXDOMAIN          nomx.*    kein MX, aber A (implizites MX)
+    nullmx.*    Null-MX (RFC 7505) norecords.* weder MX noch A/AAAA
+    v6only.*    weder MX noch A, nur AAAA
+    Zusätzlich ist ein Anteil nxdomain_ratio aller Domains (zufällig, aber stabil) NXDOMAIN.
+    """
+
+    def handle(self):
+        data, sock = self.request
+        query = dns.message.from_wire(data)
+        response = dns.message.make_response(query)
+        question = query.question[0]
+        name = question.name.to_text(omit_final_dot=True).lower()
+        label = name.split('.', 1)[0]
+        ttl = self.server.options.get('ttl', 300)
+
+        if label == 'nxdomain' or random.Random(name).random() < self.server.options.get('nxdomain_ratio', 0):
+            response.set_rcode(dns.rcode.NXDOMAIN)
+            records = []
+        elif question.rdtype == dns.rdatatype.MX and label not in ('nomx', 'norecords', 'v6only'):
+            records = ['0 .'] if label == 'nullmx' else [f"10 mail.{name}."]
+        elif question.rdtype == dns.rdatatype.A and label not in ('norecords', 'v6only'):
+            records = ['127.0.0.1']
+        elif question.rdtype == dns.rdatatype.AAAA and label == 'v6only':
+            records = ['::1']
+        else:
+            records = []  # NoAnswer
+
+        if records:
+            response.answer.append(dns.rrset.from_text_list(
+                question.name, ttl, dns.rdataclass.IN, question.rdtype, records))
+        else:
+            # SOA im Authority-Abschnitt: Grundlage für negatives Caching (RFC 2308)
+            response.authority.append(dns.rrset.from_text(
+                question.name, ttl, dns.rdataclass.IN, dns.rdatatype.SOA,
+                f"ns.{name}. hostmaster.{name}. 1 3600 600 86400 {self.server.options.get('negative_ttl', 60)}"))
+        sock.sendto(response.to_wire(), self.client_address)
+
+
+class DNSStub(socketserver.ThreadingUDPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, options):
+        super().__init__(address, DNSHandler)
+        self.options = options
+
+
+def _make_server(kind: str, host: str, options: dict):
+    if kind == 'places':
+        return PlacesServer((host, 0), options)
+    if kind == 'smtp':
+        return SMTPSink((host, 0), options)
+    if kind == 'dns':
+        return DNSStub((host, 0), options)
+    if kind == 'sites':
+        server = _Server((host, 0), SiteHandler)
+        server.page = make_page(options['page_kb'])
+    elif kind == 'openai':
+        server = _Server((host, 0), OpenAIHandler)
+    else:
+        raise ValueError(f"Unbekannter Fake: {kind}")
+    server.options = options
+    return server
+
+
+def _serve(kind: str, host: str, options: dict, ports):
+    server = _make_server(kind, host, options)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_fake(kind: str, options: dict, host: str = '127.0.0.1'):
+    """Startet einen Fake in eigenem Prozess; liefert (Prozess, Port)
+
+    Die Website-Farm muss auf 0.0.0.0 lauschen, um alle Loopback-Adressen anzunehmen.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    ports = ctx.Queue()
+    process = ctx.Process(target=_serve, args=(kind, host, options, ports), name=f"fake-{kind}", daemon=True)
+    process.start()
+    return process, ports.get(timeout=30)
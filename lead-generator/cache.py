@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Persistenter Cache für API-Antworten
+SQLite-Datei neben dem Skript - funktioniert ohne PostgreSQL
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class SQLiteCache:
+    """Key-Value-Cache mit TTL und LRU-Verdrängung in einer SQLite-Tabelle"""
+
+    def __init__(self, path: str, table: str, ttl: int, max_entries: int):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_accessed ON {table}(accessed_at)")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Liefert Eintrag oder None (abgelaufen/nicht vorhanden)"""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or (self.ttl and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+
+            self.conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Dict):
+        """Speichert Eintrag und verdrängt ggf. die am längsten ungenutzten"""
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            self._writes_since_evict += 1
+            # Verdrängung nicht bei jedem Schreibzugriff prüfen
+            if self._writes_since_evict >= 100:
+                self._evict()
+
+    def delete(self, key: str):
+        """Entfernt einen Eintrag"""
+        with self._lock:
+            self.conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def _evict(self):
+        """LRU-Verdrängung auf max_entries (Lock muss gehalten werden)"""
+        self._writes_since_evict = 0
+        if self.ttl:
+            cursor = self.conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+            self.evictions += cursor.rowcount
+
+        count = self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            cursor = self.conn.execute(f"""
+                DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?
+                )
+            """, (overflow,))
+            self.evictions += cursor.rowcount
+
+    def close(self):
+        """Schließt die SQLite-Verbindung"""
+        with self._lock:
+            self._evict()
+            self.conn.close()
+
+    def summary(self) -> str:
+        """Kurzstatistik für das Run-Log"""
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"{self.hits} Treffer, {self.misses} Fehlzugriffe ({rate:.0f}% Trefferquote)"
+
+
+class DetailsCache(SQLiteCache):
+    """Cache für Google Places Details, Schlüssel: place_id + fields"""
+
+    def __init__(self, path: str, ttl: int, max_entries: int):
+        super().__init__(path, 'place_details', ttl, max_entries)
+
+    def get_details(self, place_id: str, fields: str) -> Optional[Dict]:
+        """Liefert gecachte Details oder None"""
+        return self.get(f"{place_id}|{fields}")
+
+    def set_details(self, place_id: str, fields: str, result: Dict):
+        """Speichert Details-Antwort"""
+        self.set(f"{place_id}|{fields}", result)
+
+
+class WebsiteCache(SQLiteCache):
+    """Pro URL: ETag, Last-Modified, Content-Hash und letztes Analyse-Ergebnis"""
+
+    def __init__(self, path: str, ttl: int, max_entries: int):
+        super().__init__(path, 'website_analysis', ttl, max_entries)
+        self.bytes_saved = 0
+        self.skipped = 0
+
+    def conditional_headers(self, record: Optional[Dict]) -> Dict:
+        """If-None-Match / If-Modified-Since für einen gespeicherten Eintrag"""
+        headers = {}
+        if record:
+            if record.get('etag'):
+                headers['If-None-Match'] = record['etag']
+            if record.get('last_modified'):
+                headers['If-Modified-Since'] = record['last_modified']
+        return headers
+
+    def record_skip(self, bytes_saved: int = 0):
+        """Zählt eine übersprungene Analyse (304 oder unveränderter Hash)"""
+        with self._lock:
+            self.skipped += 1
+            self.bytes_saved += bytes_saved
+
+    def summary(self) -> str:
+        """Kurzstatistik für das Run-Log"""
+        return (f"{super().summary()}, {self.skipped} Analysen übersprungen, "
+                f"{self.bytes_saved / 1024:.0f} KB eingespart")
+
+
+class ContactCache(SQLiteCache):
+    """Gefundene Kontaktadressen pro Domain; Domains ohne Treffer nur negative_ttl lang"""
+
+    def __init__(self, path: str, ttl: int, max_entries: int, negative_ttl: int):
+        super().__init__(path, 'site_contacts', ttl, max_entries)
+        self.negative_ttl = negative_ttl
+
+    def get_contacts(self, domain: str) -> Optional[Dict]:
+        """{'emails': [...], 'pages': n, 'checked_at': ts} oder None"""
+        record = self.get(domain)
+        if record is not None and not record['emails'] and time.time() - record['checked_at'] > self.negative_ttl:
+            return None
+        return record
+
+    def set_contacts(self, domain: str, emails: List[str], pages: int):
+        self.set(domain, {'emails': emails, 'pages': pages, 'checked_at': time.time()})
+
+
+class DomainCache(SQLiteCache):
+    """DNS-Ergebnis pro Mail-Domain; gültig bis expires_at (aus der TTL der Antwort)"""
+
+    def __init__(self, path: str, ttl: int, max_entries: int):
+        super().__init__(path, 'mail_domains', ttl, max_entries)
+
+    def get_domain(self, domain: str) -> Optional[Dict]:
+        """{'status': ..., 'hosts': [...], 'expires_at': ts} oder None (unbekannt/abgelaufen)"""
+        record = self.get(domain)
+        if record is not None and time.time() >= record['expires_at']:
+            return None
+        return record
+
+    def set_domain(self, domain: str, record: Dict):
+        self.set(domain, record)
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Kontaktseiten-Crawler
+Holt je Website Startseite, Impressum und Kontaktseite (begrenzt nach Seiten,
+Tiefe und Zeit), extrahiert E-Mail-Adressen, bewertet sie und cacht das Ergebnis
+pro Domain. Läuft in einem eigenen Thread-Pool neben der übrigen Pipeline.
+"""
+
+import html
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+from dedupe import website_domain
+from metrics import REGISTRY
+from website_analyzer import decode_chunks, is_html_response, iter_raw_chunks
+
+CRAWL_LATENCY = REGISTRY.histogram(
+    'leadgen_contact_crawl_duration_seconds', 'Dauer der Kontaktsuche je Website', ['result'],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0))
+CRAWL_PAGES = REGISTRY.counter('leadgen_contact_pages_total', 'Von der Kontaktsuche abgerufene Seiten')
+
+EMAIL_PATTERN = re.compile(r'[a-z0-9][a-z0-9._%+-]{0,63}@(?:[a-z0-9-]+\.)+[a-z]{2,24}', re.IGNORECASE)
+# Verschleierte Schreibweisen: info [at] firma [dot] de, info(at)firma.de
+OBFUSCATED_AT = re.compile(r'\s*[\[(]\s*(?:at|ät|@)\s*[\])]\s*', re.IGNORECASE)
+OBFUSCATED_DOT = re.compile(r'\s*[\[(]\s*(?:dot|punkt)\s*[\])]\s*', re.IGNORECASE)
+CFEMAIL = re.compile(r'data-cfemail="([0-9a-f]+)"', re.IGNORECASE)
+
+# Seitentypen in Abrufreihenfolge; das Impressum muss in Deutschland eine E-Mail-Adresse nennen
+PAGE_KINDS = (
+    ('impressum', ('impressum', 'imprint', 'legal-notice', 'anbieterkennzeichnung')),
+    ('kontakt', ('kontakt', 'contact')),
+    ('datenschutz', ('datenschutz', 'privacy')),
+)
+PAGE_ORDER = {kind: rank for rank, (kind, _) in enumerate(PAGE_KINDS)}
+FALLBACK_PATHS = ('/impressum', '/kontakt')
+
+# Dateiendungen, die das Muster fälschlich als TLD erkennt (logo@2x.png)
+FILE_SUFFIXES = {'png', 'jpg', 'jpeg', 'gif', 'svg', 'webp', 'css', 'js', 'ico', 'pdf', 'woff', 'woff2'}
+JUNK_DOMAINS = {'example.com', 'example.de', 'example.org', 'domain.de', 'domain.com', 'beispiel.de',
+                'sentry.io', 'wixpress.com', 'sentry-next.wixpress.com', 'ingest.sentry.io'}
+FREEMAIL_DOMAINS = {'gmail.com', 'googlemail.com', 'web.de', 'gmx.de', 'gmx.net', 't-online.de', 'outlook.com',
+                    'outlook.de', 'hotmail.com', 'hotmail.de', 'yahoo.de', 'yahoo.com', 'icloud.com', 'posteo.de',
+                    'mail.de', 'freenet.de', 'aol.com', 'online.de', 'arcor.de'}
+# Allgemeine Adressen, die tatsächlich gelesen werden
+PREFERRED_LOCALS = {'info', 'kontakt', 'contact', 'office', 'mail', 'post', 'hallo', 'hello', 'anfrage',
+                    'service', 'team', 'buero', 'kanzlei', 'praxis', 'verwaltung'}
+# Nie anschreiben: automatische, rechtliche oder fachfremde Postfächer
+UNWANTED_LOCALS = ('noreply', 'no-reply', 'donotreply', 'do-not-reply', 'mailer-daemon', 'postmaster',
+                   'abuse', 'hostmaster', 'webmaster', 'datenschutz', 'privacy', 'dsb', 'gdpr', 'dpo',
+                   'bewerbung', 'jobs', 'karriere', 'career', 'newsletter', 'unsubscribe', 'rechnung',
+                   'invoice', 'buchhaltung', 'presse', 'press')
+PERSONAL_LOCAL = re.compile(r'[a-z]+[._-][a-z]+')
+
+
+def decode_cfemail(encoded: str) -> Optional[str]:
+    """Cloudflare-E-Mail-Schutz: erstes Byte ist der XOR-Schlüssel"""
+    try:
+        data = bytes.fromhex(encoded)
+        return bytes(b ^ data[0] for b in data[1:]).decode('utf-8')
+    except (ValueError, IndexError, UnicodeDecodeError):
+        return None
+
+
+def extract_emails(page: str) -> Dict[str, Dict]:
+    """E-Mail-Adressen einer HTML-Seite: Adresse -> {'count', 'mailto'}"""
+    text = html.unescape(page)
+    text = OBFUSCATED_DOT.sub('.', OBFUSCATED_AT.sub('@', text))
+    candidates = [match.group(0) for match in EMAIL_PATTERN.finditer(text)]
+    candidates += [email for email in map(decode_cfemail, CFEMAIL.findall(page)) if email]
+    mailto = {match.lower() for match in re.findall(r'mailto:([^"\'?>\s]+)', text, re.IGNORECASE)}
+
+    found = {}
+    for email in candidates:
+        email = email.lower().strip('.')
+        local, _, domain = email.rpartition('@')
+        if not local or domain.rsplit('.', 1)[-1] in FILE_SUFFIXES or domain in JUNK_DOMAINS:
+            continue
+        entry = found.setdefault(email, {'count': 0, 'mailto': email in mailto})
+        entry['count'] += 1
+    return found
+
+
+def score_email(email: str, site_domain: str, hits: Dict) -> int:
+    """Bewertung einer Adresse für die Erstansprache (< 0 = nicht verwenden)"""
+    local, _, domain = email.rpartition('@')
+    if any(local.startswith(unwanted) for unwanted in UNWANTED_LOCALS):
+        return -1
+    score = 0
+    if site_domain and (domain == site_domain or domain.endswith('.' + site_domain)
+                        or site_domain.endswith('.' + domain)):
+        score += 50
+    elif domain in FREEMAIL_DOMAINS:
+        score += 20  # kleine Betriebe nutzen oft eine Freemail-Adresse
+    if local in PREFERRED_LOCALS:
+        score += 20
+    elif PERSONAL_LOCAL.fullmatch(local):
+        score += 15  # vorname.nachname - meist Inhaber oder Ansprechpartner
+    if hits.get('mailto'):
+        score += 10
+    if {'impressum', 'kontakt'} & set(hits.get('pages', ())):
+        score += 10
+    return score + min(hits.get('count', 0), 5)
+
+
+def rank_emails(found: Dict[str, Dict], site_domain: str, limit: int = 5) -> List[str]:
+    """Verwendbare Adressen, beste zuerst"""
+    scored = [(score_email(email, site_domain, hits), email) for email, hits in found.items()]
+    return [email for score, email in sorted(scored, key=lambda item: (-item[0], item[1])) if score >= 0][:limit]
+
+
+class _LinkParser(HTMLParser):
+    """Sammelt (href, Linktext) aller <a>-Elemente"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: List[Tuple[str, str]] = []
+        self._href = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            self._href = dict(attrs).get('href')
+            self._text = []
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._href is not None:
+            self.links.append((self._href, ' '.join(''.join(self._text).split())))
+            self._href = None
+
+
+def contact_links(page: str, base_url: str) -> List[Tuple[str, str]]:
+    """Links auf Impressum/Kontakt/Datenschutz derselben Website: [(Seitentyp, URL)] in Abrufreihenfolge"""
+    parser = _LinkParser()
+    try:
+        parser.feed(page)
+        parser.close()
+    except Exception:
+        pass  # kaputtes HTML: bis dahin gefundene Links verwenden
+    host = urlparse(base_url).hostname or ''
+    links = {}
+    for href, text in parser.links:
+        if not href or href.startswith(('mailto:', 'tel:', 'javascript:', '#')):
+            continue
+        url = urljoin(base_url, href).split('#')[0]
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or website_domain(parsed.hostname) != website_domain(host):
+            continue
+        haystack = f"{parsed.path} {text}".lower()
+        for kind, keywords in PAGE_KINDS:
+            if any(keyword in haystack for keyword in keywords):
+                links.setdefault(url, kind)
+                break
+    return sorted(((kind, url) for url, kind in links.items()), key=lambda link: PAGE_ORDER[link[0]])
+
+
+class HostThrottle:
+    """Höflichkeit pro Host: ein Abruf gleichzeitig und Mindestabstand zwischen Abrufen
+
+    Hosts ohne laufenden Abruf, deren Mindestabstand verstrichen ist, werden
+    regelmäßig entfernt - der Zustand wächst nicht mit der Zahl besuchter Hosts.
+    """
+
+    def __init__(self, delay: float, prune_at: int = 1024):
+        self.delay = delay
+        self._hosts: Dict[str, list] = {}  # Host -> [Lock, Zeitpunkt des letzten Abrufs, Nutzer]
+        self._lock = threading.Lock()
+        self._min_prune_at = prune_at
+        self._prune_at = prune_at
+
+    def _prune(self):
+        """Entfernt ungenutzte Hosts (unter self._lock aufrufen)"""
+        cutoff = time.monotonic() - self.delay
+        self._hosts = {host: state for host, state in self._hosts.items() if state[2] or state[1] > cutoff}
+        # Amortisiert: erst wieder aufräumen, wenn sich die Zahl der Hosts verdoppelt hat
+        self._prune_at = max(self._min_prune_at, 2 * len(self._hosts))
+
+    def wait(self, host: str):
+        """Blockiert bis der Host wieder angefragt werden darf - danach release() aufrufen"""
+        with self._lock:
+            if len(self._hosts) >= self._prune_at:
+                self._prune()
+            state = self._hosts.setdefault(host, [threading.Lock(), 0.0, 0])
+            state[2] += 1
+        state[0].acquire()
+        pause = state[1] + self.delay - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+
+    def release(self, host: str):
+        with self._lock:
+            state = self._hosts[host]
+            state[1] = time.monotonic()
+            state[2] -= 1
+        state[0].release()
+
+
+class ContactCrawler:
+    """Sucht Kontaktadressen einer Website; submit() liefert ein Future, Ergebnis pro Domain gecacht
+
+    Budget je Website: max_pages Abrufe (Startseite mitgezählt), Links bis max_depth
+    Ebenen unter der Startseite, höchstens site_timeout Sekunden.
+    """
+
+    def __init__(self, http, cache, concurrency: int = 8, max_pages: int = 4, max_depth: int = 2,
+                 max_bytes: int = 256 * 1024, host_delay: float = 1.0, site_timeout: float = 20.0,
+                 user_agent: str = None):
+        self.http = http
+        self.cache = cache
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self.site_timeout = site_timeout
+        self.headers = {'User-Agent': user_agent} if user_agent else {}
+        self.throttle = HostThrottle(host_delay)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='contacts')
+        self.stats = {'sites': 0, 'pages': 0, 'found': 0, 'robots_blocked': 0}
+        self._stats_lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def lookup(self, website: str) -> Optional[List[str]]:
+        """Gecachtes Ergebnis (Liste, evtl. leer) oder None, falls noch nicht gecrawlt"""
+        domain = website_domain(website)
+        if not domain:
+            return []
+        record = self.cache.get_contacts(domain)
+        return record['emails'] if record is not None else None
+
+    def submit(self, website: str) -> Future:
+        """Crawlt im Hintergrund; Cache-Treffer und parallele Anfragen derselben Domain ohne neuen Crawl"""
+        domain = website_domain(website)
+        cached = self.lookup(website)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+        with self._inflight_lock:
+            future = self._inflight.get(domain)
+            if future is None:
+                future = self.executor.submit(self._crawl_and_cache, website, domain)
+                self._inflight[domain] = future
+                future.add_done_callback(lambda _, domain=domain: self._forget(domain))
+            return future
+
+    def _forget(self, domain: str):
+        with self._inflight_lock:
+            self._inflight.pop(domain, None)
+
+    def _crawl_and_cache(self, website: str, domain: str) -> List[str]:
+        start = time.perf_counter()
+        emails, pages = self.crawl(website)
+        CRAWL_LATENCY.labels('found' if emails else 'none').observe(time.perf_counter() - start)
+        CRAWL_PAGES.inc(pages)
+        self.cache.set_contacts(domain, emails, pages)
+        self._count(sites=1, pages=pages, found=1 if emails else 0)
+        return emails
+
+    def _fetch(self, url: str) -> Optional[str]:
+        """HTML einer Seite (None bei Fehler, Nicht-HTML oder Statuscode ≠ 200)"""
+        host = urlparse(url).hostname or ''
+        self.throttle.wait(host)
+        try:
+            with self.http.get(url, endpoint='crawl', stream=True, headers=self.headers) as response:
+                if response.status_code != 200 or not is_html_response(response):
+                    return None
+                chunks = decode_chunks(iter_raw_chunks(response, self.max_bytes), response.encoding)
+                return ''.join(chunks)
+        except Exception:
+            return None
+        finally:
+            self.throttle.release(host)
+
+    def _robots(self, url: str) -> Optional[RobotFileParser]:
+        """robots.txt der Website (None = keine Einschränkungen bekannt)"""
+        parsed = urlparse(url)
+        host = parsed.hostname or ''
+        self.throttle.wait(host)
+        try:
+            with self.http.get(f"{parsed.scheme}://{parsed.netloc}/robots.txt", endpoint='crawl',
+                               headers=self.headers) as response:
+                if response.status_code != 200:
+                    return None
+                parser = RobotFileParser()
+                parser.parse(response.text[:64 * 1024].splitlines())
+                return parser
+        except Exception:
+            return None
+        finally:
+            self.throttle.release(host)
+
+    def crawl(self, website: str) -> Tuple[List[str], int]:
+        """Durchsucht Startseite und Kontaktseiten: (bewertete Adressen, abgerufene Seiten)"""
+        start_url = website if '://' in website else f"http://{website}"
+        deadline = time.monotonic() + self.site_timeout
+        robots = self._robots(start_url)
+        agent = self.headers.get('User-Agent', '*')
+
+        found: Dict[str, Dict] = {}
+        queue = [('start', start_url, 0)]
+        seen = {start_url}
+        pages = 0
+        while queue and pages < self.max_pages and time.monotonic() < deadline:
+            kind, url, depth = queue.pop(0)
+            if robots and not robots.can_fetch(agent, url):
+                self._count(robots_blocked=1)
+                continue
+            page = self._fetch(url)
+            pages += 1
+            if page is None:
+                continue
+            for email, hits in extract_emails(page).items():
+                entry = found.setdefault(email, {'count': 0, 'mailto': False, 'pages': set()})
+                entry['count'] += hits['count']
+                entry['mailto'] |= hits['mailto']
+                entry['pages'].add(kind)
+            # Impressum gelesen und eine Adresse der eigenen Domain gefunden: fertig
+            if kind == 'impressum' and any(score_email(email, website_domain(website), hits) >= 50
+                                           for email, hits in found.items()):
+                break
+            if depth >= self.max_depth:
+                continue
+            links = contact_links(page, url)
+            if depth == 0 and not links:
+                # Keine passenden Links (z.B. JavaScript-Navigation): übliche Pfade raten
+                links = [(path.strip('/'), urljoin(url, path)) for path in FALLBACK_PATHS]
+            for link_kind, link in links:
+                if link not in seen:
+                    seen.add(link)
+                    queue.append((link_kind, link, depth + 1))
+            # Impressum vor Kontakt vor Datenschutz, unabhängig von der Fundtiefe
+            queue.sort(key=lambda item: PAGE_ORDER.get(item[0], len(PAGE_ORDER)))
+
+        return rank_emails(found, website_domain(website)), pages
+
+    def summary(self) -> str:
+        """Kurzstatistik für das Run-Log"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return (f"{stats['sites']} Websites, {stats['pages']} Seiten, Adresse gefunden bei {stats['found']}, "
+                f"{stats['robots_blocked']} Seiten per robots.txt gesperrt")
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -8,6 +8,8 @@ CREATE TABLE IF NOT EXISTS leads_email_campaign (
     phone VARCHAR(50),
     website VARCHAR(500),
     score INTEGER,
+    rating NUMERIC(2,1),
+    user_ratings_total INTEGER,
     email VARCHAR(255),
     email_subject TEXT,
     email_body TEXT,
@@ -22,22 +24,278 @@ CREATE TABLE IF NOT EXISTS leads_email_campaign (
     UNIQUE(company_name, address)
 );
 
+-- Migration bestehender Installationen
+ALTER TABLE leads_email_campaign ADD COLUMN IF NOT EXISTS rating NUMERIC(2,1);
+ALTER TABLE leads_email_campaign ADD COLUMN IF NOT EXISTS user_ratings_total INTEGER;
+ALTER TABLE leads_email_campaign ADD COLUMN IF NOT EXISTS place_id VARCHAR(255);
+ALTER TABLE leads_email_campaign ADD COLUMN IF NOT EXISTS geohash VARCHAR(12);
+
+-- Google Place ID (ältere Leads ohne)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_leads_place_id ON leads_email_campaign(place_id) WHERE place_id IS NOT NULL;
+
 -- Index für Performance
-CREATE INDEX idx_status ON leads_email_campaign(status);
-CREATE INDEX idx_sent_at ON leads_email_campaign(sent_at);
-CREATE INDEX idx_followup ON leads_email_campaign(followup_count, sent_at);
+CREATE INDEX IF NOT EXISTS idx_status ON leads_email_campaign(status);
+CREATE INDEX IF NOT EXISTS idx_sent_at ON leads_email_campaign(sent_at);
+CREATE INDEX IF NOT EXISTS idx_followup ON leads_email_campaign(followup_count, sent_at);
+-- Keyset-Pagination der Lead-Liste (/api/leads), mit und ohne Status-Filter
+CREATE INDEX IF NOT EXISTS idx_leads_keyset ON leads_email_campaign((COALESCE(score, 0)) DESC, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_leads_status_keyset ON leads_email_campaign(status, (COALESCE(score, 0)) DESC, created_at DESC, id DESC);
+
+-- Lead-Suche (/api/search): Trigramm-Indizes auf normalisierten Texten
+-- lead_search_fold() muss zu search.fold() passen (Umlaute ausgeschrieben, Akzente entfernt, nur a-z0-9)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION lead_search_fold(value TEXT) RETURNS TEXT AS $$
+    SELECT btrim(regexp_replace(
+        translate(
+            replace(replace(replace(replace(replace(replace(replace(replace(lower(value),
+                'ä', 'ae'), 'ö', 'oe'), 'ü', 'ue'), 'ß', 'ss'), 'Ä', 'ae'), 'Ö', 'oe'), 'Ü', 'ue'), 'ẞ', 'ss'),
+            'àáâãåāăąçćčďèéêëēėęěìíîïīįłñńňòóôõøōőŕřśšşťùúûūůűųýÿźżžÀÁÂÃÅĀĂĄÇĆČĎÈÉÊËĒĖĘĚÌÍÎÏĪĮŁÑŃŇÒÓÔÕØŌŐŔŘŚŠŞŤÙÚÛŪŮŰŲÝŸŹŻŽ',
+            'aaaaaaaacccdeeeeeeeeiiiiiilnnnooooooorrssstuuuuuuuyyzzzaaaaaaaacccdeeeeeeeeiiiiiilnnnooooooorrssstuuuuuuuyyzzz'),
+        '[^a-z0-9]+', ' ', 'g'))
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+
+CREATE INDEX IF NOT EXISTS idx_leads_name_trgm ON leads_email_campaign USING gin (lead_search_fold(company_name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_leads_address_trgm ON leads_email_campaign USING gin (lead_search_fold(address) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_leads_website_trgm ON leads_email_campaign USING gin (lead_search_fold(website) gin_trgm_ops);
+-- Autocomplete: Präfixsuche und Sortierung direkt aus dem B-Tree
+CREATE INDEX IF NOT EXISTS idx_leads_name_prefix ON leads_email_campaign((lead_search_fold(company_name)) COLLATE "C");
+
+-- Dubletten-Erkennung (dedupe.py): Blöcke nach Geohash-Zelle und Website-Domain
+-- lead_domain() muss zu dedupe.website_domain() passen (Host klein, ohne Schema, www und Port)
+CREATE OR REPLACE FUNCTION lead_domain(website TEXT) RETURNS TEXT AS $$
+    SELECT NULLIF(regexp_replace(
+        split_part(split_part(split_part(split_part(
+            regexp_replace(lower(btrim(website)), '^[a-z][a-z0-9+.-]*://', ''),
+            '/', 1), '?', 1), '#', 1), ':', 1),
+        '^www\.', ''), '')
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+
+CREATE INDEX IF NOT EXISTS idx_leads_domain ON leads_email_campaign(lead_domain(website));
+CREATE INDEX IF NOT EXISTS idx_leads_geohash ON leads_email_campaign(geohash) WHERE geohash IS NOT NULL;
+
+-- Ergebnis des Bulk-Laufs (--find-duplicates): nur die Dubletten, nicht das Original
+CREATE TABLE IF NOT EXISTS lead_duplicates (
+    lead_id INTEGER PRIMARY KEY REFERENCES leads_email_campaign(id) ON DELETE CASCADE,
+    canonical_id INTEGER NOT NULL REFERENCES leads_email_campaign(id) ON DELETE CASCADE,
+    reason VARCHAR(20),  -- domain | phone | name_address | name_nearby
+    detected_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_lead_duplicates_canonical ON lead_duplicates(canonical_id);
+
+-- Versand-Warteschlange (Generierung und Versand entkoppelt)
+CREATE TABLE IF NOT EXISTS email_queue (
+    id SERIAL PRIMARY KEY,
+    lead_id INTEGER NOT NULL REFERENCES leads_email_campaign(id) ON DELETE CASCADE,
+    kind VARCHAR(20) NOT NULL DEFAULT 'initial',  -- initial | followup
+    recipient VARCHAR(255) NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued | sending | sent | failed
+    scheduled_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    claimed_at TIMESTAMP,
+    attempts INTEGER DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_email_queue_due ON email_queue(scheduled_at) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_email_queue_sent_at ON email_queue(sent_at) WHERE status = 'sent';
+CREATE INDEX IF NOT EXISTS idx_email_queue_lead ON email_queue(lead_id);
+
+-- Arbeitsaufträge für parallele Worker (Anreicherung, Generierung, Follow-ups)
+CREATE TABLE IF NOT EXISTS campaign_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(20) NOT NULL,  -- enrich | contact | generate | followup
+    dedupe_key TEXT NOT NULL,  -- place_id bzw. lead_id:followup_count
+    payload JSONB NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,  -- Score, höchster zuerst
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- pending | running | done | failed
+    worker VARCHAR(255),
+    lease_until TIMESTAMP WITH TIME ZONE,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE(kind, dedupe_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_campaign_jobs_claim ON campaign_jobs(kind, priority DESC, id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_campaign_jobs_lease ON campaign_jobs(lease_until) WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_campaign_jobs_worker ON campaign_jobs(worker) WHERE status = 'running';
+
+-- Bearbeitungsstand je Place über alle Kampagnen (Vorfilter vor jedem externen Aufruf)
+CREATE TABLE IF NOT EXISTS campaign_places (
+    place_id VARCHAR(255) PRIMARY KEY,
+    fingerprint CHAR(40) NOT NULL,  -- Name, Adresse, Score: Änderung = erneut prüfen
+    score INTEGER NOT NULL,
+    payload JSONB NOT NULL,  -- Text-Search-Ergebnis für die Einplanung
+    stage VARCHAR(20) NOT NULL DEFAULT 'discovered',  -- discovered | planned | enriched | done | rejected
+    outcome VARCHAR(50),  -- z.B. lead, duplicate, no_website, low_score, failed (Job aufgegeben)
+    revision INTEGER NOT NULL DEFAULT 1,  -- erhöht bei erneuter Prüfung (Teil des Job-dedupe_key)
+    lead_id INTEGER REFERENCES leads_email_campaign(id) ON DELETE SET NULL,
+    run_id INTEGER,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE campaign_places ADD COLUMN IF NOT EXISTS geohash VARCHAR(12);  -- Blockbildung der Dubletten-Prüfung
+ALTER TABLE campaign_places ADD COLUMN IF NOT EXISTS domain VARCHAR(255);  -- nach der Anreicherung
+ALTER TABLE campaign_places ADD COLUMN IF NOT EXISTS duplicate_of VARCHAR(255);  -- place_id des Originals
+
+CREATE INDEX IF NOT EXISTS idx_campaign_places_plan ON campaign_places(score DESC) WHERE stage = 'discovered';
+CREATE INDEX IF NOT EXISTS idx_campaign_places_geohash ON campaign_places(geohash) WHERE geohash IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_campaign_places_domain ON campaign_places(domain) WHERE domain IS NOT NULL;
+
+-- Suchläufe mit Checkpoint: ein abgebrochener Lauf setzt nach der letzten fertigen Kachel fort
+CREATE TABLE IF NOT EXISTS campaign_runs (
+    id SERIAL PRIMARY KEY,
+    tiles_key CHAR(40) NOT NULL,  -- Suchgebiet + Kachelgröße; nur gleiche Raster werden fortgesetzt
+    tiles_done INTEGER NOT NULL DEFAULT 0,
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    discovery_finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Laufende Kampagnen-Statistik (per Trigger gepflegt, Lesen ist O(1))
+-- Genau eine Zeile; avg_score = score_sum / scored_leads
+CREATE TABLE IF NOT EXISTS campaign_totals (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    total_leads BIGINT NOT NULL DEFAULT 0,
+    emails_sent BIGINT NOT NULL DEFAULT 0,
+    responses BIGINT NOT NULL DEFAULT 0,
+    scored_leads BIGINT NOT NULL DEFAULT 0,
+    score_sum BIGINT NOT NULL DEFAULT 0,
+    last_email_sent TIMESTAMP
+);
+
+-- Tages-Rollup nach DATE(sent_at) für /api/timeline
+CREATE TABLE IF NOT EXISTS campaign_daily (
+    day DATE PRIMARY KEY,
+    emails_sent BIGINT NOT NULL DEFAULT 0,
+    responses BIGINT NOT NULL DEFAULT 0
+);
+
+-- Eine Zeile des Deltas: +1 = neuer Zeilenstand, -1 = alter Zeilenstand
+DROP TYPE IF EXISTS campaign_stats_delta CASCADE;
+CREATE TYPE campaign_stats_delta AS (
+    sign INTEGER,
+    score INTEGER,
+    status VARCHAR(50),
+    sent_at TIMESTAMP,
+    response_received BOOLEAN
+);
+
+CREATE OR REPLACE FUNCTION campaign_stats_apply(delta campaign_stats_delta[]) RETURNS void AS $$
+    UPDATE campaign_totals t SET
+        total_leads = t.total_leads + d.leads,
+        emails_sent = t.emails_sent + d.sent,
+        responses = t.responses + d.responses,
+        scored_leads = t.scored_leads + d.scored,
+        score_sum = t.score_sum + d.score_sum,
+        -- Entfällt das bisherige Maximum, per idx_sent_at neu bestimmen
+        last_email_sent = CASE
+            WHEN d.max_removed_sent >= t.last_email_sent
+                THEN (SELECT MAX(sent_at) FROM leads_email_campaign)
+            ELSE GREATEST(t.last_email_sent, d.max_added_sent)
+        END
+    FROM (
+        SELECT
+            COALESCE(SUM(sign), 0) AS leads,
+            COALESCE(SUM(sign) FILTER (WHERE status = 'sent'), 0) AS sent,
+            COALESCE(SUM(sign) FILTER (WHERE response_received), 0) AS responses,
+            COALESCE(SUM(sign) FILTER (WHERE score IS NOT NULL), 0) AS scored,
+            COALESCE(SUM(sign * score), 0) AS score_sum,
+            MAX(sent_at) FILTER (WHERE sign > 0) AS max_added_sent,
+            MAX(sent_at) FILTER (WHERE sign < 0) AS max_removed_sent
+        FROM unnest(delta)
+    ) d
+    WHERE d.leads <> 0 OR d.sent <> 0 OR d.responses <> 0 OR d.scored <> 0 OR d.score_sum <> 0
+       OR d.max_added_sent IS NOT NULL OR d.max_removed_sent IS NOT NULL;
+
+    INSERT INTO campaign_daily AS c (day, emails_sent, responses)
+    SELECT sent_at::date, SUM(sign), COALESCE(SUM(sign) FILTER (WHERE response_received), 0)
+    FROM unnest(delta)
+    WHERE sent_at IS NOT NULL
+    GROUP BY 1
+    HAVING SUM(sign) <> 0 OR COALESCE(SUM(sign) FILTER (WHERE response_received), 0) <> 0
+    ON CONFLICT (day) DO UPDATE SET
+        emails_sent = c.emails_sent + EXCLUDED.emails_sent,
+        responses = c.responses + EXCLUDED.responses;
+$$ LANGUAGE sql;
+
+-- Statement-Trigger mit Transition Tables: ein Update pro Batch-INSERT statt pro Zeile
+CREATE OR REPLACE FUNCTION campaign_stats_track() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM campaign_stats_apply(ARRAY(
+            SELECT ROW(1, score, status, sent_at, response_received)::campaign_stats_delta FROM new_rows));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM campaign_stats_apply(ARRAY(
+            SELECT ROW(-1, score, status, sent_at, response_received)::campaign_stats_delta FROM old_rows));
+    ELSE
+        PERFORM campaign_stats_apply(ARRAY(
+            SELECT ROW(1, score, status, sent_at, response_received)::campaign_stats_delta FROM new_rows
+            UNION ALL
+            SELECT ROW(-1, score, status, sent_at, response_received)::campaign_stats_delta FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Kompletter Neuaufbau (python lead_generation.py --rebuild-stats)
+CREATE OR REPLACE FUNCTION campaign_stats_rebuild() RETURNS void AS $$
+BEGIN
+    -- Schreibzugriffe während des Neuaufbaus blockieren, damit kein Trigger-Delta verloren geht
+    LOCK TABLE leads_email_campaign IN SHARE MODE;
+
+    DELETE FROM campaign_daily;
+    INSERT INTO campaign_daily (day, emails_sent, responses)
+    SELECT sent_at::date, COUNT(*), COUNT(*) FILTER (WHERE response_received)
+    FROM leads_email_campaign
+    WHERE sent_at IS NOT NULL
+    GROUP BY 1;
+
+    INSERT INTO campaign_totals (id, total_leads, emails_sent, responses, scored_leads, score_sum, last_email_sent)
+    SELECT TRUE, COUNT(*), COUNT(*) FILTER (WHERE status = 'sent'), COUNT(*) FILTER (WHERE response_received),
+           COUNT(score), COALESCE(SUM(score), 0), MAX(sent_at)
+    FROM leads_email_campaign
+    ON CONFLICT (id) DO UPDATE SET
+        total_leads = EXCLUDED.total_leads,
+        emails_sent = EXCLUDED.emails_sent,
+        responses = EXCLUDED.responses,
+        scored_leads = EXCLUDED.scored_leads,
+        score_sum = EXCLUDED.score_sum,
+        last_email_sent = EXCLUDED.last_email_sent;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS campaign_stats_insert ON leads_email_campaign;
+DROP TRIGGER IF EXISTS campaign_stats_update ON leads_email_campaign;
+DROP TRIGGER IF EXISTS campaign_stats_delete ON leads_email_campaign;
+CREATE TRIGGER campaign_stats_insert AFTER INSERT ON leads_email_campaign
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION campaign_stats_track();
+CREATE TRIGGER campaign_stats_update AFTER UPDATE ON leads_email_campaign
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION campaign_stats_track();
+CREATE TRIGGER campaign_stats_delete AFTER DELETE ON leads_email_campaign
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION campaign_stats_track();
+
+-- Bestehende Daten übernehmen (idempotent)
+SELECT campaign_stats_rebuild();
 
--- View für Reporting
+-- View für Reporting (liest nur die laufenden Summen)
 CREATE OR REPLACE VIEW campaign_stats AS
 SELECT 
-    COUNT(*) as total_leads,
-    COUNT(CASE WHEN status = 'sent' THEN 1 END) as emails_sent,
-    COUNT(CASE WHEN response_received THEN 1 END) as responses,
-    ROUND(COUNT(CASE WHEN response_received THEN 1 END)::NUMERIC / 
-          NULLIF(COUNT(CASE WHEN status = 'sent' THEN 1 END), 0) * 100, 2) as response_rate,
-    AVG(score) as avg_score,
-    MAX(sent_at) as last_email_sent
-FROM leads_email_campaign;
+    total_leads,
+    emails_sent,
+    responses,
+    ROUND(responses::NUMERIC / NULLIF(emails_sent, 0) * 100, 2) as response_rate,
+    score_sum::NUMERIC / NULLIF(scored_leads, 0) as avg_score,
+    last_email_sent
+FROM campaign_totals;
 
 -- Beispiel-Abfragen für dein Dashboard:
 
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+PostgreSQL Connection-Pool
+Thread-sicher, Health-Check beim Auschecken, fork-sicher (gunicorn)
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeout(Exception):
+    """Keine Verbindung innerhalb des Timeouts verfügbar"""
+
+
+class ConnectionPool:
+    """Pool mit min/max Größe, Wartezeit-Messung und Auslastung"""
+
+    def __init__(self, db_config: dict, minconn: int = 1, maxconn: int = 10,
+                 timeout: float = 5.0, check_after: float = 30.0):
+        self.db_config = db_config
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.check_after = check_after  # Sekunden Leerlauf, nach denen SELECT 1 geprüft wird
+        self._reset()
+
+    def _reset(self):
+        """Initialisiert den Zustand (auch nach fork im Kindprozess)"""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = []  # [(conn, zurückgegeben_um)]
+        self._in_use = 0
+        self.checkouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.timeouts = 0
+        self.replaced = 0
+        self.last_error = None
+        self._prefilled = False
+
+    def _check_fork(self):
+        """Erkennt fork (gunicorn) und setzt den Pool im Kindprozess zurück"""
+        # Verbindungen des Elternprozesses nicht schließen (würde dessen Sessions beenden),
+        # sondern nur verwerfen und im Worker neu aufbauen
+        if os.getpid() != self._pid:
+            self._reset()
+
+    def _connect(self):
+        """Neue Verbindung, merkt sich den letzten Fehler für /health"""
+        try:
+            conn = psycopg2.connect(**self.db_config)
+        except Exception as e:
+            self.last_error = str(e)
+            raise
+        self.last_error = None
+        return conn
+
+    def _healthy(self, conn, idle_since: float) -> bool:
+        """Prüft eine Verbindung vor der Herausgabe"""
+        if conn.closed:
+            return False
+        if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if time.monotonic() - idle_since < self.check_after:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """Checkt eine Verbindung aus (wartet bis timeout)"""
+        self._check_fork()
+        if not self._prefilled:
+            self._prefilled = True
+            try:
+                self.prefill()
+            except psycopg2.Error:
+                pass  # Fehler wird unten beim eigentlichen Verbindungsaufbau gemeldet
+        start = time.monotonic()
+        with self._available:
+            while not self._idle and self._in_use >= self.maxconn:
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(f"Keine DB-Verbindung frei nach {self.timeout}s")
+                self._available.wait(remaining)
+            entry = self._idle.pop() if self._idle else None
+            self._in_use += 1
+            wait_ms = (time.monotonic() - start) * 1000
+            self.checkouts += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+
+        try:
+            if entry and self._healthy(*entry):
+                return entry[0]
+            if entry:
+                self.replaced += 1
+                entry[0].close()
+            return self._connect()
+        except Exception:
+            with self._available:
+                self._in_use -= 1
+                self._available.notify()
+            raise
+
+    def putconn(self, conn, broken: bool = False):
+        """Gibt eine Verbindung zurück (offene Transaktionen werden zurückgerollt)"""
+        if os.getpid() != self._pid:
+            return
+        if not broken and not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        with self._available:
+            self._in_use -= 1
+            if broken or conn.closed or len(self._idle) >= self.maxconn:
+                conn.close()
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._available.notify()
+
+    @contextmanager
+    def connection(self):
+        """Kontextmanager: Verbindung auschecken und garantiert zurückgeben"""
+        conn = self.getconn()
+        broken = False
+        try:
+            yield conn
+        except psycopg2.OperationalError:
+            broken = True
+            raise
+        finally:
+            self.putconn(conn, broken=broken)
+
+    def prefill(self):
+        """Baut minconn Verbindungen vorab auf"""
+        self._check_fork()
+        with self._available:
+            missing = self.minconn - len(self._idle) - self._in_use
+        for _ in range(max(0, missing)):
+            conn = self._connect()
+            with self._available:
+                self._idle.append((conn, time.monotonic()))
+
+    def stats(self) -> dict:
+        """Pool-Zustand für /health und Monitoring"""
+        self._check_fork()
+        with self._lock:
+            return {
+                'size': len(self._idle) + self._in_use,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'min': self.minconn,
+                'max': self.maxconn,
+                'utilisation': round(self._in_use / self.maxconn, 3),
+                'checkouts': self.checkouts,
+                'wait_avg_ms': round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max_ms, 3),
+                'timeouts': self.timeouts,
+                'replaced': self.replaced,
+                'last_error': self.last_error,
+            }
+
+    def closeall(self):
+        """Schließt alle freien Verbindungen"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
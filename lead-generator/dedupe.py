@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Dubletten-Erkennung für Places und Leads
+Normalisiert Namen, Adressen und Website-Domains und vergleicht nur innerhalb
+von Blöcken (Geohash-Zelle + Nachbarn, Domain, Telefon, Adresse) statt aller Paare
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from psycopg2.extras import RealDictCursor, execute_values
+
+from search import fold
+
+# Rechtsformen und Zusätze, die nichts über die Identität aussagen (auf gefaltetem Text)
+LEGAL_FORMS = re.compile(
+    r'\b(?:(?:und|u) co(?: kg)?|gmbh|ggmbh|mbh|ug|haftungsbeschraenkt|ag|kgaa|kg|ohg|gbr|se|ltd|inc'
+    r'|partg|partgmbb|mbb|e kfm|e kfr|e k|e v|co|inh|inhaber|inhaberin)\b')
+STREET_SUFFIX = re.compile(r'str\b')
+STREET_NUMBER = re.compile(r'^(.*?[a-z].*?)\s+(\d+(?:\s?[a-z])?)\b')
+SCHEME = re.compile(r'^[a-z][a-z0-9+.-]*://')
+
+# 38 x 19 m pro Zelle; mit den 8 Nachbarzellen mindestens 19 m Umkreis in jede Richtung
+GEOHASH_PRECISION = 8
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_INDEX = {char: index for index, char in enumerate(GEOHASH_ALPHABET)}
+
+# Baukästen, Branchenbücher und Social Media: gleiche Domain heißt hier nicht gleiches Unternehmen
+GENERIC_DOMAINS = (
+    'facebook.com', 'instagram.com', 'google.com', 'business.site', 'linktr.ee', 'jimdo.com',
+    'jimdosite.com', 'wixsite.com', 'wordpress.com', 'webnode.page', 'business.google.com',
+    'yelp.de', 'gelbeseiten.de', 'das-oertliche.de', 'doctolib.de', 'jameda.de', 'booking.com',
+)
+
+# Blöcke darüber (z.B. Einkaufszentrum unter einer Adresse) nur im gleitenden Fenster vergleichen
+MAX_BLOCK_SIZE = 200
+WINDOW_SIZE = 30
+
+
+def normalize_name(name: str) -> str:
+    """Firmenname ohne Rechtsform: 'Rechtsanwaltskanzlei Müller GmbH' -> 'rechtsanwaltskanzlei mueller'"""
+    return ' '.join(LEGAL_FORMS.sub(' ', fold(name)).split())
+
+
+def address_key(address: str) -> Optional[str]:
+    """Straße + Hausnummer: 'Karl-Marx-Str. 12a, 12043 Berlin' -> 'karlmarxstrasse|12a'"""
+    street = fold((address or '').split(',')[0])
+    match = STREET_NUMBER.match(STREET_SUFFIX.sub('strasse', street))
+    if not match:
+        return None
+    return f"{match.group(1).replace(' ', '')}|{match.group(2).replace(' ', '')}"
+
+
+def website_domain(url: str) -> Optional[str]:
+    """Host ohne www - muss exakt zur SQL-Funktion lead_domain() in database_schema.sql passen"""
+    host = SCHEME.sub('', (url or '').strip().lower())
+    for separator in '/?#:':
+        host = host.split(separator, 1)[0]
+    if host.startswith('www.'):
+        host = host[4:]
+    return host or None
+
+
+def is_generic_domain(domain: str) -> bool:
+    return any(domain == generic or domain.endswith('.' + generic) for generic in GENERIC_DOMAINS)
+
+
+def phone_key(phone: str) -> Optional[str]:
+    """Nur Ziffern, nationale Schreibweise: '+49 30 1234567' -> '0301234567'"""
+    digits = re.sub(r'\D', '', phone or '')
+    if digits.startswith('0049'):
+        digits = '0' + digits[4:]
+    elif digits.startswith('49') and (phone or '').lstrip().startswith('+'):
+        digits = '0' + digits[2:]
+    return digits if len(digits) >= 6 else None
+
+
+def _geohash_bits(precision: int) -> Tuple[int, int]:
+    """Bits für (Breite, Länge) - die Länge bekommt bei ungerader Gesamtzahl eins mehr"""
+    total = precision * 5
+    return total // 2, total - total // 2
+
+
+def geohash_encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_bits, lng_bits = _geohash_bits(precision)
+    lat_index = max(0, min(int((lat + 90.0) / 180.0 * (1 << lat_bits)), (1 << lat_bits) - 1))
+    lng_index = max(0, min(int((lng + 180.0) / 360.0 * (1 << lng_bits)), (1 << lng_bits) - 1))
+    value = 0
+    for bit in range(precision * 5):
+        # Abwechselnd Länge und Breite, jeweils höchstes Bit zuerst
+        if bit % 2 == 0:
+            lng_bits -= 1
+            value = value << 1 | (lng_index >> lng_bits & 1)
+        else:
+            lat_bits -= 1
+            value = value << 1 | (lat_index >> lat_bits & 1)
+    return _geohash_str(value, precision)
+
+
+def _geohash_int(geohash: str) -> int:
+    value = 0
+    for char in geohash:
+        value = value << 5 | GEOHASH_INDEX[char]
+    return value
+
+
+def _geohash_str(value: int, precision: int) -> str:
+    return ''.join(GEOHASH_ALPHABET[value >> shift & 31] for shift in range(5 * (precision - 1), -1, -5))
+
+
+def _geohash_masks(precision: int) -> Tuple[int, int]:
+    """Bitmasken (Länge, Breite) im verschränkten Wert; das höchste Bit gehört zur Länge"""
+    total = precision * 5
+    lng_mask = sum(1 << position for position in range(total - 1, -1, -2))
+    return lng_mask, ((1 << total) - 1) ^ lng_mask
+
+
+def _neighbour_ints(value: int, lng_mask: int, lat_mask: int) -> List[int]:
+    """Nachbarn direkt im verschränkten Wert (Morton-Arithmetik, ohne Entschachteln)
+
+    Läuft über Datumsgrenze und Pole hinweg - an den Polen entsteht so höchstens
+    ein überflüssiger, leerer Nachbar.
+    """
+    def step(value, mask, other, delta):
+        if delta > 0:
+            return ((value | other) + 1) & mask | (value & other)
+        return ((value & mask) - 1) & mask | (value & other)
+
+    lngs = (step(value, lng_mask, lat_mask, -1), value, step(value, lng_mask, lat_mask, 1))
+    neighbours = []
+    for lng_value in lngs:
+        for delta in (-1, 0, 1):
+            cell = step(lng_value, lat_mask, lng_mask, delta) if delta else lng_value
+            if cell != value:
+                neighbours.append(cell)
+    return neighbours
+
+
+def geohash_neighbours(geohash: str) -> List[str]:
+    """Die 8 umliegenden Zellen gleicher Genauigkeit"""
+    precision = len(geohash)
+    neighbours = _neighbour_ints(_geohash_int(geohash), *_geohash_masks(precision))
+    return sorted({_geohash_str(cell, precision) for cell in neighbours})
+
+
+def place_geohash(place: Dict) -> Optional[str]:
+    """Geohash aus geometry.location der Text Search (None ohne Koordinaten)"""
+    location = (place.get('geometry') or {}).get('location') or {}
+    if location.get('lat') is None or location.get('lng') is None:
+        return None
+    return geohash_encode(float(location['lat']), float(location['lng']))
+
+
+def _trigrams(text: str) -> frozenset:
+    """Trigramme je Wort wie pg_trgm (zwei Leerzeichen vorn, eins hinten)"""
+    grams = set()
+    for token in text.split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class Candidate:
+    """Ein Place oder Lead in normalisierter Form; rank: kleinster Wert bleibt als Original erhalten"""
+
+    __slots__ = ('key', 'rank', 'label', 'name', 'address', 'domain', 'phone', 'geohash')
+
+    def __init__(self, key, rank, name: str, address: str = None, website: str = None,
+                 phone: str = None, geohash: str = None):
+        self.key = key
+        self.rank = rank
+        self.label = name  # Originalname für die Ausgabe
+        self.name = normalize_name(name)
+        self.address = address_key(address)
+        domain = website_domain(website)
+        self.domain = domain if domain and not is_generic_domain(domain) else None
+        self.phone = phone_key(phone)
+        self.geohash = geohash[:GEOHASH_PRECISION] if geohash and len(geohash) >= GEOHASH_PRECISION else None
+
+    @classmethod
+    def from_place(cls, key, rank, place: Dict) -> 'Candidate':
+        return cls(key, rank, place.get('name'), place.get('address') or place.get('formatted_address'),
+                   place.get('website'), place.get('phone') or place.get('formatted_phone_number'),
+                   place_geohash(place))
+
+
+class DuplicateFinder:
+    """Sammelt Kandidaten, vergleicht blockweise und bildet Cluster (Union-Find)
+
+    Gleiche Domain oder Telefonnummer genügt. Sonst müssen die Namen passen - alle Wörter
+    des kürzeren Namens als ganze Wörter im längeren ('Müller' / 'Kanzlei Müller') oder
+    Trigramm-Ähnlichkeit über name_threshold, solange kein Wort nur eine Verlängerung des
+    anderen ist ('Schmidt' / 'Schmidtke') - und die Adressen dürfen sich nicht widersprechen;
+    nur völlig gleiche Namen dürfen in Nachbarzellen abweichende Adressen haben.
+    """
+
+    def __init__(self, name_threshold: float = 0.8):
+        self.name_threshold = name_threshold
+        self.candidates: List[Candidate] = []
+        self._parent: List[int] = []
+        self._reason: Dict[int, str] = {}
+        self.comparisons = 0
+
+    def add(self, candidate: Candidate):
+        self.candidates.append(candidate)
+        self._parent.append(len(self._parent))
+
+    def _find(self, i: int) -> int:
+        while self._parent[i] != i:
+            self._parent[i] = self._parent[self._parent[i]]
+            i = self._parent[i]
+        return i
+
+    def _union(self, i: int, j: int, reason: str):
+        root_i, root_j = self._find(i), self._find(j)
+        if root_i == root_j:
+            return
+        # Wurzel = bestes rank - bleibt beim Zusammenführen erhalten
+        if self.candidates[root_j].rank < self.candidates[root_i].rank:
+            root_i, root_j = root_j, root_i
+        self._parent[root_j] = root_i
+        self._reason.setdefault(i, reason)
+        self._reason.setdefault(j, reason)
+
+    def names_match(self, a: Candidate, b: Candidate, grams: Dict[int, frozenset] = None) -> bool:
+        if not a.name or not b.name:
+            return False
+        if a.name == b.name:
+            return True
+        tokens_a, tokens_b = a.name.split(), b.name.split()
+        # Nummern unterscheiden ('Filiale 2', 'Haus 12') - müssen übereinstimmen
+        if {t for t in tokens_a if t.isdigit()} != {t for t in tokens_b if t.isdigit()}:
+            return False
+        short, long = sorted((tokens_a, tokens_b), key=len)
+        if any(len(token) >= 3 for token in short) and set(short) <= set(long):
+            return True
+        # Nur anders getrennt: 'Friseur Salon Anna' / 'Friseursalon Anna'
+        if ''.join(tokens_a) == ''.join(tokens_b):
+            return True
+        # Abweichende Wörter, bei denen eins mit dem anderen beginnt ('Rosa' / 'Rosarot',
+        # 'Meier' / 'Meierhof'), sind andere Namen - kein Tippfehler
+        only_a, only_b = set(tokens_a) - set(tokens_b), set(tokens_b) - set(tokens_a)
+        if any(x.startswith(y) or y.startswith(x) for x in only_a for y in only_b):
+            return False
+        # Trigramme nur bei Bedarf und je Block nur einmal pro Kandidat
+        grams = {} if grams is None else grams
+        if id(a) not in grams:
+            grams[id(a)] = _trigrams(a.name)
+        if id(b) not in grams:
+            grams[id(b)] = _trigrams(b.name)
+        grams_a, grams_b = grams[id(a)], grams[id(b)]
+        return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b)) >= self.name_threshold
+
+    def match(self, a: Candidate, b: Candidate, grams: Dict[int, frozenset] = None) -> Optional[str]:
+        """Grund der Übereinstimmung ('domain', 'phone', 'name_address', 'name_nearby') oder None"""
+        if a.domain and a.domain == b.domain:
+            return 'domain'
+        if a.phone and a.phone == b.phone:
+            return 'phone'
+        if not self.names_match(a, b, grams):
+            return None
+        if not a.address or not b.address or a.address == b.address:
+            return 'name_address'
+        return 'name_nearby' if a.name == b.name else None
+
+    def _compare(self, members: List[int], others: List[int] = ()):
+        """Alle Paare in members sowie members x others; große Blöcke im gleitenden Fenster"""
+        candidates = self.candidates
+        grams = {}
+        if len(members) + len(others) > MAX_BLOCK_SIZE:
+            ordered = sorted((*members, *others), key=lambda i: candidates[i].name)
+            pairs = ((ordered[n], ordered[m]) for n in range(len(ordered))
+                     for m in range(n + 1, min(n + WINDOW_SIZE, len(ordered))))
+        else:
+            pairs = [(members[n], members[m]) for n in range(len(members)) for m in range(n + 1, len(members))]
+            pairs += [(i, j) for i in members for j in others]
+        for i, j in pairs:
+            if self._find(i) == self._find(j):
+                continue
+            self.comparisons += 1
+            reason = self.match(candidates[i], candidates[j], grams)
+            if reason:
+                self._union(i, j, reason)
+
+    def run(self) -> List[List[Tuple[Candidate, Optional[str]]]]:
+        """Cluster mit mehr als einem Mitglied; jeweils Original zuerst, dann Dubletten mit Grund"""
+        cells: Dict[int, List[int]] = {}
+        addresses: Dict[str, List[int]] = {}
+        first_by_key: Dict[Tuple[str, str], int] = {}
+        for index, candidate in enumerate(self.candidates):
+            if candidate.geohash:
+                cells.setdefault(_geohash_int(candidate.geohash), []).append(index)
+            if candidate.address:
+                addresses.setdefault(candidate.address, []).append(index)
+            # Gleiche Domain bzw. Telefonnummer: ohne Namensvergleich verbinden (linear)
+            for attribute in ('domain', 'phone'):
+                value = getattr(candidate, attribute)
+                if value:
+                    first = first_by_key.setdefault((attribute, value), index)
+                    if first != index:
+                        self._union(first, index, attribute)
+
+        masks = _geohash_masks(GEOHASH_PRECISION)
+        for cell, members in cells.items():
+            # Nur Nachbarn mit größerem Schlüssel - jedes Zellenpaar wird einmal verglichen
+            others = [i for neighbour in _neighbour_ints(cell, *masks) if neighbour > cell
+                      for i in cells.get(neighbour, ())]
+            if len(members) > 1 or others:
+                self._compare(members, others)
+        for members in addresses.values():
+            if len(members) > 1:
+                self._compare(members)
+
+        clusters: Dict[int, List[int]] = {}
+        for index in range(len(self.candidates)):
+            clusters.setdefault(self._find(index), []).append(index)
+        result = []
+        for root, members in clusters.items():
+            if len(members) < 2:
+                continue
+            duplicates = sorted((i for i in members if i != root), key=lambda i: self.candidates[i].rank)
+            result.append([(self.candidates[root], None)]
+                          + [(self.candidates[i], self._reason.get(i)) for i in duplicates])
+        result.sort(key=lambda cluster: cluster[0][0].rank)
+        return result
+
+
+def find_place_duplicates(places: List[Dict], existing: Iterable[Dict],
+                          name_threshold: float = 0.8) -> Dict[str, Tuple[str, str]]:
+    """Neue Places, die ein bereits bearbeitetes oder besser bewertetes Unternehmen doppeln
+
+    places: eingeplante Places ({place_id, payload, score}), existing: bereits bearbeitete
+    aus denselben Zellen. Liefert place_id -> (place_id des Originals, Grund).
+    """
+    finder = DuplicateFinder(name_threshold)
+    for place in existing:
+        finder.add(Candidate.from_place(place['place_id'], (0, 0), place['payload']))
+    for place in places:
+        finder.add(Candidate.from_place(place['place_id'], (1, -place['score']), place['payload']))
+    new_ids = {place['place_id'] for place in places}
+    duplicates = {}
+    for cluster in finder.run():
+        original = cluster[0][0]
+        for candidate, reason in cluster[1:]:
+            if candidate.key in new_ids:
+                duplicates[candidate.key] = (original.key, reason)
+    return duplicates
+
+
+class LeadDuplicates:
+    """Bulk-Suche nach Dubletten-Clustern in leads_email_campaign (Ergebnis in lead_duplicates)"""
+
+    def __init__(self, db_conn, name_threshold: float = 0.8, fetch_size: int = 5000):
+        self.db_conn = db_conn
+        self.name_threshold = name_threshold
+        self.fetch_size = fetch_size
+
+    def scan(self) -> Tuple[List[List[Tuple[Candidate, Optional[str]]]], int, int]:
+        """Liest alle Leads gestreamt und clustert sie: (Cluster, Anzahl Leads, Vergleiche)
+
+        Original eines Clusters ist der bereits angeschriebene bzw. älteste Lead.
+        """
+        finder = DuplicateFinder(self.name_threshold)
+        # Server-seitiger Cursor: nur fetch_size Zeilen gleichzeitig im Speicher
+        cursor = self.db_conn.cursor(name='lead_duplicates_scan', cursor_factory=RealDictCursor)
+        cursor.itersize = self.fetch_size
+        cursor.execute("""
+            SELECT id, company_name, address, phone, website, geohash, sent_at
+            FROM leads_email_campaign
+        """)
+        for row in cursor:
+            finder.add(Candidate(row['id'], (row['sent_at'] is None, row['id']), row['company_name'],
+                                 row['address'], row['website'], row['phone'], row['geohash']))
+        cursor.close()
+        self.db_conn.commit()
+        return finder.run(), len(finder.candidates), finder.comparisons
+
+    def store(self, clusters: List[List[Tuple[Candidate, Optional[str]]]]) -> int:
+        """Ersetzt lead_duplicates durch das aktuelle Ergebnis (eine Transaktion)"""
+        rows = [(candidate.key, cluster[0][0].key, reason)
+                for cluster in clusters for candidate, reason in cluster[1:]]
+        cursor = self.db_conn.cursor()
+        try:
+            cursor.execute("DELETE FROM lead_duplicates")
+            if rows:
+                execute_values(cursor, """
+                    INSERT INTO lead_duplicates (lead_id, canonical_id, reason) VALUES %s
+                """, rows, page_size=1000)
+            self.db_conn.commit()
+        except Exception:
+            self.db_conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        return len(rows)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+DNS-Prüfung der Empfänger-Domains vor Generierung und Versand
+Löst MX-Records (ersatzweise A/AAAA) für einen ganzen Batch parallel auf und
+cacht das Ergebnis entsprechend der TTL der Antwort, negative Antworten
+entsprechend dem SOA-Minimum (RFC 2308)
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import dns.exception
+import dns.name
+import dns.rdatatype
+import dns.resolver
+
+from metrics import REGISTRY
+
+DNS_LATENCY = REGISTRY.histogram(
+    'leadgen_dns_lookup_duration_seconds', 'Dauer der MX-Prüfung je Domain (ohne Cache-Treffer)', ['status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+
+# mx: Mailserver laut MX, a: kein MX, aber A/AAAA (implizites MX, RFC 5321 5.1),
+# error: Timeout/SERVFAIL - nicht gecacht; eigene DNS-Probleme sollen keine Leads kosten
+DELIVERABLE = ('mx', 'a', 'error')
+
+
+def email_domain(email: str) -> str:
+    """Domain einer Adresse, kleingeschrieben"""
+    return email.rsplit('@', 1)[-1].strip().rstrip('.').lower()
+
+
+def _soa_ttl(response) -> Optional[int]:
+    """TTL einer negativen Antwort: min(SOA-TTL, SOA-Minimum) aus dem Authority-Abschnitt"""
+    if response is None:
+        return None
+    for rrset in response.authority:
+        if rrset.rdtype == dns.rdatatype.SOA and len(rrset):
+            return min(rrset.ttl, rrset[0].minimum)
+    return None
+
+
+class MailDomainChecker:
+    """Prüft, ob Domains E-Mails annehmen; check_many() löst nur unbekannte Domains auf
+
+    nameservers: eigene Resolver (z.B. lokaler Stub), sonst /etc/resolv.conf.
+    """
+
+    def __init__(self, cache, nameservers: List[str] = None, port: int = 53, timeout: float = 3.0,
+                 concurrency: int = 16, min_ttl: int = 300, max_ttl: int = 86400, negative_ttl: int = 3600):
+        self.cache = cache
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.resolver = dns.resolver.Resolver(configure=not nameservers)
+        if nameservers:
+            self.resolver.nameservers = list(nameservers)
+        self.resolver.port = port
+        self.resolver.lifetime = timeout
+        self.resolver.cache = None  # eigener Cache mit Persistenz über Läufe hinweg
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='dns')
+        self.stats = {'lookups': 0, 'undeliverable': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+
+    def _expires(self, ttl: Optional[int], default: int, cap: int) -> float:
+        ttl = default if ttl is None else ttl
+        return time.time() + min(max(ttl, self.min_ttl), cap)
+
+    def _query(self, domain: str, rdtype: str):
+        """(Antwort, None) oder (None, Antwort ohne Records); NXDOMAIN und Fehler als Exception"""
+        try:
+            return self.resolver.resolve(domain, rdtype, search=False), None
+        except dns.resolver.NoAnswer as e:
+            return None, e.response()
+
+    def _negative(self, status: str, response) -> Dict:
+        ttl = _soa_ttl(response)
+        return {'status': status, 'hosts': [],
+                'expires_at': self._expires(ttl, self.negative_ttl, self.negative_ttl)}
+
+    def resolve(self, domain: str) -> Dict:
+        """Fragt MX, ohne MX A und AAAA ab: {'status', 'hosts', 'expires_at'}"""
+        try:
+            answer, empty = self._query(domain, 'MX')
+            if answer is not None:
+                records = sorted(answer, key=lambda record: record.preference)
+                # Null-MX (RFC 7505): Domain nimmt ausdrücklich keine E-Mails an
+                if len(records) == 1 and records[0].exchange == dns.name.root:
+                    return {'status': 'null_mx', 'hosts': [],
+                            'expires_at': self._expires(answer.rrset.ttl, self.min_ttl, self.max_ttl)}
+                return {'status': 'mx',
+                        'hosts': [record.exchange.to_text(omit_final_dot=True) for record in records],
+                        'expires_at': self._expires(answer.rrset.ttl, self.min_ttl, self.max_ttl)}
+            for rdtype in ('A', 'AAAA'):
+                answer, empty = self._query(domain, rdtype)
+                if answer is not None:
+                    return {'status': 'a', 'hosts': [domain],
+                            'expires_at': self._expires(answer.rrset.ttl, self.min_ttl, self.max_ttl)}
+            return self._negative('no_records', empty)
+        except dns.resolver.NXDOMAIN as e:
+            return self._negative('nxdomain', next(iter(e.responses().values()), None))
+        except (dns.name.EmptyLabel, dns.name.LabelTooLong, dns.name.NameTooLong, dns.name.IDNAException):
+            return {'status': 'invalid', 'hosts': [], 'expires_at': self._expires(self.max_ttl, 0, self.max_ttl)}
+        except dns.exception.DNSException as e:
+            # Timeout, SERVFAIL (NoNameservers) u.ä.: nicht cachen, beim nächsten Mal erneut fragen
+            return {'status': 'error', 'hosts': [], 'error': type(e).__name__}
+
+    def _resolve_and_cache(self, domain: str) -> Dict:
+        start = time.perf_counter()
+        record = self.resolve(domain)
+        DNS_LATENCY.labels(record['status']).observe(time.perf_counter() - start)
+        if record['status'] != 'error':
+            self.cache.set_domain(domain, record)
+        with self._stats_lock:
+            self.stats['lookups'] += 1
+            self.stats['errors'] += record['status'] == 'error'
+            self.stats['undeliverable'] += not self.deliverable(record)
+        return record
+
+    def check_many(self, domains: Iterable[str]) -> Dict[str, Dict]:
+        """Domain -> Ergebnis für alle Domains; unbekannte werden parallel aufgelöst"""
+        results = {}
+        pending = []
+        for domain in dict.fromkeys(domain.lower() for domain in domains if domain):
+            record = self.cache.get_domain(domain)
+            if record is None:
+                pending.append(domain)
+            else:
+                results[domain] = record
+        results.update(zip(pending, self.executor.map(self._resolve_and_cache, pending)))
+        return results
+
+    @staticmethod
+    def deliverable(record: Dict) -> bool:
+        return record['status'] in DELIVERABLE
+
+    def summary(self) -> str:
+        """Kurzstatistik für das Run-Log"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return (f"{stats['lookups']} Abfragen, {stats['undeliverable']} Domains ohne Mailserver, "
+                f"{stats['errors']} Fehler")
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
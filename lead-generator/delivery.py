@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Persistente Versand-Warteschlange in PostgreSQL
+Generierung legt E-Mails mit Versandzeitpunkt ab, der Scheduler
+versendet sie im konfigurierten Takt und respektiert das Tages-Limit
+
+Alle Zeitpunkte (scheduled_at, claimed_at, sent_at) kommen aus der Uhr der
+Datenbank (LOCALTIMESTAMP) - die Zeitzone des Hosts spielt keine Rolle.
+"""
+
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from psycopg2.extras import RealDictCursor, execute_values
+
+# Zählt gegen das Tages-Limit: heute versendet + gerade im Versand
+USED_TODAY_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM email_queue WHERE status = 'sent' AND sent_at >= CURRENT_DATE)
+      + (SELECT COUNT(*) FROM email_queue WHERE status = 'sending') AS used
+"""
+
+# Letzter Versand über alle Prozesse (GREATEST ignoriert NULL) - Grundlage für den Takt
+LAST_SEND_QUERY = """
+    SELECT GREATEST(
+        (SELECT MAX(sent_at) FROM email_queue WHERE status = 'sent'),
+        (SELECT MAX(claimed_at) FROM email_queue WHERE status = 'sending')
+    ) AS last, LOCALTIMESTAMP AS now
+"""
+
+
+class DeliveryQueue:
+    """Zugriff auf die Tabelle email_queue"""
+
+    def __init__(self, db_conn, delay_between_emails: int):
+        self.db_conn = db_conn
+        self.delay = timedelta(seconds=delay_between_emails)
+
+    def next_slot(self, cursor) -> datetime:
+        """Nächster freier Versandzeitpunkt (Abstand delay_between_emails)"""
+        cursor.execute("""
+            SELECT GREATEST(LOCALTIMESTAMP, MAX(scheduled_at) + %s)
+            FROM email_queue WHERE status IN ('queued', 'sending')
+        """, (self.delay,))
+        return cursor.fetchone()[0]
+
+    def enqueue(self, lead_id: int, recipient: str, subject: str, body: str, kind: str = 'initial') -> int:
+        """Legt eine E-Mail in die Warteschlange"""
+        return self.enqueue_many([{
+            'lead_id': lead_id, 'recipient': recipient, 'subject': subject, 'body': body, 'kind': kind
+        }])[0]
+
+    @contextmanager
+    def slot_lock(self):
+        """Hält die Slot-Sperre prozessübergreifend über mehrere Transaktionen
+
+        Für Prüfen der Kapazität + Speichern + Einreihen als Einheit; enqueue_many
+        darf innerhalb aufgerufen werden (Advisory-Locks sind pro Session reentrant).
+        """
+        cursor = self.db_conn.cursor()
+        cursor.execute("SELECT pg_advisory_lock(hashtext('email_queue_slots'))")
+        self.db_conn.commit()
+        try:
+            yield
+        finally:
+            # Bei geschlossener Verbindung hat der Server die Sperre bereits freigegeben
+            if not self.db_conn.closed:
+                self.db_conn.rollback()
+                cursor.execute("SELECT pg_advisory_unlock(hashtext('email_queue_slots'))")
+                self.db_conn.commit()
+                cursor.close()
+
+    def enqueue_many(self, items: List[Dict], commit: bool = True) -> List[int]:
+        """Legt mehrere E-Mails in einer Transaktion in die Warteschlange (aufeinanderfolgende Slots)
+
+        commit=False überlässt den Commit dem Aufrufer (z.B. gemeinsam mit dem Speichern der Leads).
+        """
+        if not items:
+            return []
+        cursor = self.db_conn.cursor()
+        # Serialisiert die Slot-Vergabe, falls mehrere Prozesse gleichzeitig einreihen
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('email_queue_slots'))")
+        first_slot = self.next_slot(cursor)
+        rows = [
+            (item['lead_id'], item.get('kind', 'initial'), item['recipient'], item['subject'], item['body'],
+             first_slot + i * self.delay)
+            for i, item in enumerate(items)
+        ]
+        result = execute_values(cursor, """
+            INSERT INTO email_queue (lead_id, kind, recipient, subject, body, scheduled_at)
+            VALUES %s
+            RETURNING id
+        """, rows, fetch=True)
+        initial_ids = [item['lead_id'] for item in items if item.get('kind', 'initial') == 'initial']
+        if initial_ids:
+            cursor.execute("UPDATE leads_email_campaign SET status = 'queued' WHERE id = ANY(%s)", (initial_ids,))
+        if commit:
+            self.db_conn.commit()
+        cursor.close()
+        return [row[0] for row in result]
+
+    def sent_today(self) -> int:
+        """Anzahl heute versendeter E-Mails"""
+        cursor = self.db_conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) FROM email_queue WHERE status = 'sent' AND sent_at >= CURRENT_DATE
+        """)
+        count = cursor.fetchone()[0]
+        cursor.close()
+        return count
+
+    def used_today(self) -> int:
+        """Heute versendete plus gerade im Versand befindliche E-Mails (über alle Prozesse)"""
+        cursor = self.db_conn.cursor()
+        cursor.execute(USED_TODAY_QUERY)
+        count = cursor.fetchone()[0]
+        cursor.close()
+        return count
+
+    def pending(self) -> int:
+        """Anzahl noch nicht versendeter E-Mails"""
+        cursor = self.db_conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM email_queue WHERE status = 'queued'")
+        count = cursor.fetchone()[0]
+        cursor.close()
+        return count
+
+    def next_send(self, min_interval: timedelta) -> Tuple[Optional[datetime], datetime]:
+        """(Frühester Versandzeitpunkt, jetzt) - beides nach der Uhr der Datenbank
+
+        Frühester Zeitpunkt: nächste fällige E-Mail, frühestens min_interval nach dem
+        letzten (oder gerade laufenden) Versand; None, wenn nichts wartet.
+        """
+        cursor = self.db_conn.cursor()
+        cursor.execute(f"""
+            SELECT (SELECT MIN(scheduled_at) FROM email_queue WHERE status = 'queued') AS due, s.last, s.now
+            FROM ({LAST_SEND_QUERY}) s
+        """)
+        due, last, now = cursor.fetchone()
+        self.db_conn.commit()
+        cursor.close()
+        if due is None:
+            return None, now
+        return (max(due, last + min_interval) if last else due), now
+
+    def claim_due(self, max_per_day: Optional[int] = None,
+                  min_interval: Optional[timedelta] = None) -> Optional[Dict]:
+        """Markiert die nächste fällige E-Mail als 'sending' (committed vor dem Versand)
+
+        Mit max_per_day wird das Tages-Limit, mit min_interval der Abstand zum letzten
+        Versand prozessübergreifend geprüft: Prüfen und Übernehmen laufen unter einem
+        Advisory-Lock, zwei Versand-Prozesse können beides also nicht gemeinsam umgehen.
+        """
+        cursor = self.db_conn.cursor(cursor_factory=RealDictCursor)
+        if max_per_day is not None or min_interval:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('email_queue_daily_cap'))")
+        if max_per_day is not None:
+            cursor.execute(USED_TODAY_QUERY)
+            if cursor.fetchone()['used'] >= max_per_day:
+                self.db_conn.commit()
+                cursor.close()
+                return None
+        if min_interval:
+            cursor.execute(LAST_SEND_QUERY)
+            row = cursor.fetchone()
+            if row['last'] and row['last'] + min_interval > row['now']:
+                self.db_conn.commit()
+                cursor.close()
+                return None
+        cursor.execute("""
+            UPDATE email_queue
+            SET status = 'sending', attempts = attempts + 1, claimed_at = LOCALTIMESTAMP
+            WHERE id = (
+                SELECT id FROM email_queue
+                WHERE status = 'queued' AND scheduled_at <= LOCALTIMESTAMP
+                ORDER BY scheduled_at
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING *
+        """)
+        item = cursor.fetchone()
+        self.db_conn.commit()
+        cursor.close()
+        return item
+
+    def mark_sent(self, item: Dict):
+        """Versand erfolgreich: Queue-Eintrag und Lead in einer Transaktion aktualisieren"""
+        cursor = self.db_conn.cursor()
+        # LOCALTIMESTAMP ist innerhalb der Transaktion konstant: gleicher Zeitpunkt in beiden Tabellen
+        cursor.execute("UPDATE email_queue SET status = 'sent', sent_at = LOCALTIMESTAMP WHERE id = %s", (item['id'],))
+        if item['kind'] == 'followup':
+            cursor.execute("""
+                UPDATE leads_email_campaign
+                SET followup_count = followup_count + 1, last_followup = LOCALTIMESTAMP
+                WHERE id = %s
+            """, (item['lead_id'],))
+        else:
+            cursor.execute("""
+                UPDATE leads_email_campaign SET status = 'sent', sent_at = LOCALTIMESTAMP WHERE id = %s
+            """, (item['lead_id'],))
+        self.db_conn.commit()
+        cursor.close()
+
+    def mark_failed(self, item: Dict, error: str):
+        """Versand fehlgeschlagen - wird nicht automatisch wiederholt"""
+        cursor = self.db_conn.cursor()
+        cursor.execute("""
+            UPDATE email_queue SET status = 'failed', last_error = %s WHERE id = %s
+        """, (error, item['id']))
+        self.db_conn.commit()
+        cursor.close()
+
+    def recover_stale(self, older_than: timedelta = timedelta(minutes=10)) -> int:
+        """Einträge, die nach einem Absturz in 'sending' hängen, als 'failed' markieren.
+
+        Ob die E-Mail vor dem Absturz noch rausging, ist unbekannt - lieber
+        manuell prüfen als doppelt versenden.
+        """
+        cursor = self.db_conn.cursor()
+        cursor.execute("""
+            UPDATE email_queue
+            SET status = 'failed', last_error = 'Prozess während Versand beendet - bitte prüfen'
+            WHERE status = 'sending' AND claimed_at < LOCALTIMESTAMP - %s
+        """, (older_than,))
+        count = cursor.rowcount
+        self.db_conn.commit()
+        cursor.close()
+        return count
+
+
+class DeliveryScheduler:
+    """Leert die Warteschlange im Takt und bis zum Tages-Limit"""
+
+    def __init__(self, queue: DeliveryQueue, send: Callable[[str, str, str], bool],
+                 max_per_day: int, delay_between_emails: int, stop_event: threading.Event = None):
+        self.queue = queue
+        self.send = send
+        self.max_per_day = max_per_day
+        self.interval = timedelta(seconds=delay_between_emails)
+        self.stop_event = stop_event or threading.Event()
+
+    def run(self, wait: bool = True) -> int:
+        """Versendet fällige E-Mails; mit wait=True wird auf spätere Slots gewartet"""
+        stale = self.queue.recover_stale()
+        if stale:
+            print(f"⚠️ {stale} E-Mails hingen im Versand - als 'failed' markiert")
+
+        sent = 0
+        while not self.stop_event.is_set():
+            # Zähler aus der Datenbank: andere Versand-Prozesse zählen mit
+            if self.queue.used_today() >= self.max_per_day:
+                print(f"\n⚠️ Tages-Limit erreicht ({self.max_per_day} E-Mails)")
+                break
+
+            # Takt ab dem letzten Versand (auch anderer Prozesse) - auch ohne wait: im Daemon
+            # ginge aufgelaufene Post sonst bei jedem Tick am Stück bis zum Tages-Limit raus
+            send_at, now = self.queue.next_send(self.interval)
+            if send_at is None:
+                break
+            if send_at > now:
+                # Nur bis zum heutigen Tagesende warten
+                if not wait or send_at.date() > now.date():
+                    break
+                print(f"  ⏳ Warte {(send_at - now).total_seconds():.0f}s...")
+                self.stop_event.wait((send_at - now).total_seconds())
+                continue
+
+            item = self.queue.claim_due(self.max_per_day, self.interval)
+            if not item:
+                # Anderer Prozess war schneller (Eintrag, Takt oder Limit)
+                if not wait:
+                    break
+                self.stop_event.wait(1)
+                continue
+
+            try:
+                ok = self.send(item['recipient'], item['subject'], item['body'])
+            except Exception as e:
+                ok = False
+                print(f"✗ Versandfehler: {e}")
+
+            if ok:
+                self.queue.mark_sent(item)
+                sent += 1
+            else:
+                self.queue.mark_failed(item, 'SMTP-Versand fehlgeschlagen')
+
+        return sent
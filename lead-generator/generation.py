@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Parallele Textgenerierung über die OpenAI-API
+Begrenzte Parallelität, Token-Bucket für Requests/Minute und Tokens/Minute,
+persistenter Cache pro Prompt-Hash
+"""
+
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from cache import SQLiteCache
+from metrics import REGISTRY
+
+OPENAI_LATENCY = REGISTRY.histogram(
+    'leadgen_openai_request_duration_seconds', 'Dauer der Chat-Completion-Aufrufe', ['model'])
+OPENAI_THROTTLE = REGISTRY.histogram(
+    'leadgen_openai_throttle_seconds', 'Wartezeit im Rate-Limit (Token-Bucket)', ['model'])
+OPENAI_TOKENS = REGISTRY.counter('leadgen_openai_tokens_total', 'Verbrauchte Tokens', ['model'])
+OPENAI_ERRORS = REGISTRY.counter('leadgen_openai_errors_total', 'Fehlgeschlagene Completions')
+
+
+class TokenBucket:
+    """Token-Bucket: rate_per_minute Einheiten pro Minute, blockierend"""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.tokens = rate_per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Füllt den Bucket anhand der vergangenen Zeit auf (Lock muss gehalten werden)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1):
+        """Wartet, bis amount Einheiten verfügbar sind, und verbraucht sie"""
+        # Anfragen größer als der Bucket würden sonst nie bedient
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def consume(self, amount: float):
+        """Verbraucht nachträglich (z.B. tatsächliche Token-Nutzung), darf ins Minus gehen"""
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+
+
+class CompletionCache(SQLiteCache):
+    """Cache für Chat-Completions, Schlüssel: Hash aus Modell, Temperatur und Prompt"""
+
+    def __init__(self, path: str, ttl: int, max_entries: int):
+        super().__init__(path, 'completions', ttl, max_entries)
+
+    @staticmethod
+    def key(model: str, temperature: float, messages: List[Dict], max_tokens: Optional[int]) -> str:
+        """Stabiler Cache-Schlüssel für eine Anfrage"""
+        payload = json.dumps([model, temperature, max_tokens, messages], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class GenerationPool:
+    """Führt Chat-Completions parallel aus, gedrosselt und gecacht"""
+
+    def __init__(self, client, cache: CompletionCache, concurrency: int = 4,
+                 requests_per_minute: int = 500, tokens_per_minute: int = 200000):
+        self.client = client
+        self.cache = cache
+        self.concurrency = concurrency
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.api_calls = 0
+        self.tokens_used = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def estimate_tokens(messages: List[Dict], max_tokens: Optional[int]) -> int:
+        """Grobe Schätzung: ~4 Zeichen pro Token plus maximale Antwortlänge"""
+        prompt_chars = sum(len(m['content']) for m in messages)
+        return prompt_chars // 4 + (max_tokens or 500)
+
+    def complete(self, messages: List[Dict], model: str = "gpt-4o-mini",
+                 temperature: float = 0.7, max_tokens: int = None) -> str:
+        """Einzelne Chat-Completion (Cache → Rate-Limit → API)"""
+        key = self.cache.key(model, temperature, messages, max_tokens)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached['content']
+
+        estimate = self.estimate_tokens(messages, max_tokens)
+        with OPENAI_THROTTLE.labels(model).time():
+            self.request_bucket.acquire(1)
+            self.token_bucket.acquire(estimate)
+
+        kwargs = {'model': model, 'messages': messages, 'temperature': temperature}
+        if max_tokens:
+            kwargs['max_tokens'] = max_tokens
+        with OPENAI_LATENCY.labels(model).time():
+            response = self.client.chat.completions.create(**kwargs)
+        content = response.choices[0].message.content
+
+        usage = getattr(response, 'usage', None)
+        used = getattr(usage, 'total_tokens', None) or estimate
+        # Abweichung zur Schätzung nachträglich verbuchen
+        self.token_bucket.consume(used - estimate)
+        with self._lock:
+            self.api_calls += 1
+            self.tokens_used += used
+        OPENAI_TOKENS.labels(model).inc(used)
+
+        self.cache.set(key, {'content': content})
+        return content
+
+    def _complete_safe(self, request: Dict) -> Optional[str]:
+        """complete() ohne Exception - Fehler werden geloggt"""
+        try:
+            return self.complete(**request)
+        except Exception as e:
+            OPENAI_ERRORS.inc()
+            print(f"✗ OpenAI Fehler: {e}")
+            return None
+
+    def complete_many(self, requests: List[Dict]) -> List[Optional[str]]:
+        """Mehrere Completions parallel; Ergebnisse in Eingabe-Reihenfolge (None bei Fehler)"""
+        if len(requests) <= 1 or self.concurrency <= 1:
+            return [self._complete_safe(request) for request in requests]
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(requests))) as executor:
+            return list(executor.map(self._complete_safe, requests))
+
+    def summary(self) -> str:
+        """Kurzstatistik für das Run-Log"""
+        return f"{self.api_calls} API-Aufrufe, {self.tokens_used} Tokens, Cache: {self.cache.summary()}"
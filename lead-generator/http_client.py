@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Gemeinsamer HTTP-Client für alle externen Aufrufe
+Keep-Alive-Pools pro Host, Timeouts pro Endpoint, Retries mit Jitter
+"""
+
+import random
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import REGISTRY
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Label endpoint statt Host: begrenzte Kardinalität auch bei tausenden Websites
+HTTP_LATENCY = REGISTRY.histogram(
+    'leadgen_http_request_duration_seconds', 'Dauer externer HTTP-Aufrufe', ['endpoint', 'outcome'])
+HTTP_RETRIES = REGISTRY.counter('leadgen_http_retries_total', 'Wiederholte HTTP-Aufrufe', ['endpoint'])
+
+# Obergrenzen der Latenz-Buckets in Millisekunden
+LATENCY_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf')]
+
+
+class LatencyHistogram:
+    """Thread-sicheres Latenz-Histogramm mit festen Buckets"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ms: float):
+        """Erfasst eine Messung in Millisekunden"""
+        with self._lock:
+            self.count += 1
+            self.total_ms += ms
+            for i, bound in enumerate(self.buckets):
+                if ms <= bound:
+                    self.counts[i] += 1
+                    break
+
+    def percentile(self, p: float) -> float:
+        """Obergrenze des Buckets, in dem das p-Perzentil liegt"""
+        with self._lock:
+            target = self.count * p
+            seen = 0
+            for bound, count in zip(self.buckets, self.counts):
+                seen += count
+                if count and seen >= target:
+                    return bound
+        return 0.0
+
+    def summary(self) -> str:
+        """Kurzstatistik für das Run-Log"""
+        if not self.count:
+            return "keine Aufrufe"
+        return (f"{self.count} Aufrufe, Ø {self.total_ms / self.count:.0f} ms, "
+                f"p50 ≤{self.percentile(0.5):.0f} ms, p95 ≤{self.percentile(0.95):.0f} ms")
+
+
+class HttpClient:
+    """requests.Session mit Connection-Pooling, Retries und Latenz-Statistik"""
+
+    # (connect, read) Timeouts und Retries pro Endpoint
+    ENDPOINTS = {
+        'places': {'timeout': (3.05, 10), 'retries': 3},
+        'website': {'timeout': (3.05, 10), 'retries': 1},
+        'crawl': {'timeout': (3.05, 5), 'retries': 0},  # Kontaktsuche: lieber eine Seite auslassen
+        'default': {'timeout': (3.05, 15), 'retries': 2},
+    }
+    # Firmen-Websites: ein gemeinsames Histogramm statt eines pro Host (tausende Hosts je Lauf)
+    AGGREGATED = {'website': 'Websites', 'crawl': 'Websites'}
+
+    def __init__(self, pool_maxsize: int = 10, backoff: float = 0.5, max_backoff: float = 10.0):
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.latencies: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _histogram(self, host: str) -> LatencyHistogram:
+        """Liefert das Latenz-Histogramm eines Hosts (oder einer Sammelgruppe)"""
+        with self._lock:
+            if host not in self.latencies:
+                self.latencies[host] = LatencyHistogram()
+            return self.latencies[host]
+
+    def _sleep_before_retry(self, attempt: int, response: requests.Response = None):
+        """Exponentielles Backoff mit Full Jitter (Retry-After wird respektiert)"""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if response is not None and response.headers.get('Retry-After', '').isdigit():
+            delay = max(delay, min(self.max_backoff, int(response.headers['Retry-After'])))
+        time.sleep(delay)
+
+    def get(self, url: str, endpoint: str = 'default', **kwargs) -> requests.Response:
+        """GET mit Endpoint-Timeouts und Retries bei 429/5xx und Verbindungsfehlern"""
+        settings = self.ENDPOINTS.get(endpoint, self.ENDPOINTS['default'])
+        kwargs.setdefault('timeout', settings['timeout'])
+        retries = settings['retries']
+        histogram = self._histogram(self.AGGREGATED.get(endpoint) or urlparse(url).netloc.lower())
+
+        for attempt in range(retries + 1):
+            if attempt:
+                HTTP_RETRIES.labels(endpoint).inc()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                elapsed = time.perf_counter() - start
+                histogram.observe(elapsed * 1000)
+                HTTP_LATENCY.labels(endpoint, 'error').observe(elapsed)
+                if attempt >= retries:
+                    raise
+                self._sleep_before_retry(attempt)
+                continue
+
+            elapsed = time.perf_counter() - start
+            histogram.observe(elapsed * 1000)
+            HTTP_LATENCY.labels(endpoint, f"{response.status_code // 100}xx").observe(elapsed)
+            if response.status_code in RETRY_STATUS and attempt < retries:
+                response.close()
+                self._sleep_before_retry(attempt, response)
+                continue
+            return response
+
+    def summary(self) -> Dict[str, str]:
+        """Latenz-Zusammenfassung pro API-Host plus eine Zeile für alle Websites"""
+        with self._lock:
+            hosts = dict(self.latencies)
+        return {host: histogram.summary() for host, histogram in sorted(hosts.items())}
+
+    def close(self):
+        """Schließt alle gepoolten Verbindungen"""
+        self.session.close()
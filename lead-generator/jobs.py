@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Job-Warteschlange für mehrere Worker-Prozesse in PostgreSQL
+Claiming per FOR UPDATE SKIP LOCKED, Leases mit Heartbeat,
+abgelaufene Leases werden wieder freigegeben
+"""
+
+import os
+import socket
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2.extras import Json, RealDictCursor, execute_values
+
+# Endgültig gescheiterte Jobs: Place abschließen, damit das Recheck-Fenster greift (sonst bliebe er 'planned')
+FAIL_PLACES_QUERY = """
+    UPDATE campaign_places SET stage = 'rejected', outcome = 'failed', updated_at = NOW()
+    WHERE place_id = ANY(%s) AND stage IN ('planned', 'enriched')
+"""
+
+
+def default_worker_id() -> str:
+    """Eindeutige Worker-Kennung (Host + PID)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    """Zugriff auf die Tabelle campaign_jobs"""
+
+    def __init__(self, db_conn, worker_id: str = None, lease_seconds: int = 300, max_attempts: int = 3):
+        self.db_conn = db_conn
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.claimed = 0
+        self.completed = 0
+        self.failed = 0
+
+    def enqueue_many(self, kind: str, jobs: List[Tuple[str, Dict, int]]) -> int:
+        """Legt Jobs (dedupe_key, payload, priority) an; bereits bekannte Keys werden übersprungen"""
+        if not jobs:
+            return 0
+        cursor = self.db_conn.cursor()
+        rows = execute_values(cursor, """
+            INSERT INTO campaign_jobs (kind, dedupe_key, payload, priority)
+            VALUES %s
+            ON CONFLICT (kind, dedupe_key) DO NOTHING
+            RETURNING id
+        """, [(kind, key, Json(payload), priority) for key, payload, priority in jobs], fetch=True)
+        self.db_conn.commit()
+        cursor.close()
+        return len(rows)
+
+    def requeue_expired(self) -> int:
+        """Jobs abgestürzter Worker (Lease abgelaufen) wieder freigeben"""
+        cursor = self.db_conn.cursor()
+        cursor.execute("""
+            UPDATE campaign_jobs
+            SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END,
+                last_error = 'Lease abgelaufen (' || worker || ')',
+                worker = NULL, lease_until = NULL, updated_at = NOW()
+            WHERE status = 'running' AND lease_until < NOW()
+            RETURNING status, payload->>'place_id'
+        """, (self.max_attempts,))
+        rows = cursor.fetchall()
+        count = len(rows)
+        failed = [place_id for status, place_id in rows if status == 'failed' and place_id]
+        if failed:
+            cursor.execute(FAIL_PLACES_QUERY, (failed,))
+        self.db_conn.commit()
+        cursor.close()
+        return count
+
+    def claim(self, kind: str, limit: int) -> List[Dict]:
+        """Übernimmt bis zu limit Jobs (höchste Priorität zuerst), ohne auf andere Worker zu warten"""
+        if limit <= 0:
+            return []
+        cursor = self.db_conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute("""
+            UPDATE campaign_jobs
+            SET status = 'running', worker = %s, attempts = attempts + 1,
+                lease_until = NOW() + make_interval(secs => %s), updated_at = NOW()
+            WHERE id IN (
+                SELECT id FROM campaign_jobs
+                WHERE kind = %s AND status = 'pending'
+                ORDER BY priority DESC, id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, kind, dedupe_key, payload, priority, attempts
+        """, (self.worker_id, self.lease_seconds, kind, limit))
+        jobs = sorted(cursor.fetchall(), key=lambda job: (-job['priority'], job['id']))
+        self.db_conn.commit()
+        cursor.close()
+        self.claimed += len(jobs)
+        return jobs
+
+    def complete(self, job_ids: List[int]):
+        """Markiert Jobs als erledigt"""
+        if not job_ids:
+            return
+        cursor = self.db_conn.cursor()
+        cursor.execute("""
+            UPDATE campaign_jobs
+            SET status = 'done', lease_until = NULL, updated_at = NOW()
+            WHERE id = ANY(%s) AND worker = %s
+        """, (list(job_ids), self.worker_id))
+        self.db_conn.commit()
+        cursor.close()
+        self.completed += len(job_ids)
+
+    def release(self, job_ids: List[int]):
+        """Gibt Jobs unverändert zurück (z.B. Tages-Limit erreicht) - zählt nicht als Versuch"""
+        if not job_ids:
+            return
+        cursor = self.db_conn.cursor()
+        cursor.execute("""
+            UPDATE campaign_jobs
+            SET status = 'pending', attempts = attempts - 1, worker = NULL, lease_until = NULL, updated_at = NOW()
+            WHERE id = ANY(%s) AND worker = %s
+        """, (list(job_ids), self.worker_id))
+        self.db_conn.commit()
+        cursor.close()
+
+    def fail(self, job_id: int, error: str, place_id: Optional[str] = None) -> bool:
+        """Fehlgeschlagener Job: erneut einplanen oder nach max_attempts aufgeben
+
+        Beim Aufgeben wird der zugehörige Place in derselben Transaktion als
+        'rejected' / 'failed' abgeschlossen. Liefert True, wenn der Job aufgegeben wurde.
+        """
+        cursor = self.db_conn.cursor()
+        cursor.execute("""
+            UPDATE campaign_jobs
+            SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END,
+                last_error = %s, worker = NULL, lease_until = NULL, updated_at = NOW()
+            WHERE id = %s AND worker = %s
+            RETURNING status
+        """, (self.max_attempts, error, job_id, self.worker_id))
+        row = cursor.fetchone()
+        final = row is not None and row[0] == 'failed'
+        if final and place_id:
+            cursor.execute(FAIL_PLACES_QUERY, ([place_id],))
+        self.db_conn.commit()
+        cursor.close()
+        self.failed += 1
+        return final
+
+    def purge(self, older_than_days: int = 30) -> int:
+        """Entfernt alte erledigte Jobs (danach dürfen Places erneut eingeplant werden)"""
+        cursor = self.db_conn.cursor()
+        cursor.execute("""
+            DELETE FROM campaign_jobs
+            WHERE status = 'done' AND updated_at < NOW() - make_interval(days => %s)
+        """, (older_than_days,))
+        count = cursor.rowcount
+        self.db_conn.commit()
+        cursor.close()
+        return count
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Anzahl Jobs je Art und Status"""
+        cursor = self.db_conn.cursor()
+        cursor.execute("SELECT kind, status, COUNT(*) FROM campaign_jobs GROUP BY kind, status")
+        result = {}
+        for kind, status, count in cursor.fetchall():
+            result.setdefault(kind, {})[status] = count
+        cursor.close()
+        return result
+
+    def summary(self) -> str:
+        return f"{self.claimed} übernommen, {self.completed} erledigt, {self.failed} fehlgeschlagen ({self.worker_id})"
+
+
+class Heartbeat:
+    """Verlängert die Leases eines Workers in einem Hintergrund-Thread (eigene DB-Verbindung)"""
+
+    def __init__(self, db_config: Dict, worker_id: str, lease_seconds: int, interval: Optional[float] = None):
+        self.db_config = db_config
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.interval = interval or lease_seconds / 3
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _beat(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE campaign_jobs
+            SET lease_until = NOW() + make_interval(secs => %s)
+            WHERE worker = %s AND status = 'running'
+        """, (self.lease_seconds, self.worker_id))
+        conn.commit()
+        cursor.close()
+
+    def _run(self):
+        conn = None
+        while not self._stop.wait(self.interval):
+            try:
+                if conn is None or conn.closed:
+                    conn = psycopg2.connect(**self.db_config)
+                self._beat(conn)
+            except psycopg2.Error as e:
+                # Beim nächsten Takt neu verbinden; läuft die Lease ab, übernimmt ein anderer Worker
+                print(f"⚠️ Heartbeat fehlgeschlagen: {e}")
+                if conn is not None:
+                    conn.close()
+                conn = None
+        if conn is not None:
+            conn.close()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='job-heartbeat', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
@@ -6,156 +6,580 @@ Alternative zu n8n - kann standalone verwendet werden
 
 import os
 import time
-import json
-import requests
+import math
+import signal
+import hashlib
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Iterator, Tuple
+from urllib.parse import urlparse
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from openai import OpenAI
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from cache import ContactCache, DetailsCache, DomainCache, WebsiteCache
+from contacts import ContactCrawler
+from deliverability import MailDomainChecker, email_domain
+from http_client import HttpClient
+from scoring import RuleSet
+from generation import CompletionCache, GenerationPool
+from smtp_pool import SMTPPool
+from delivery import DeliveryQueue, DeliveryScheduler
+from persistence import LeadWriter
+from jobs import Heartbeat, JobQueue
+from progress import PlaceProgress, tiles_key
+from dedupe import LeadDuplicates, find_place_duplicates, geohash_neighbours, is_generic_domain, place_geohash, website_domain
+from metrics import DEFAULT_BUCKETS, REGISTRY, cache_collector
+from scheduler import ScheduledJob, Scheduler
+from website_analyzer import EMPTY_ANALYSIS, analyze_chunks, decode_chunks, is_html_response, iter_raw_chunks
 
 # Konfiguration
 CONFIG = {
     'google_api_key': os.getenv('GOOGLE_MAPS_API_KEY', ''),
     'openai_api_key': os.getenv('OPENAI_API_KEY', ''),
+    'openai_base_url': os.getenv('OPENAI_BASE_URL') or None,  # z.B. lokaler OpenAI-kompatibler Server
     'smtp_host': os.getenv('SMTP_HOST', 'smtp.gmail.com'),
     'smtp_port': int(os.getenv('SMTP_PORT', '587')),
     'smtp_user': os.getenv('SMTP_USER', 'martin@celox.io'),
     'smtp_password': os.getenv('SMTP_PASSWORD', ''),
+    'smtp_starttls': os.getenv('SMTP_STARTTLS', 'true').lower() == 'true',
+    'smtp_pool_size': int(os.getenv('SMTP_POOL_SIZE', '1')),
     'db_host': os.getenv('DB_HOST', 'localhost'),
     'db_name': os.getenv('DB_NAME', 'n8n'),
     'db_user': os.getenv('DB_USER', 'postgres'),
     'db_password': os.getenv('DB_PASSWORD', ''),
     'search_location': '52.4797,13.4363',  # Neukölln
     'search_radius': 5000,
+    'search_tile_radius': int(os.getenv('SEARCH_TILE_RADIUS', '1500')),  # Radius pro Kachel in Metern
+    'max_pages_per_tile': 3,  # Google liefert max. 3 Seiten à 20 Ergebnisse
+    'places_base_url': os.getenv('PLACES_BASE_URL', 'https://maps.googleapis.com/maps/api/place'),
+    'places_page_delay': float(os.getenv('PLACES_PAGE_DELAY', '2')),  # Sekunden, bis next_page_token gilt
     'max_emails_per_day': 20,
     'delay_between_emails': 120,  # Sekunden
+    'enrichment_concurrency': int(os.getenv('ENRICHMENT_CONCURRENCY', '1')),  # 1 = seriell
+    'per_host_concurrency': int(os.getenv('PER_HOST_CONCURRENCY', '4')),
+    'cache_path': os.getenv('LEAD_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lead_cache.sqlite3')),
+    'details_cache_ttl': int(os.getenv('DETAILS_CACHE_TTL', str(7 * 24 * 3600))),  # Sekunden
+    'details_cache_max_entries': int(os.getenv('DETAILS_CACHE_MAX_ENTRIES', '50000')),
+    'website_max_bytes': int(os.getenv('WEBSITE_MAX_BYTES', str(512 * 1024))),
+    'website_cache_ttl': int(os.getenv('WEBSITE_CACHE_TTL', str(30 * 24 * 3600))),  # danach Neu-Analyse erzwingen
+    'website_cache_max_entries': int(os.getenv('WEBSITE_CACHE_MAX_ENTRIES', '50000')),
+    # Kontaktsuche (Impressum/Kontakt): eigener Thread-Pool, Budget je Website, Höflichkeit je Host
+    'crawl_concurrency': int(os.getenv('CRAWL_CONCURRENCY', '8')),
+    'crawl_max_pages': int(os.getenv('CRAWL_MAX_PAGES', '4')),  # inkl. Startseite
+    'crawl_max_depth': int(os.getenv('CRAWL_MAX_DEPTH', '2')),
+    'crawl_host_delay': float(os.getenv('CRAWL_HOST_DELAY', '1.0')),  # Sekunden zwischen Abrufen desselben Hosts
+    'crawl_site_timeout': float(os.getenv('CRAWL_SITE_TIMEOUT', '20')),
+    'crawl_user_agent': os.getenv('CRAWL_USER_AGENT', 'Mozilla/5.0 (compatible; celox-leadgen/1.0; +https://celox.io)'),
+    'contact_cache_ttl': int(os.getenv('CONTACT_CACHE_TTL', str(30 * 24 * 3600))),
+    'contact_cache_negative_ttl': int(os.getenv('CONTACT_CACHE_NEGATIVE_TTL', str(7 * 24 * 3600))),  # ohne Treffer
+    'contact_cache_max_entries': int(os.getenv('CONTACT_CACHE_MAX_ENTRIES', '50000')),
+    # Keine Adresse gefunden: info@domain raten (bisheriges Verhalten) statt Lead zu überspringen
+    'contact_guess_fallback': os.getenv('CONTACT_GUESS_FALLBACK', 'false').lower() == 'true',
+    # MX-Prüfung der Empfänger-Domain vor Generierung (leer = Nameserver aus /etc/resolv.conf)
+    'dns_check': os.getenv('DNS_CHECK', 'true').lower() == 'true',
+    'dns_nameservers': [ns.strip() for ns in os.getenv('DNS_NAMESERVERS', '').split(',') if ns.strip()],
+    'dns_port': int(os.getenv('DNS_PORT', '53')),
+    'dns_timeout': float(os.getenv('DNS_TIMEOUT', '3.0')),
+    'dns_concurrency': int(os.getenv('DNS_CONCURRENCY', '16')),
+    'dns_min_ttl': int(os.getenv('DNS_MIN_TTL', '300')),  # kürzere TTLs werden angehoben
+    'dns_max_ttl': int(os.getenv('DNS_MAX_TTL', str(24 * 3600))),
+    'dns_negative_ttl': int(os.getenv('DNS_NEGATIVE_TTL', '3600')),  # Obergrenze für NXDOMAIN/keine Records
+    'dns_cache_max_entries': int(os.getenv('DNS_CACHE_MAX_ENTRIES', '100000')),
+    'generation_concurrency': int(os.getenv('GENERATION_CONCURRENCY', '4')),
+    'openai_requests_per_minute': int(os.getenv('OPENAI_RPM', '500')),
+    'openai_tokens_per_minute': int(os.getenv('OPENAI_TPM', '200000')),
+    'completion_cache_ttl': int(os.getenv('COMPLETION_CACHE_TTL', str(30 * 24 * 3600))),
+    'completion_cache_max_entries': int(os.getenv('COMPLETION_CACHE_MAX_ENTRIES', '20000')),
+    'campaign_top_leads': int(os.getenv('CAMPAIGN_TOP_LEADS', '50')),  # pro Suchlauf eingeplante Leads
+    'job_lease_seconds': int(os.getenv('JOB_LEASE_SECONDS', '300')),
+    'job_max_attempts': int(os.getenv('JOB_MAX_ATTEMPTS', '3')),
+    'worker_batch_size': int(os.getenv('WORKER_BATCH_SIZE', '10')),
+    'place_recheck_days': int(os.getenv('PLACE_RECHECK_DAYS', '90')),  # abgelehnte Places danach erneut prüfen
+    'campaign_resume_hours': int(os.getenv('CAMPAIGN_RESUME_HOURS', '24')),  # abgebrochene Suche so lange fortsetzen
+    'dedupe_name_threshold': float(os.getenv('DEDUPE_NAME_THRESHOLD', '0.8')),  # Trigramm-Ähnlichkeit der Namen
+    # Zeitpläne für --daemon (Cron-Syntax, lokale Zeit)
+    'daemon_schedules': {
+        'campaign': os.getenv('DAEMON_CAMPAIGN_CRON', '0 9 * * 1-5'),
+        'followup': os.getenv('DAEMON_FOLLOWUP_CRON', '0 14 * * *'),
+        'deliver': os.getenv('DAEMON_DELIVER_CRON', '* 8-18 * * 1-5'),
+        'stats': os.getenv('DAEMON_STATS_CRON', '0 18 * * 5'),
+        'rebuild_stats': os.getenv('DAEMON_REBUILD_STATS_CRON', '30 3 * * 0'),
+        'find_duplicates': os.getenv('DAEMON_DUPLICATES_CRON', '0 4 * * 0'),
+    },
+    # Metriken: eigener Scrape-Port und/oder Textfile für den node_exporter (leer = aus)
+    'metrics_port': int(os.getenv('METRICS_PORT', '0')),
+    'metrics_textfile': os.getenv('METRICS_TEXTFILE', ''),
+    'daemon_state_path': os.getenv('DAEMON_STATE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'daemon_state.json')),
+    'scoring_rules_path': os.getenv('SCORING_RULES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scoring_rules.json')),
 }
 
-# High-Potential Keywords für Branchen
-HIGH_POTENTIAL_KEYWORDS = [
-    'steuerberater', 'buchhaltung', 'accounting', 'tax',
-    'immobilien', 'hausverwaltung', 'property',
-    'personaldienstleister', 'recruiting', 'hr',
-    'versicherung', 'insurance',
-    'rechtsanwalt', 'law', 'kanzlei',
-    'marketing', 'werbeagentur', 'agency',
-    'logistik', 'spedition', 'transport'
-]
+PLACES_TEXTSEARCH_URL = f"{CONFIG['places_base_url']}/textsearch/json"
+PLACES_DETAILS_URL = f"{CONFIG['places_base_url']}/details/json"
+
+JOB_KINDS = ('enrich', 'contact', 'generate', 'followup')
+
+# Dauer je Pipeline-Schritt: pro Place (details, website, enrich) bzw. pro Batch (dns, generate, persist, enqueue)
+STAGE_LATENCY = REGISTRY.histogram(
+    'leadgen_stage_duration_seconds', 'Dauer der Pipeline-Schritte', ['stage'],
+    buckets=DEFAULT_BUCKETS + (60.0, 120.0))
+LEADS = REGISTRY.counter('leadgen_leads_total', 'Leads je Ergebnis eines Pipeline-Schritts', ['outcome'])
+QUEUE_DEPTH = REGISTRY.gauge('leadgen_queue_depth', 'Einträge in E-Mail- und Job-Warteschlange',
+                             ['queue', 'status'])
+EMAIL_SLOTS_USED = REGISTRY.gauge('leadgen_email_slots_used_today', 'Heute versendete plus im Versand befindliche E-Mails')
+
+
+def guess_recipient(website: str) -> str:
+    """info@ der Website-Domain - nur wenn die Kontaktsuche nichts gefunden hat"""
+    return f"info@{website_domain(website)}"
+
+
+class lazy_property:
+    """Wie functools.cached_property, aber thread-sicher (Worker-Threads greifen parallel zu)"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.name = factory.__name__
+        self.__doc__ = factory.__doc__
+        self._lock = threading.Lock()
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            pass
+        with self._lock:
+            if self.name not in instance.__dict__:
+                instance.__dict__[self.name] = self.factory(instance)
+            return instance.__dict__[self.name]
 
 
 class LeadGenerator:
-    def __init__(self):
-        self.openai_client = OpenAI(api_key=CONFIG['openai_api_key'])
-        self.db_conn = None
-        self.connect_db()
+    """Subsysteme (OpenAI, DB, SMTP, Caches) werden erst beim ersten Zugriff aufgebaut -
+    --stats braucht z.B. nur die Datenbank, der Daemon hält alles zwischen den Jobs warm."""
+
+    def __init__(self, concurrency: int = None):
+        # Effektive Parallelität der Anreicherung (--concurrency) - bestimmt auch den HTTP-Pool
+        self.concurrency = concurrency or CONFIG['enrichment_concurrency']
+        self._host_semaphores = {}
+        self._host_lock = threading.Lock()
+        self.discovery_stats = {'api_calls': 0, 'unique_places': 0}
+        self.stop_event = threading.Event()
+        REGISTRY.register_collector(cache_collector('leadgen', self._active_caches))
+
+    @lazy_property
+    def openai_client(self):
+        # Import erst hier: kostet spürbar Startzeit und wird nur für die Generierung gebraucht
+        from openai import OpenAI
+        return OpenAI(api_key=CONFIG['openai_api_key'], base_url=CONFIG['openai_base_url'])
+
+    @lazy_property
+    def rules(self) -> RuleSet:
+        return RuleSet.load(CONFIG['scoring_rules_path'])
+
+    @lazy_property
+    def http(self) -> HttpClient:
+        # Pro Host: alle Anreicherungs-Worker gegen die Places-API bzw. per_host_concurrency je Website
+        return HttpClient(pool_maxsize=max(10, self.concurrency, CONFIG['per_host_concurrency']))
+
+    @lazy_property
+    def details_cache(self) -> DetailsCache:
+        return DetailsCache(
+            CONFIG['cache_path'],
+            ttl=CONFIG['details_cache_ttl'],
+            max_entries=CONFIG['details_cache_max_entries']
+        )
+
+    @lazy_property
+    def website_cache(self) -> WebsiteCache:
+        return WebsiteCache(
+            CONFIG['cache_path'],
+            ttl=CONFIG['website_cache_ttl'],
+            max_entries=CONFIG['website_cache_max_entries']
+        )
+
+    @lazy_property
+    def contact_cache(self) -> ContactCache:
+        return ContactCache(
+            CONFIG['cache_path'],
+            ttl=CONFIG['contact_cache_ttl'],
+            max_entries=CONFIG['contact_cache_max_entries'],
+            negative_ttl=CONFIG['contact_cache_negative_ttl']
+        )
+
+    @lazy_property
+    def crawler(self) -> ContactCrawler:
+        return ContactCrawler(
+            self.http,
+            self.contact_cache,
+            concurrency=CONFIG['crawl_concurrency'],
+            max_pages=CONFIG['crawl_max_pages'],
+            max_depth=CONFIG['crawl_max_depth'],
+            host_delay=CONFIG['crawl_host_delay'],
+            site_timeout=CONFIG['crawl_site_timeout'],
+            user_agent=CONFIG['crawl_user_agent']
+        )
+
+    @lazy_property
+    def domain_cache(self) -> DomainCache:
+        return DomainCache(
+            CONFIG['cache_path'],
+            ttl=CONFIG['dns_max_ttl'],
+            max_entries=CONFIG['dns_cache_max_entries']
+        )
+
+    @lazy_property
+    def mail_domains(self) -> MailDomainChecker:
+        return MailDomainChecker(
+            self.domain_cache,
+            nameservers=CONFIG['dns_nameservers'],
+            port=CONFIG['dns_port'],
+            timeout=CONFIG['dns_timeout'],
+            concurrency=CONFIG['dns_concurrency'],
+            min_ttl=CONFIG['dns_min_ttl'],
+            max_ttl=CONFIG['dns_max_ttl'],
+            negative_ttl=CONFIG['dns_negative_ttl']
+        )
+
+    @lazy_property
+    def generation(self) -> GenerationPool:
+        return GenerationPool(
+            self.openai_client,
+            CompletionCache(
+                CONFIG['cache_path'],
+                ttl=CONFIG['completion_cache_ttl'],
+                max_entries=CONFIG['completion_cache_max_entries']
+            ),
+            concurrency=CONFIG['generation_concurrency'],
+            requests_per_minute=CONFIG['openai_requests_per_minute'],
+            tokens_per_minute=CONFIG['openai_tokens_per_minute']
+        )
+
+    @lazy_property
+    def smtp(self) -> SMTPPool:
+        return SMTPPool(
+            CONFIG['smtp_host'],
+            CONFIG['smtp_port'],
+            CONFIG['smtp_user'],
+            CONFIG['smtp_password'],
+            size=CONFIG['smtp_pool_size'],
+            starttls=CONFIG['smtp_starttls']
+        )
+
+    @lazy_property
+    def db_conn(self):
+        return self.connect_db()
+
+    @lazy_property
+    def delivery_queue(self) -> DeliveryQueue:
+        return DeliveryQueue(self.db_conn, CONFIG['delay_between_emails'])
+
+    @lazy_property
+    def lead_writer(self) -> LeadWriter:
+        return LeadWriter(self.db_conn)
+
+    @lazy_property
+    def jobs(self) -> JobQueue:
+        return JobQueue(
+            self.db_conn,
+            lease_seconds=CONFIG['job_lease_seconds'],
+            max_attempts=CONFIG['job_max_attempts']
+        )
+
+    @lazy_property
+    def progress(self) -> PlaceProgress:
+        return PlaceProgress(
+            self.db_conn,
+            recheck_days=CONFIG['place_recheck_days'],
+            resume_hours=CONFIG['campaign_resume_hours']
+        )
+
+    @staticmethod
+    def db_config() -> Dict:
+        """Verbindungsparameter für psycopg2.connect"""
+        return {
+            'host': CONFIG['db_host'],
+            'database': CONFIG['db_name'],
+            'user': CONFIG['db_user'],
+            'password': CONFIG['db_password']
+        }
 
     def connect_db(self):
         """Verbindung zur PostgreSQL-Datenbank"""
         try:
-            self.db_conn = psycopg2.connect(
-                host=CONFIG['db_host'],
-                database=CONFIG['db_name'],
-                user=CONFIG['db_user'],
-                password=CONFIG['db_password']
-            )
+            self.db_conn = psycopg2.connect(**self.db_config())
             print("✓ Datenbankverbindung hergestellt")
+            return self.db_conn
         except Exception as e:
             print(f"✗ Datenbankfehler: {e}")
             raise
 
-    def search_places(self) -> List[Dict]:
-        """Sucht Unternehmen via Google Places API"""
-        url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
+    def ensure_db(self):
+        """Prüft die (ggf. seit Stunden offene) Verbindung und baut sie bei Bedarf neu auf"""
+        if 'db_conn' not in self.__dict__:
+            return
+        try:
+            if not self.db_conn.closed:
+                cursor = self.db_conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+                self.db_conn.rollback()
+                return
+        except psycopg2.Error:
+            pass
+        print("⚠️ Datenbankverbindung verloren - verbinde neu")
+        try:
+            self.db_conn.close()
+        except psycopg2.Error:
+            pass
+        # Alle Subsysteme, die die alte Verbindung halten, beim nächsten Zugriff neu aufbauen
+        for name in ('db_conn', 'delivery_queue', 'lead_writer', 'jobs', 'progress'):
+            self.__dict__.pop(name, None)
+
+    def _active_caches(self) -> Dict:
+        """Nur bereits aufgebaute Caches - ein Scrape darf keine SQLite-Datei öffnen"""
+        caches = {name: self.__dict__[attr] for name, attr in (('details', 'details_cache'), ('website', 'website_cache'),
+                                                               ('contact', 'contact_cache'), ('dns', 'domain_cache'))
+                  if attr in self.__dict__}
+        if 'generation' in self.__dict__:
+            caches['completion'] = self.generation.cache
+        return caches
+
+    def update_queue_metrics(self):
+        """Aktualisiert die Warteschlangen-Gauges (nach work() und deliver())"""
+        if 'db_conn' not in self.__dict__:
+            return
+        QUEUE_DEPTH.labels('email_queue', 'queued').set(self.delivery_queue.pending())
+        EMAIL_SLOTS_USED.set(self.delivery_queue.used_today())
+        for kind, statuses in self.jobs.counts().items():
+            for status in ('pending', 'running', 'failed'):
+                QUEUE_DEPTH.labels(kind, status).set(statuses.get(status, 0))
+        self.db_conn.commit()
+
+    def write_metrics(self):
+        """Schreibt das Metrik-Textfile (falls konfiguriert)"""
+        if not CONFIG['metrics_textfile']:
+            return
+        try:
+            self.update_queue_metrics()
+        except psycopg2.Error as e:
+            print(f"⚠️ Warteschlangen-Metriken nicht verfügbar: {e}")
+        REGISTRY.write_textfile(CONFIG['metrics_textfile'])
+
+    def close(self):
+        """Schließt nur die Subsysteme, die tatsächlich aufgebaut wurden"""
+        if 'smtp' in self.__dict__:
+            self.smtp.close()
+        if 'crawler' in self.__dict__:
+            self.crawler.close()
+        if 'mail_domains' in self.__dict__:
+            self.mail_domains.close()
+        if 'http' in self.__dict__:
+            self.http.close()
+        if 'db_conn' in self.__dict__ and not self.db_conn.closed:
+            self.db_conn.close()
+
+    def search_tiles(self) -> Iterator[Tuple[str, int]]:
+        """Zerlegt den Suchradius in ein Raster kleinerer Kreise"""
+        lat, lng = (float(v) for v in CONFIG['search_location'].split(','))
+        radius = CONFIG['search_radius']
+        tile_radius = min(CONFIG['search_tile_radius'], radius)
         
+        # Kachel-Kreise decken je ein Quadrat mit Kantenlänge r * sqrt(2) ab
+        step = tile_radius * math.sqrt(2)
+        steps = math.ceil(radius / step)
+        meters_per_deg_lat = 111320
+        meters_per_deg_lng = 111320 * math.cos(math.radians(lat))
+        
+        for i in range(-steps, steps + 1):
+            for j in range(-steps, steps + 1):
+                dy, dx = i * step, j * step
+                if math.hypot(dx, dy) > radius + tile_radius:
+                    continue
+                tile_lat = lat + dy / meters_per_deg_lat
+                tile_lng = lng + dx / meters_per_deg_lng
+                yield f"{tile_lat:.6f},{tile_lng:.6f}", tile_radius
+
+    def _fetch_tile(self, location: str, radius: int) -> Iterator[Dict]:
+        """Liefert alle Ergebnisseiten einer Kachel (inkl. next_page_token)"""
         params = {
             'query': 'Unternehmen Neukölln Berlin',
-            'location': CONFIG['search_location'],
-            'radius': CONFIG['search_radius'],
+            'location': location,
+            'radius': radius,
             'type': 'establishment',
             'key': CONFIG['google_api_key']
         }
         
-        print(f"🔍 Suche Unternehmen in Neukölln...")
-        response = requests.get(url, params=params)
-        
-        if response.status_code != 200:
-            print(f"✗ Google API Fehler: {response.status_code}")
-            return []
+        for _ in range(CONFIG['max_pages_per_tile']):
+            data = None
+            # Ein frischer next_page_token ist erst nach kurzer Zeit gültig
+            for attempt in range(3):
+                self.discovery_stats['api_calls'] += 1
+                with STAGE_LATENCY.labels('discovery').time():
+                    response = self.http.get(PLACES_TEXTSEARCH_URL, endpoint='places', params=params)
+                if response.status_code != 200:
+                    print(f"✗ Google API Fehler: {response.status_code}")
+                    return
+                data = response.json()
+                if data.get('status') != 'INVALID_REQUEST' or 'pagetoken' not in params:
+                    break
+                time.sleep(CONFIG['places_page_delay'])
+            
+            yield from data.get('results', [])
+            
+            token = data.get('next_page_token')
+            if not token:
+                return
+            params = {'pagetoken': token, 'key': CONFIG['google_api_key']}
+            time.sleep(CONFIG['places_page_delay'])
+
+    def iter_tiles(self, start_tile: int = 0) -> Iterator[Tuple[int, List[Dict]]]:
+        """Sucht Unternehmen kachelweise: (Kachel-Index, neue Places der Kachel), dedupliziert"""
+        self.discovery_stats = {'api_calls': 0, 'unique_places': 0}
+        seen = set()
         
-        data = response.json()
-        results = data.get('results', [])
-        print(f"✓ {len(results)} Unternehmen gefunden")
+        print(f"🔍 Suche Unternehmen in Neukölln...")
+        if start_tile:
+            print(f"↪ Setze abgebrochene Suche ab Kachel {start_tile + 1} fort")
+        for index, (location, radius) in enumerate(self.search_tiles()):
+            if index < start_tile:
+                continue
+            if self.stop_event.is_set():
+                print("⚠️ Suche abgebrochen (Beenden angefordert)")
+                break
+            places = []
+            for place in self._fetch_tile(location, radius):
+                place_id = place.get('place_id')
+                if place_id in seen:
+                    continue
+                seen.add(place_id)
+                self.discovery_stats['unique_places'] += 1
+                LEADS.labels('discovered').inc()
+                places.append(place)
+            yield index, places
         
-        return results
+        calls = self.discovery_stats['api_calls']
+        unique = self.discovery_stats['unique_places']
+        print(f"✓ {unique} Unternehmen gefunden "
+              f"({calls} API-Aufrufe, {unique / max(calls, 1):.1f} neue Places pro Aufruf)")
+
+    def iter_places(self) -> Iterator[Dict]:
+        """Sucht Unternehmen kachelweise und liefert neue Places sofort (dedupliziert)"""
+        for _, places in self.iter_tiles():
+            yield from places
+
+    def search_places(self) -> List[Dict]:
+        """Sucht Unternehmen via Google Places API"""
+        return list(self.iter_places())
 
     def score_lead(self, place: Dict) -> int:
         """Bewertet Lead nach Automatisierungspotenzial"""
-        score = 0
-        name = place.get('name', '').lower()
-        
-        # Branchen-Check
-        for keyword in HIGH_POTENTIAL_KEYWORDS:
-            if keyword in name:
-                score += 30
-                break
-        
-        # Rating-Bonus
-        rating = place.get('rating', 0)
-        if rating >= 4.0:
-            score += 10
+        return self.rules.score(place)
+
+    def rescore_leads(self):
+        """Bewertet alle gespeicherten Leads mit dem aktuellen Regelsatz neu"""
+        query, params = self.rules.rescore_sql()
+        start = time.perf_counter()
         
-        # Etabliertes Unternehmen
-        if place.get('user_ratings_total', 0) > 20:
-            score += 10
+        cursor = self.db_conn.cursor()
+        cursor.execute(query, params)
+        updated = cursor.rowcount
+        cursor.execute("SELECT COUNT(*) FROM leads_email_campaign WHERE user_ratings_total IS NULL")
+        skipped = cursor.fetchone()[0]
+        self.db_conn.commit()
+        cursor.close()
         
-        return score
+        print(f"✓ {updated} Leads neu bewertet ({time.perf_counter() - start:.1f}s)")
+        if skipped:
+            print(f"   {skipped} Leads ohne Bewertungsdaten (Altbestand) behalten ihren Score")
 
     def get_place_details(self, place_id: str) -> Dict:
         """Holt detaillierte Informationen zu einem Place"""
-        url = "https://maps.googleapis.com/maps/api/place/details/json"
+        url = PLACES_DETAILS_URL
+        fields = 'name,formatted_phone_number,website,business_status'
+        
+        cached = self.details_cache.get_details(place_id, fields)
+        if cached is not None:
+            return cached
         
         params = {
             'place_id': place_id,
-            'fields': 'name,formatted_phone_number,website,business_status',
+            'fields': fields,
             'key': CONFIG['google_api_key']
         }
         
-        response = requests.get(url, params=params)
+        response = self.http.get(url, endpoint='places', params=params)
         if response.status_code == 200:
-            return response.json().get('result', {})
+            result = response.json().get('result', {})
+            if result:
+                self.details_cache.set_details(place_id, fields, result)
+            return result
         return {}
 
     def analyze_website(self, url: str) -> Dict:
         """Analysiert Website auf Automatisierungspotenzial"""
+        record = self.website_cache.get(url)
+        headers = self.website_cache.conditional_headers(record)
+        
         try:
-            response = requests.get(url, timeout=10)
-            html = response.text.lower()
-            
-            manual_indicators = [
-                'anfrage', 'kontaktformular', 'telefonisch',
-                'manuell', 'persönlich', 'verwaltung'
-            ]
-            
-            automation_potential = sum(5 for indicator in manual_indicators if indicator in html)
-            
-            # Moderne Tech-Check
-            modern_tech = ['react', 'vue', 'angular', 'next.js']
-            is_modern = any(tech in html for tech in modern_tech)
-            
-            return {
-                'automation_potential': automation_potential,
-                'is_modern': is_modern,
-                'length': len(html)
-            }
+            with self.http.get(url, endpoint='website', stream=True, headers=headers) as response:
+                # Unverändert seit letzter Analyse
+                if response.status_code == 304 and record:
+                    self.website_cache.record_skip(bytes_saved=record['bytes'])
+                    return record['analysis']
+                
+                # Bilder, PDFs etc. nicht herunterladen
+                if not is_html_response(response):
+                    return dict(EMPTY_ANALYSIS)
+                
+                raw_chunks = list(iter_raw_chunks(response, CONFIG['website_max_bytes']))
+                content_hash = hashlib.sha256(b''.join(raw_chunks)).hexdigest()
+                
+                if record and record['content_hash'] == content_hash:
+                    self.website_cache.record_skip()
+                    analysis = record['analysis']
+                else:
+                    analysis = analyze_chunks(decode_chunks(raw_chunks, response.encoding))
+                
+                self.website_cache.set(url, {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'content_hash': content_hash,
+                    'bytes': sum(len(chunk) for chunk in raw_chunks),
+                    'analysis': analysis
+                })
+                return analysis
         except:
-            return {'automation_potential': 0, 'is_modern': False, 'length': 0}
+            return dict(EMPTY_ANALYSIS)
 
-    def generate_email(self, lead: Dict) -> Dict:
-        """Generiert personalisierte E-Mail mit GPT-4"""
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        """Liefert die Semaphore für das Parallelitäts-Limit pro Host"""
+        host = urlparse(url).netloc.lower()
+        with self._host_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(CONFIG['per_host_concurrency'])
+            return self._host_semaphores[host]
+
+    def enrich_lead(self, lead: Dict) -> Dict:
+        """Holt Details und analysiert die Website eines Leads"""
+        with self._host_semaphore(PLACES_DETAILS_URL), STAGE_LATENCY.labels('details').time():
+            details = self.get_place_details(lead['place_id'])
+        lead.update(details)
+        
+        if lead.get('website'):
+            with self._host_semaphore(lead['website']), STAGE_LATENCY.labels('website').time():
+                lead['website_analysis'] = self.analyze_website(lead['website'])
+        
+        return lead
+
+    def email_request(self, lead: Dict) -> Dict:
+        """Baut die OpenAI-Anfrage für die Erst-E-Mail"""
         prompt = f"""Erstelle eine personalisierte B2B-E-Mail für folgendes Unternehmen:
 
 Firmenname: {lead['name']}
@@ -172,55 +596,63 @@ Die E-Mail soll:
 
 Absender: Martin von celox.io, IT-Dienstleister für KI-Automatisierung"""
 
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "Du bist ein B2B-Sales-Experte für KI-Automatisierung."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
-            
-            content = response.choices[0].message.content
-            
-            # Parse Betreff und Body
-            parts = content.split('|')
-            subject = parts[0].replace('BETREFF:', '').strip()
-            body = parts[1].replace('BODY:', '').strip() if len(parts) > 1 else content
-            
-            return {'subject': subject, 'body': body}
-        except Exception as e:
-            print(f"✗ OpenAI Fehler: {e}")
-            return None
+        return {
+            'model': "gpt-4o-mini",
+            'messages': [
+                {"role": "system", "content": "Du bist ein B2B-Sales-Experte für KI-Automatisierung."},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': 0.7,
+            'max_tokens': 500
+        }
 
-    def save_lead(self, lead: Dict):
-        """Speichert Lead in Datenbank"""
-        cursor = self.db_conn.cursor()
-        
-        query = """
-        INSERT INTO leads_email_campaign 
-        (company_name, address, phone, website, score, email_subject, email_body, status, created_at)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (company_name, address) DO NOTHING
-        """
-        
-        values = (
-            lead['name'],
-            lead.get('address'),
-            lead.get('phone'),
-            lead.get('website'),
-            lead.get('score'),
-            lead.get('email_subject'),
-            lead.get('email_body'),
-            'pending',
-            datetime.now()
-        )
-        
-        cursor.execute(query, values)
-        self.db_conn.commit()
-        cursor.close()
+    def followup_request(self, lead: Dict) -> Dict:
+        """Baut die OpenAI-Anfrage für ein Follow-up"""
+        # Nummer des Follow-ups im Prompt: jede Stufe bekommt einen eigenen Completion-Cache-Eintrag
+        number = (lead.get('followup_count') or 0) + 1
+        prompt = f"""Erstelle eine kurze Follow-up E-Mail für {lead['company_name']}.
+Erste E-Mail hatte Betreff: {lead['email_subject']}
+Dies ist Follow-up Nr. {number} - nicht wiederholen, was frühere Follow-ups bereits gesagt haben.
+
+Follow-up soll:
+- Kurz sein (max 80 Wörter)
+- Konkreten Mehrwert bieten (z.B. kostenloser KI-Potenzial-Check)
+- Nicht aufdringlich wirken
+Format: BETREFF: ... | BODY: ..."""
+
+        return {
+            'model': "gpt-4o-mini",
+            'messages': [{"role": "user", "content": prompt}],
+            'temperature': 0.7
+        }
+
+    @staticmethod
+    def parse_email(content: str) -> Dict:
+        """Parse Betreff und Body aus 'BETREFF: ... | BODY: ...'"""
+        parts = content.split('|')
+        subject = parts[0].replace('BETREFF:', '').strip()
+        body = parts[1].replace('BODY:', '').strip() if len(parts) > 1 else content
+        return {'subject': subject, 'body': body}
+
+    def generate_email(self, lead: Dict) -> Dict:
+        """Generiert personalisierte E-Mail mit GPT-4"""
+        return self.generate_emails([lead])[0]
+
+    def generate_emails(self, leads: List[Dict], followup: bool = False) -> List[Dict]:
+        """Generiert E-Mails für mehrere Leads parallel (None bei Fehler)"""
+        build = self.followup_request if followup else self.email_request
+        with STAGE_LATENCY.labels('generate').time():
+            contents = self.generation.complete_many([build(lead) for lead in leads])
+        return [self.parse_email(content) if content else None for content in contents]
+
+    def save_lead(self, lead: Dict) -> int:
+        """Speichert Lead in Datenbank (liefert id, None falls bereits vorhanden)"""
+        return self.save_leads([lead])[0]
+
+    def save_leads(self, leads: List[Dict], commit: bool = True) -> List[int]:
+        """Speichert mehrere Leads gebündelt in einer Transaktion"""
+        with STAGE_LATENCY.labels('persist').time():
+            return self.lead_writer.save_many(leads, commit=commit)
 
     def send_email(self, to_email: str, subject: str, body: str):
         """Versendet E-Mail via SMTP"""
@@ -249,160 +681,519 @@ antworten Sie einfach mit "Abmelden".
         msg.attach(MIMEText(full_body, 'plain'))
         
         try:
-            server = smtplib.SMTP(CONFIG['smtp_host'], CONFIG['smtp_port'])
-            server.starttls()
-            server.login(CONFIG['smtp_user'], CONFIG['smtp_password'])
-            server.send_message(msg)
-            server.quit()
+            latency_ms = self.smtp.send_message(msg)
+            STAGE_LATENCY.labels('send').observe(latency_ms / 1000)
+            LEADS.labels('sent').inc()
             
-            print(f"✓ E-Mail gesendet an: {to_email}")
+            print(f"✓ E-Mail gesendet an: {to_email} ({latency_ms:.0f} ms)")
             return True
         except Exception as e:
+            LEADS.labels('send_failed').inc()
             print(f"✗ E-Mail-Fehler: {e}")
             return False
 
-    def update_email_status(self, company_name: str, status: str):
+    def update_email_status(self, lead_id: int, status: str):
         """Aktualisiert E-Mail-Status in Datenbank"""
-        cursor = self.db_conn.cursor()
-        query = """
-        UPDATE leads_email_campaign 
-        SET status = %s, sent_at = %s 
-        WHERE company_name = %s
-        """
-        cursor.execute(query, (status, datetime.now(), company_name))
-        self.db_conn.commit()
-        cursor.close()
+        self.lead_writer.update_status([lead_id], status, sent_at=datetime.now())
 
-    def run_campaign(self):
-        """Führt komplette Kampagne aus"""
-        print("\n🚀 Lead Generation Campaign gestartet\n")
+    def discover(self) -> bool:
+        """Sucht & bewertet Unternehmen; neue oder geänderte Places landen in campaign_places
+
+        Nach jeder Kachel wird ein Checkpoint gespeichert - ein abgebrochener Lauf setzt dort
+        fort. Liefert False, wenn die Suche vorzeitig beendet wurde.
+        """
+        key = tiles_key(CONFIG['search_location'], CONFIG['search_radius'], CONFIG['search_tile_radius'])
+        run_id, tiles_done = self.progress.start_run(key)
+        qualified_count = 0
+        fresh_count = 0
         
-        # 1. Suche Unternehmen
-        places = self.search_places()
+        # 1. Suche Unternehmen & 2. Score & Filter (Streaming, kachelweise)
+        for index, places in self.iter_tiles(start_tile=tiles_done):
+            qualified = []
+            for place, score in zip(places, self.rules.score_batch(places)):
+                if score >= self.rules.min_score:
+                    place['score'] = score
+                    qualified.append(place)
+            # Vorfilter: bereits bearbeitete Places fallen hier heraus - vor jedem Details-Aufruf
+            fresh = self.progress.record_tile(run_id, index + 1, qualified)
+            qualified_count += len(qualified)
+            fresh_count += len(fresh)
+            LEADS.labels('qualified').inc(len(qualified))
+            LEADS.labels('skipped_known').inc(len(qualified) - len(fresh))
         
-        # 2. Score & Filter
-        qualified_leads = []
-        for place in places:
-            score = self.score_lead(place)
-            if score >= 30:
-                place['score'] = score
-                qualified_leads.append(place)
+        print(f"✓ {qualified_count} qualifizierte Leads gefunden, davon {fresh_count} neu oder geändert "
+              f"({qualified_count - fresh_count} bereits bearbeitet)")
+        if self.stop_event.is_set():
+            return False
+        self.progress.finish_run(run_id)
+        return True
+
+    def plan_campaign(self) -> int:
+        """Sucht & bewertet Unternehmen und plant die besten als Anreicherungs-Jobs ein"""
+        if not self.progress.try_lock():
+            print("⚠️ Es läuft bereits eine Suche in einem anderen Prozess - überspringe")
+            return 0
+        try:
+            if not self.discover():
+                return 0
+            
+            self.jobs.purge()
+            # Die besten noch offenen Places (auch aus früheren Läufen) - Markierung und Jobs in
+            # einer Transaktion. revision im Schlüssel: erneut geprüfte Places bekommen neue Jobs
+            places = self.progress.take_discovered(CONFIG['campaign_top_leads'])
+            places = self.drop_duplicate_places(places)
+            planned = self.jobs.enqueue_many('enrich', [
+                (f"{place['place_id']}:{place['revision']}", place['payload'], place['score'])
+                for place in places
+            ])
+        finally:
+            self.progress.unlock()
         
-        qualified_leads.sort(key=lambda x: x['score'], reverse=True)
-        print(f"✓ {len(qualified_leads)} qualifizierte Leads gefunden\n")
+        LEADS.labels('planned').inc(planned)
+        print(f"✓ {planned} Leads zur Anreicherung eingeplant\n")
+        return planned
+
+    def drop_duplicate_places(self, places: List[Dict]) -> List[Dict]:
+        """Lehnt eingeplante Places ab, die ein bereits bearbeitetes oder besser bewertetes Unternehmen doppeln
+
+        Vergleicht nur mit Places derselben und der angrenzenden Geohash-Zellen (und unter
+        gleicher Adresse innerhalb der Auswahl) - noch vor Details, Website-Analyse und OpenAI.
+        Ohne Commit wie take_discovered.
+        """
+        cells = set()
+        for place in places:
+            cell = place_geohash(place['payload'])
+            if cell:
+                cells.add(cell)
+                cells.update(geohash_neighbours(cell))
+        existing = self.progress.places_near(sorted(cells), [place['place_id'] for place in places])
+        duplicates = find_place_duplicates(places, existing, CONFIG['dedupe_name_threshold'])
+        self.progress.mark_duplicates(duplicates)
         
-        # 3. Detailinfos & E-Mail-Generierung
-        emails_sent = 0
-        max_emails = CONFIG['max_emails_per_day']
+        if duplicates:
+            print(f"⊘ {len(duplicates)} Dubletten vor der Anreicherung aussortiert")
+        LEADS.labels('duplicate_place').inc(len(duplicates))
+        return [place for place in places if place['place_id'] not in duplicates]
+
+    def _enrich_safe(self, lead: Dict) -> Tuple[Dict, str]:
+        """enrich_lead für den Worker-Pool: Fehler als Rückgabewert statt Exception"""
+        try:
+            with STAGE_LATENCY.labels('enrich').time():
+                return self.enrich_lead(lead), None
+        except Exception as e:
+            return lead, str(e)
+
+    def _run_enrich_jobs(self, jobs: List[Dict], executor=None):
+        """Reichert Leads an und plant qualifizierte zur Kontaktsuche ein"""
+        # Details & Website-Analyse: parallel über Worker-Pool oder seriell.
+        # Beide Varianten liefern die Leads in Score-Reihenfolge.
+        leads = [job['payload'] for job in jobs]
+        enriched = executor.map(self._enrich_safe, leads) if executor else map(self._enrich_safe, leads)
         
-        for lead in qualified_leads[:50]:  # Top 50
-            if emails_sent >= max_emails:
-                print(f"\n⚠️ Tages-Limit erreicht ({max_emails} E-Mails)")
-                break
-            
+        candidates = []
+        done = []
+        progress = []
+        for job, (lead, error) in zip(jobs, enriched):
+            if error:
+                print(f"  ✗ {lead['name']}: Anreicherung fehlgeschlagen ({error})")
+                LEADS.labels('enrich_failed').inc()
+                self.jobs.fail(job['id'], error, lead.get('place_id'))
+                continue
+            done.append(job['id'])
             print(f"\n📧 Verarbeite: {lead['name']}")
             
-            # Hole Details
-            details = self.get_place_details(lead['place_id'])
-            lead.update(details)
-            
             # Prüfe ob Website vorhanden
             if not lead.get('website'):
                 print("  ⊘ Keine Website - überspringe")
+                LEADS.labels('no_website').inc()
+                progress.append((lead['place_id'], 'rejected', 'no_website', None, None))
                 continue
             
-            # Analysiere Website
-            website_analysis = self.analyze_website(lead['website'])
+            website_analysis = lead['website_analysis']
             lead['final_score'] = lead['score'] + website_analysis['automation_potential']
             
             # Nur Leads mit hohem Potenzial
-            if lead['final_score'] < 40:
+            if lead['final_score'] < self.rules.min_final_score:
                 print(f"  ⊘ Score zu niedrig ({lead['final_score']}) - überspringe")
+                LEADS.labels('low_score').inc()
+                progress.append((lead['place_id'], 'rejected', 'low_score', None, None))
                 continue
             
-            # Generiere E-Mail
-            email_content = self.generate_email(lead)
-            if not email_content:
+            candidates.append((job, lead))
+        
+        # Gleiche Website = gleiches Unternehmen (auch unter anderem Namen/Adresse): nur einmal
+        # generieren. Innerhalb des Batches gewinnt der höhere Score (Claim-Reihenfolge)
+        domains = {}
+        for _, lead in candidates:
+            domain = website_domain(lead['website'])
+            domains[lead['place_id']] = domain if domain and not is_generic_domain(domain) else None
+        known = self.progress.known_domains(sorted({d for d in domains.values() if d}), list(domains))
+        qualified = []
+        for job, lead in candidates:
+            domain = domains[lead['place_id']]
+            if domain in known:
+                print(f"  ⊘ {lead['name']}: Website {domain} gehört bereits zu {known[domain]} - überspringe")
+                LEADS.labels('duplicate_domain').inc()
+                progress.append((lead['place_id'], 'rejected', 'duplicate_domain', None, domain))
+                continue
+            if domain:
+                known[domain] = lead['place_id']
+            qualified.append((job['dedupe_key'], lead, lead['final_score']))
+            progress.append((lead['place_id'], 'enriched', None, None, domain))
+        
+        # Erst einplanen, dann abschließen - bei Absturz dazwischen verhindert dedupe_key Doppelte
+        self.jobs.enqueue_many('contact', qualified)
+        self.progress.advance(progress)
+        self.jobs.complete(done)
+
+    def _collect_contact_jobs(self, crawls: Dict) -> int:
+        """Übernimmt fertige Kontaktsuchen: mit Adresse zur Generierung, sonst ablehnen
+
+        crawls: Job-id -> (Future, Job) der noch laufenden Suchen; fertige werden entfernt.
+        Gleiche Domain = gleiches Future, daher nach Job statt nach Future geführt.
+        """
+        finished = [job_id for job_id, (future, _) in crawls.items() if future.done()]
+        qualified = []
+        done = []
+        progress = []
+        for job_id in finished:
+            future, job = crawls.pop(job_id)
+            lead = job['payload']
+            try:
+                emails = future.result()
+            except Exception as e:
+                LEADS.labels('contact_failed').inc()
+                self.jobs.fail(job['id'], str(e), lead.get('place_id'))
                 continue
+            done.append(job['id'])
             
+            if emails:
+                lead['email'] = emails[0]
+                LEADS.labels('contact_found').inc()
+            elif CONFIG['contact_guess_fallback']:
+                lead['email'] = guess_recipient(lead['website'])
+                LEADS.labels('contact_guessed').inc()
+            else:
+                print(f"  ⊘ {lead['name']}: keine Kontaktadresse gefunden - überspringe")
+                LEADS.labels('no_email').inc()
+                progress.append((lead['place_id'], 'rejected', 'no_email', None, None))
+                continue
+            qualified.append((job['dedupe_key'], lead, job['priority']))
+        
+        self.jobs.enqueue_many('generate', qualified)
+        self.progress.advance(progress)
+        self.jobs.complete(done)
+        return len(finished)
+
+    def undeliverable_domains(self, recipients: List[str]) -> Dict[str, str]:
+        """Empfänger-Domains ohne Mailserver (Domain -> DNS-Status), ein paralleler Lookup pro Batch"""
+        if not CONFIG['dns_check'] or not recipients:
+            return {}
+        with STAGE_LATENCY.labels('dns').time():
+            results = self.mail_domains.check_many(email_domain(recipient) for recipient in recipients)
+        return {domain: record['status'] for domain, record in results.items()
+                if not self.mail_domains.deliverable(record)}
+
+    def _run_generate_jobs(self, jobs: List[Dict]) -> int:
+        """Generiert E-Mails, speichert Leads und reiht sie ein (liefert Anzahl eingereihter E-Mails)"""
+        for job in jobs:
+            # Von der Kontaktsuche gefunden (Jobs von vor der Kontaktsuche: geraten)
+            job['payload']['email'] = job['payload'].get('email') or guess_recipient(job['payload']['website'])
+        
+        # Domains ohne Mailserver vor OpenAI und SMTP aussortieren
+        undeliverable = self.undeliverable_domains([job['payload']['email'] for job in jobs])
+        rejected = [job for job in jobs if email_domain(job['payload']['email']) in undeliverable]
+        for job in rejected:
+            status = undeliverable[email_domain(job['payload']['email'])]
+            print(f"  ⊘ {job['payload']['name']}: {job['payload']['email']} nicht zustellbar ({status}) - überspringe")
+        LEADS.labels('undeliverable').inc(len(rejected))
+        self.progress.advance([(job['payload']['place_id'], 'rejected', 'undeliverable', None, None)
+                               for job in rejected])
+        self.jobs.complete([job['id'] for job in rejected])
+        
+        jobs = [job for job in jobs if email_domain(job['payload']['email']) not in undeliverable]
+        if not jobs:
+            return 0
+        leads = [job['payload'] for job in jobs]
+        
+        generated = []
+        for job, lead, email_content in zip(jobs, leads, self.generate_emails(leads)):
+            if not email_content:
+                LEADS.labels('generation_failed').inc()
+                self.jobs.fail(job['id'], 'E-Mail-Generierung fehlgeschlagen', lead.get('place_id'))
+                continue
             lead['email_subject'] = email_content['subject']
             lead['email_body'] = email_content['body']
+            generated.append((job, lead))
+        
+        # Kapazität prüfen, speichern und einreihen unter der Slot-Sperre: parallele Worker
+        # können das Tages-Limit nicht gemeinsam überschreiten
+        with self.delivery_queue.slot_lock():
+            # Noch nicht versendete E-Mails zählen gegen das Limit, damit die Warteschlange nicht wächst
+            capacity = max(0, CONFIG['max_emails_per_day'] - self.delivery_queue.pending())
+            accepted, deferred = generated[:capacity], generated[capacity:]
             
-            # Speichere in DB
-            self.save_lead(lead)
+            # Speichern und Einreihen in einer Transaktion: ein Abbruch dazwischen hinterlässt
+            # keinen Lead ohne Warteschlangen-Eintrag (beim erneuten Lauf wäre er "Duplikat")
+            queue_items = []
+            progress = []
+            saved = self.save_leads([lead for _, lead in accepted], commit=False)
+            for (job, lead), lead_id in zip(accepted, saved):
+                if lead_id is None:
+                    print(f"  ⊘ {lead['name']}: bereits in Datenbank - überspringe")
+                    LEADS.labels('duplicate').inc()
+                    progress.append((lead['place_id'], 'done', 'duplicate', None, None))
+                    continue
+                progress.append((lead['place_id'], 'done', 'lead', lead_id, None))
+                
+                email = lead['email']
+                queue_items.append({
+                    'lead_id': lead_id,
+                    'recipient': email,
+                    'subject': lead['email_subject'],
+                    'body': lead['email_body']
+                })
+                print(f"  ✉ In Warteschlange: {email}")
             
-            # Erstelle E-Mail-Adresse (Fallback)
-            email = f"info@{lead['website'].replace('https://', '').replace('http://', '').split('/')[0]}"
+            # In Versand-Warteschlange einreihen (Versand: --deliver) und gemeinsam committen
+            with STAGE_LATENCY.labels('enqueue').time():
+                self.delivery_queue.enqueue_many(queue_items, commit=False)
+            self.db_conn.commit()
+        self.progress.advance(progress)
+        LEADS.labels('queued').inc(len(queue_items))
+        LEADS.labels('deferred').inc(len(deferred))
+        
+        self.jobs.complete([job['id'] for job, _ in accepted])
+        # Über dem Limit: zurück in die Warteschlange (Generierung liegt im Completion-Cache)
+        self.jobs.release([job['id'] for job, _ in deferred])
+        return len(queue_items)
+
+    def _run_followup_jobs(self, jobs: List[Dict]) -> int:
+        """Generiert Follow-ups und reiht sie ein (liefert Anzahl eingereihter E-Mails)"""
+        cursor = self.db_conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute("SELECT * FROM leads_email_campaign WHERE id = ANY(%s)",
+                       ([job['payload']['lead_id'] for job in jobs],))
+        leads_by_id = {lead['id']: lead for lead in cursor.fetchall()}
+        self.db_conn.commit()
+        cursor.close()
+        
+        pairs = [(job, leads_by_id[job['payload']['lead_id']]) for job in jobs
+                 if job['payload']['lead_id'] in leads_by_id]
+        # Lead inzwischen gelöscht - nichts zu tun
+        missing = [job['id'] for job in jobs if job['payload']['lead_id'] not in leads_by_id]
+        
+        # Leads ohne gespeicherte Adresse (vor der Kontaktsuche angelegt): alle Websites parallel durchsuchen
+        crawls = {lead['id']: self.crawler.submit(lead['website']) for _, lead in pairs
+                  if not lead.get('email') and lead.get('website')}
+        for _, lead in pairs:
+            if lead.get('email'):
+                continue
+            try:
+                found = crawls[lead['id']].result(timeout=CONFIG['crawl_site_timeout'] * 2)
+            except Exception:
+                found = []
+            # Nichts gefunden: dieselbe Adresse wie bei der Erst-E-Mail
+            lead['email'] = found[0] if found else guess_recipient(lead['website'])
+        
+        # Domain nimmt inzwischen keine E-Mails mehr an: Follow-up gar nicht erst generieren
+        undeliverable = self.undeliverable_domains([lead['email'] for _, lead in pairs])
+        for _, lead in pairs:
+            if email_domain(lead['email']) in undeliverable:
+                print(f"  ⊘ {lead['company_name']}: {lead['email']} nicht zustellbar - kein Follow-up")
+        skipped = [job['id'] for job, lead in pairs if email_domain(lead['email']) in undeliverable]
+        LEADS.labels('undeliverable').inc(len(skipped))
+        pairs = [(job, lead) for job, lead in pairs if email_domain(lead['email']) not in undeliverable]
+        
+        # Follow-ups parallel generieren und gesammelt in die Versand-Warteschlange einreihen
+        queue_items = []
+        done = []
+        contents = self.generate_emails([lead for _, lead in pairs], followup=True)
+        for (job, lead), email_content in zip(pairs, contents):
+            if not email_content:
+                LEADS.labels('generation_failed').inc()
+                self.jobs.fail(job['id'], 'Follow-up-Generierung fehlgeschlagen')
+                continue
             
-            # Versende E-Mail
-            if self.send_email(email, email_content['subject'], email_content['body']):
-                self.update_email_status(lead['name'], 'sent')
-                emails_sent += 1
+            queue_items.append({
+                'lead_id': lead['id'],
+                'recipient': lead['email'],
+                'subject': email_content['subject'],
+                'body': email_content['body'],
+                'kind': 'followup'
+            })
+            done.append(job['id'])
+        
+        with STAGE_LATENCY.labels('enqueue').time():
+            self.delivery_queue.enqueue_many(queue_items)
+        LEADS.labels('followup_queued').inc(len(queue_items))
+        self.jobs.complete(done + missing + skipped)
+        return len(queue_items)
+
+    def work(self, kinds=JOB_KINDS, concurrency: int = None, batch_size: int = None) -> Dict[str, int]:
+        """Arbeitet Jobs ab, bis für die gewählten Arten nichts mehr zu tun ist
+
+        Mehrere Prozesse (auch auf verschiedenen Rechnern) können gleichzeitig
+        arbeiten: Jobs werden per SKIP LOCKED übernommen und per Heartbeat gehalten.
+        """
+        concurrency = concurrency or self.concurrency
+        batch_size = batch_size or CONFIG['worker_batch_size']
+        processed = {'enrich': 0, 'contact': 0, 'generate': 0, 'followup': 0, 'queued': 0}
+        
+        requeued = self.jobs.requeue_expired()
+        if requeued:
+            print(f"⚠️ {requeued} Jobs mit abgelaufener Lease wieder freigegeben")
+        
+        heartbeat = Heartbeat(self.db_config(), self.jobs.worker_id, CONFIG['job_lease_seconds']).start()
+        crawls = {}  # Job-id -> (Future, Job): Kontaktsuchen laufen im Hintergrund über mehrere Durchläufe
+        executor = None
+        if 'enrich' in kinds and concurrency > 1:
+            print(f"⚡ Anreicherung mit {concurrency} parallelen Workern")
+            executor = ThreadPoolExecutor(max_workers=concurrency)
+        
+        try:
+            # stop_event (SIGTERM im Daemon): laufender Batch wird fertig, dann Schluss
+            while not self.stop_event.is_set():
+                progress = 0
+                capacity = CONFIG['max_emails_per_day'] - self.delivery_queue.pending()
                 
-                # Rate Limiting
-                if emails_sent < max_emails:
-                    print(f"  ⏳ Warte {CONFIG['delay_between_emails']}s...")
-                    time.sleep(CONFIG['delay_between_emails'])
-            
-        print(f"\n✅ Kampagne abgeschlossen: {emails_sent} E-Mails versendet")
+                if 'generate' in kinds and capacity > 0:
+                    jobs = self.jobs.claim('generate', min(batch_size, capacity))
+                    if jobs:
+                        processed['queued'] += self._run_generate_jobs(jobs)
+                        processed['generate'] += len(jobs)
+                        progress += len(jobs)
+                
+                # Ist das Limit erreicht, nicht weiter anreichern (spart Places-Aufrufe) -
+                # reine Anreicherungs-Worker arbeiten dagegen vor
+                if 'enrich' in kinds and (capacity > 0 or 'generate' not in kinds):
+                    jobs = self.jobs.claim('enrich', max(batch_size, concurrency))
+                    if jobs:
+                        self._run_enrich_jobs(jobs, executor)
+                        processed['enrich'] += len(jobs)
+                        progress += len(jobs)
+                
+                if 'contact' in kinds:
+                    collected = self._collect_contact_jobs(crawls)
+                    processed['contact'] += collected
+                    progress += collected
+                    # Crawler-Pool gefüllt halten, ohne auf einzelne Websites zu warten
+                    free = 2 * CONFIG['crawl_concurrency'] - len(crawls)
+                    if free > 0 and (capacity > 0 or 'generate' not in kinds):
+                        for job in self.jobs.claim('contact', free):
+                            crawls[job['id']] = (self.crawler.submit(job['payload']['website']), job)
+                            progress += 1
+                
+                if 'followup' in kinds:
+                    jobs = self.jobs.claim('followup', batch_size)
+                    if jobs:
+                        processed['queued'] += self._run_followup_jobs(jobs)
+                        processed['followup'] += len(jobs)
+                        progress += len(jobs)
+                
+                if not progress:
+                    if crawls:
+                        # Nur noch Kontaktsuchen offen: auf die nächste fertige warten
+                        wait([future for future, _ in crawls.values()], timeout=5, return_when=FIRST_COMPLETED)
+                        continue
+                    if 'generate' in kinds and capacity <= 0:
+                        print(f"\n⚠️ Tages-Limit erreicht ({CONFIG['max_emails_per_day']} E-Mails)")
+                    break
+        finally:
+            heartbeat.stop()
+            if crawls:
+                # Abbruch: offene Kontakt-Jobs freigeben (Ergebnisse landen trotzdem im Cache)
+                self.jobs.release(list(crawls))
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+        
+        self.update_queue_metrics()
+        return processed
 
-    def send_followups(self):
-        """Sendet Follow-up E-Mails"""
-        print("\n📬 Prüfe Follow-ups...\n")
+    def print_run_summary(self):
+        """Cache-, OpenAI- und Latenz-Kennzahlen des Laufs"""
+        print(f"   Jobs: {self.jobs.summary()}")
+        print(f"   Details-Cache: {self.details_cache.summary()}")
+        print(f"   Website-Cache: {self.website_cache.summary()}")
+        print(f"   Kontaktsuche: {self.crawler.summary()} - Cache: {self.contact_cache.summary()}")
+        if 'mail_domains' in self.__dict__:
+            print(f"   DNS-Prüfung: {self.mail_domains.summary()} - Cache: {self.domain_cache.summary()}")
+        print(f"   OpenAI: {self.generation.summary()}")
+        for host, latency in self.http.summary().items():
+            print(f"   {host}: {latency}")
+
+    def run_campaign(self, concurrency: int = None):
+        """Führt komplette Kampagne aus (Einplanen + Abarbeiten in diesem Prozess)"""
+        print("\n🚀 Lead Generation Campaign gestartet\n")
+        self.plan_campaign()
+        processed = self.work(('enrich', 'contact', 'generate'), concurrency=concurrency)
         
+        print(f"\n✅ Kampagne abgeschlossen: {processed['queued']} E-Mails in Warteschlange")
+        self.print_run_summary()
+
+    def run_worker(self, kinds=JOB_KINDS, concurrency: int = None):
+        """Worker-Prozess: arbeitet eingeplante Jobs ab (parallel zu weiteren Workern)"""
+        print(f"\n👷 Worker {self.jobs.worker_id} gestartet ({', '.join(kinds)})\n")
+        processed = self.work(kinds, concurrency=concurrency)
+        
+        print(f"\n✅ Worker fertig: {processed['enrich']} angereichert, {processed['contact']} Kontaktsuchen, "
+              f"{processed['generate']} generiert, "
+              f"{processed['followup']} Follow-ups, {processed['queued']} E-Mails in Warteschlange")
+        self.print_run_summary()
+
+    def plan_followups(self) -> int:
+        """Plant fällige Follow-ups als Jobs ein"""
         cursor = self.db_conn.cursor(cursor_factory=RealDictCursor)
         query = """
-        SELECT * FROM leads_email_campaign 
+        SELECT id, followup_count, score FROM leads_email_campaign l
         WHERE status = 'sent' 
         AND sent_at < NOW() - INTERVAL '3 days'
         AND followup_count < 2
         AND response_received = FALSE
+        -- Dubletten (--find-duplicates) bekommen keine Follow-ups, nur das Original
+        AND NOT EXISTS (SELECT 1 FROM lead_duplicates d WHERE d.lead_id = l.id)
+        AND NOT EXISTS (
+            SELECT 1 FROM email_queue q
+            WHERE q.lead_id = l.id AND q.status IN ('queued', 'sending')
+        )
         LIMIT 10
         """
         
         cursor.execute(query)
         leads = cursor.fetchall()
+        self.db_conn.commit()
+        cursor.close()
         
-        print(f"✓ {len(leads)} Follow-ups zu versenden\n")
-        
-        for lead in leads:
-            # Generiere Follow-up
-            prompt = f"""Erstelle eine kurze Follow-up E-Mail für {lead['company_name']}.
-Erste E-Mail hatte Betreff: {lead['email_subject']}
+        # Schlüssel inkl. followup_count: jede Follow-up-Stufe wird genau einmal eingeplant
+        return self.jobs.enqueue_many('followup', [
+            (f"{lead['id']}:{lead['followup_count']}", {'lead_id': lead['id']}, lead['score'] or 0)
+            for lead in leads
+        ])
 
-Follow-up soll:
-- Kurz sein (max 80 Wörter)
-- Konkreten Mehrwert bieten (z.B. kostenloser KI-Potenzial-Check)
-- Nicht aufdringlich wirken
-Format: BETREFF: ... | BODY: ..."""
+    def send_followups(self):
+        """Sendet Follow-up E-Mails"""
+        print("\n📬 Prüfe Follow-ups...\n")
+        
+        planned = self.plan_followups()
+        print(f"✓ {planned} Follow-ups zu versenden\n")
+        
+        processed = self.work(('followup',))
+        print(f"✓ {processed['queued']} Follow-ups in Warteschlange")
 
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7
-            )
-            
-            content = response.choices[0].message.content
-            parts = content.split('|')
-            subject = parts[0].replace('BETREFF:', '').strip()
-            body = parts[1].replace('BODY:', '').strip() if len(parts) > 1 else content
-            
-            # Versende Follow-up
-            email = f"info@{lead['website'].replace('https://', '').replace('http://', '').split('/')[0]}"
-            
-            if self.send_email(email, subject, body):
-                # Update Datenbank
-                cursor = self.db_conn.cursor()
-                query = """
-                UPDATE leads_email_campaign 
-                SET followup_count = followup_count + 1, last_followup = %s 
-                WHERE company_name = %s
-                """
-                cursor.execute(query, (datetime.now(), lead['company_name']))
-                self.db_conn.commit()
-                cursor.close()
-                
-                time.sleep(CONFIG['delay_between_emails'])
+    def deliver(self, wait: bool = True):
+        """Versendet fällige E-Mails aus der Warteschlange"""
+        print("\n📤 Versand gestartet\n")
+        scheduler = DeliveryScheduler(
+            self.delivery_queue,
+            self.send_email,
+            max_per_day=CONFIG['max_emails_per_day'],
+            delay_between_emails=CONFIG['delay_between_emails'],
+            stop_event=self.stop_event
+        )
+        sent = scheduler.run(wait=wait)
+        self.update_queue_metrics()
+        print(f"\n✅ Versand abgeschlossen: {sent} E-Mails versendet, "
+              f"{self.delivery_queue.pending()} in Warteschlange")
+        print(f"   SMTP: {self.smtp.summary()}")
 
     def show_stats(self):
         """Zeigt Kampagnen-Statistiken"""
@@ -419,6 +1210,73 @@ Format: BETREFF: ... | BODY: ..."""
         print(f"   Letzte E-Mail: {stats['last_email_sent']}\n")
         
         cursor.close()
+    
+    def rebuild_stats(self):
+        """Baut campaign_totals und campaign_daily aus leads_email_campaign neu auf"""
+        print("\n🔄 Baue Statistiken neu auf...")
+        start = time.perf_counter()
+        cursor = self.db_conn.cursor()
+        cursor.execute("SELECT campaign_stats_rebuild()")
+        self.db_conn.commit()
+        cursor.execute("SELECT COUNT(*) FROM campaign_daily")
+        days = cursor.fetchone()[0]
+        cursor.close()
+        print(f"✓ Statistiken neu aufgebaut ({days} Tage) in {time.perf_counter() - start:.1f}s")
+    
+    def find_duplicates(self, show: int = 20):
+        """Sucht Dubletten-Cluster über alle Leads und speichert sie in lead_duplicates"""
+        print("\n🔍 Suche Dubletten in allen Leads...")
+        start = time.perf_counter()
+        finder = LeadDuplicates(self.db_conn, CONFIG['dedupe_name_threshold'])
+        clusters, total, comparisons = finder.scan()
+        stored = finder.store(clusters)
+        print(f"✓ {stored} Dubletten in {len(clusters)} Gruppen ({total} Leads, {comparisons} Vergleiche) "
+              f"in {time.perf_counter() - start:.1f}s")
+        
+        for cluster in sorted(clusters, key=len, reverse=True)[:show]:
+            original = cluster[0][0]
+            print(f"\n   #{original.key} {original.label}")
+            for candidate, reason in cluster[1:]:
+                print(f"     ↳ #{candidate.key} {candidate.label} ({reason})")
+        if len(clusters) > show:
+            print(f"\n   ... und {len(clusters) - show} weitere Gruppen")
+    
+    def run_daemon(self):
+        """Langlebiger Prozess: führt Kampagne, Follow-ups, Versand und Statistik nach Zeitplan aus
+
+        Pools und Caches bleiben zwischen den Jobs warm. SIGTERM/SIGINT beenden nach
+        dem laufenden Batch; verpasste Läufe werden innerhalb ihres Nachholfensters nachgeholt.
+        """
+        schedules = CONFIG['daemon_schedules']
+        jobs = [
+            ScheduledJob('campaign', schedules['campaign'], self.run_campaign, catch_up=timedelta(hours=6)),
+            ScheduledJob('followup', schedules['followup'], self.send_followups, catch_up=timedelta(hours=12)),
+            # Läuft ohnehin häufig - verpasste Termine nicht nachholen
+            ScheduledJob('deliver', schedules['deliver'], lambda: self.deliver(wait=False)),
+            ScheduledJob('stats', schedules['stats'], self.show_stats),
+            ScheduledJob('rebuild_stats', schedules['rebuild_stats'], self.rebuild_stats,
+                         catch_up=timedelta(days=1)),
+            ScheduledJob('find_duplicates', schedules['find_duplicates'], lambda: self.find_duplicates(show=0),
+                         catch_up=timedelta(days=1)),
+        ]
+        scheduler = Scheduler(
+            jobs,
+            CONFIG['daemon_state_path'],
+            stop_event=self.stop_event,
+            before_job=lambda job: self.ensure_db(),
+            after_job=lambda job: self.write_metrics()
+        )
+        
+        def shutdown(signum, frame):
+            print(f"\n🛑 {signal.Signals(signum).name} empfangen - beende nach laufendem Schritt")
+            scheduler.stop()
+        
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+        
+        print(f"\n🤖 Daemon gestartet (PID {os.getpid()})")
+        scheduler.run()
+        print("👋 Daemon beendet")
 
 
 def main():
@@ -427,24 +1285,68 @@ def main():
     
     parser = argparse.ArgumentParser(description='Lead Generation & Email Campaign')
     parser.add_argument('--campaign', action='store_true', help='Start neue Kampagne')
+    parser.add_argument('--plan', action='store_true', help='Nur suchen & Leads für Worker einplanen')
+    parser.add_argument('--worker', action='store_true', help='Eingeplante Jobs abarbeiten (mehrere Prozesse möglich)')
+    parser.add_argument('--kinds', default=','.join(JOB_KINDS),
+                        help='Mit --worker: Job-Arten, z.B. enrich oder generate,followup')
     parser.add_argument('--followup', action='store_true', help='Sende Follow-ups')
+    parser.add_argument('--daemon', action='store_true', help='Dauerbetrieb mit internem Zeitplan statt Cronjobs')
     parser.add_argument('--stats', action='store_true', help='Zeige Statistiken')
+    parser.add_argument('--deliver', action='store_true', help='Versende E-Mails aus der Warteschlange')
+    parser.add_argument('--no-wait', action='store_true', help='Mit --deliver: nur bereits fällige E-Mails senden')
+    parser.add_argument('--rescore', action='store_true', help='Bewerte gespeicherte Leads mit aktuellen Regeln neu')
+    parser.add_argument('--rebuild-stats', action='store_true', help='Baue laufende Statistiken komplett neu auf')
+    parser.add_argument('--find-duplicates', action='store_true', help='Suche Dubletten-Cluster in allen Leads')
+    parser.add_argument('--concurrency', type=int, default=CONFIG['enrichment_concurrency'],
+                        help='Parallele Worker für Details & Website-Analyse (1 = seriell)')
     
     args = parser.parse_args()
     
-    generator = LeadGenerator()
+    kinds = tuple(kind.strip() for kind in args.kinds.split(',') if kind.strip())
+    unknown = set(kinds) - set(JOB_KINDS)
+    if unknown:
+        parser.error(f"Unbekannte Job-Arten: {', '.join(sorted(unknown))}")
+    
+    generator = LeadGenerator(concurrency=args.concurrency)
+    if CONFIG['metrics_port']:
+        REGISTRY.serve(CONFIG['metrics_port'])
+        print(f"📈 Metriken unter http://0.0.0.0:{CONFIG['metrics_port']}/metrics")
     
     if args.campaign:
-        generator.run_campaign()
+        generator.run_campaign(concurrency=args.concurrency)
+    elif args.plan:
+        generator.plan_campaign()
+    elif args.worker:
+        generator.run_worker(kinds, concurrency=args.concurrency)
+    elif args.daemon:
+        generator.run_daemon()
     elif args.followup:
         generator.send_followups()
+    elif args.deliver:
+        generator.deliver(wait=not args.no_wait)
     elif args.stats:
         generator.show_stats()
+    elif args.rescore:
+        generator.rescore_leads()
+    elif args.rebuild_stats:
+        generator.rebuild_stats()
+    elif args.find_duplicates:
+        generator.find_duplicates()
     else:
         print("Verwendung:")
         print("  python lead_generation.py --campaign   # Neue Kampagne")
+        print("  python lead_generation.py --plan       # Nur einplanen (für --worker)")
+        print("  python lead_generation.py --worker     # Eingeplante Jobs abarbeiten")
         print("  python lead_generation.py --followup   # Follow-ups")
+        print("  python lead_generation.py --daemon     # Dauerbetrieb nach Zeitplan")
+        print("  python lead_generation.py --deliver    # Warteschlange versenden")
         print("  python lead_generation.py --stats      # Statistiken")
+        print("  python lead_generation.py --rescore    # Leads neu bewerten")
+        print("  python lead_generation.py --rebuild-stats  # Statistiken neu aufbauen")
+        print("  python lead_generation.py --find-duplicates  # Dubletten suchen")
+    
+    generator.write_metrics()
+    generator.close()
 
 
 if __name__ == '__main__':
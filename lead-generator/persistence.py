@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Gebündelte Lead-Persistenz
+Multi-Row-INSERT ... ON CONFLICT und ein Commit pro Batch statt pro Zeile
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from psycopg2.extras import execute_values
+
+from dedupe import place_geohash
+
+LEAD_COLUMNS = (
+    'company_name', 'address', 'phone', 'website', 'score', 'rating', 'user_ratings_total', 'email',
+    'email_subject', 'email_body', 'status', 'created_at', 'place_id', 'geohash'
+)
+
+
+def lead_address(lead: Dict) -> Optional[str]:
+    """Adresse eines Leads (Text-Search liefert formatted_address)"""
+    return lead.get('address') or lead.get('formatted_address')
+
+
+def lead_row(lead: Dict, created_at: datetime) -> tuple:
+    """Wandelt einen Lead in eine Zeile für leads_email_campaign"""
+    return (
+        lead['name'],
+        lead_address(lead),
+        lead.get('phone') or lead.get('formatted_phone_number'),
+        lead.get('website'),
+        lead.get('score'),
+        lead.get('rating'),
+        lead.get('user_ratings_total') or 0,  # Places lässt das Feld ohne Bewertungen weg; NULL = Altbestand
+        lead.get('email'),
+        lead.get('email_subject'),
+        lead.get('email_body'),
+        'pending',
+        created_at,
+        lead.get('place_id'),
+        place_geohash(lead)
+    )
+
+
+class LeadWriter:
+    """Schreibt Leads gebündelt und aktualisiert Status per Primärschlüssel"""
+
+    def __init__(self, db_conn, batch_size: int = 500):
+        self.db_conn = db_conn
+        self.batch_size = batch_size
+
+    def save_many(self, leads: List[Dict], commit: bool = True) -> List[Optional[int]]:
+        """Speichert Leads in einer Transaktion; liefert je Lead die id (None = bereits vorhanden)
+
+        commit=False lässt die Transaktion offen, damit der Aufrufer weitere Schritte
+        (z.B. das Einreihen in die Versand-Warteschlange) atomar anschließen kann.
+        """
+        if not leads:
+            return []
+
+        query = f"""
+        INSERT INTO leads_email_campaign ({', '.join(LEAD_COLUMNS)})
+        VALUES %s
+        ON CONFLICT DO NOTHING
+        RETURNING id, company_name, address
+        """
+        now = datetime.now()
+        ids = []
+        cursor = self.db_conn.cursor()
+        try:
+            for start in range(0, len(leads), self.batch_size):
+                chunk = leads[start:start + self.batch_size]
+                rows = execute_values(
+                    cursor, query, [lead_row(lead, now) for lead in chunk],
+                    page_size=len(chunk), fetch=True
+                )
+                # Konflikt auf (company_name, address) oder place_id = bereits vorhanden.
+                # RETURNING garantiert keine Reihenfolge - Zuordnung über den Unique-Key
+                inserted = {(name, address): lead_id for lead_id, name, address in rows}
+                # pop: Duplikate innerhalb eines Batches erhalten nur einmal die id
+                ids.extend(inserted.pop((lead['name'], lead_address(lead)), None) for lead in chunk)
+            if commit:
+                self.db_conn.commit()
+        except Exception:
+            self.db_conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        return ids
+
+    def update_status(self, lead_ids: List[int], status: str, sent_at: datetime = None):
+        """Setzt Status (und sent_at) für mehrere Leads per id"""
+        if not lead_ids:
+            return
+        cursor = self.db_conn.cursor()
+        cursor.execute("""
+            UPDATE leads_email_campaign
+            SET status = %s, sent_at = COALESCE(%s, sent_at)
+            WHERE id = ANY(%s)
+        """, (status, sent_at, list(lead_ids)))
+        self.db_conn.commit()
+        cursor.close()
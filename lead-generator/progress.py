@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Bearbeitungsstand je Place und Checkpoints der Suchläufe
+Bereits bearbeitete Places werden vor Details, Website-Analyse und
+OpenAI herausgefiltert; abgebrochene Suchläufe setzen an der letzten Kachel fort
+"""
+
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from psycopg2.extras import Json, RealDictCursor, execute_values
+
+from dedupe import place_geohash
+
+# Ein Statement: Vorfilter (Indexzugriff auf campaign_places und den Unique-Key der Leads)
+# und Upsert der neuen bzw. geänderten Places. execute_values kennt nur den VALUES-Platzhalter -
+# recheck_days und run_id (int) werden per format eingesetzt
+RECORD_QUERY = """
+WITH batch (place_id, company_name, address, score, fingerprint, payload, geohash) AS (
+    VALUES %s
+), fresh AS (
+    SELECT b.* FROM batch b
+    LEFT JOIN campaign_places c ON c.place_id = b.place_id
+    WHERE (
+        c.place_id IS NULL
+        -- Leads aus der Zeit vor campaign_places; die ersten Versionen speicherten keine Adresse
+        -- (address IS NULL) - dann genügt der Name (Index über UNIQUE(company_name, address))
+        AND NOT EXISTS (
+            SELECT 1 FROM leads_email_campaign l
+            WHERE l.company_name = b.company_name AND (l.address IS NULL OR l.address = b.address)
+        )
+    ) OR (
+        c.stage = 'rejected'
+        AND (c.fingerprint <> b.fingerprint OR c.updated_at < NOW() - make_interval(days => {recheck_days}))
+    )
+)
+INSERT INTO campaign_places (place_id, fingerprint, score, payload, geohash, run_id)
+SELECT place_id, fingerprint, score, payload, geohash, {run_id} FROM fresh
+ON CONFLICT (place_id) DO UPDATE SET
+    fingerprint = EXCLUDED.fingerprint,
+    score = EXCLUDED.score,
+    payload = EXCLUDED.payload,
+    geohash = EXCLUDED.geohash,
+    stage = 'discovered',
+    outcome = NULL,
+    duplicate_of = NULL,
+    revision = campaign_places.revision + 1,
+    run_id = EXCLUDED.run_id,
+    updated_at = NOW()
+RETURNING place_id
+"""
+
+
+def place_fingerprint(place: Dict) -> str:
+    """Ändert sich, wenn sich die Grundlage der Bewertung ändert (Name, Adresse, Score)"""
+    key = f"{place.get('name')}|{place.get('formatted_address')}|{place.get('score')}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def tiles_key(location: str, radius: int, tile_radius: int) -> str:
+    """Kennung des Kachelrasters - ein Checkpoint gilt nur für dasselbe Raster"""
+    return hashlib.sha1(f"{location}|{radius}|{tile_radius}".encode('utf-8')).hexdigest()
+
+
+class PlaceProgress:
+    """Zugriff auf campaign_places und campaign_runs"""
+
+    def __init__(self, db_conn, recheck_days: int = 90, resume_hours: int = 24):
+        self.db_conn = db_conn
+        self.recheck_days = recheck_days
+        self.resume_hours = resume_hours
+
+    def try_lock(self) -> bool:
+        """Nur ein Suchlauf gleichzeitig (Session-Sperre, frei bei Verbindungsende)"""
+        cursor = self.db_conn.cursor()
+        cursor.execute("SELECT pg_try_advisory_lock(hashtext('campaign_discovery'))")
+        locked = cursor.fetchone()[0]
+        self.db_conn.commit()
+        cursor.close()
+        return locked
+
+    def unlock(self):
+        cursor = self.db_conn.cursor()
+        cursor.execute("SELECT pg_advisory_unlock(hashtext('campaign_discovery'))")
+        self.db_conn.commit()
+        cursor.close()
+
+    def start_run(self, key: str) -> Tuple[int, int]:
+        """Setzt einen abgebrochenen Lauf mit gleichem Raster fort oder beginnt einen neuen: (run_id, tiles_done)"""
+        cursor = self.db_conn.cursor()
+        cursor.execute("""
+            SELECT id, tiles_done FROM campaign_runs
+            WHERE discovery_finished_at IS NULL AND tiles_key = %s
+            AND started_at > NOW() - make_interval(hours => %s)
+            ORDER BY id DESC
+            LIMIT 1
+        """, (key, self.resume_hours))
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute("INSERT INTO campaign_runs (tiles_key) VALUES (%s) RETURNING id, tiles_done", (key,))
+            row = cursor.fetchone()
+        self.db_conn.commit()
+        cursor.close()
+        return row
+
+    def record_tile(self, run_id: int, tiles_done: int, places: List[Dict]) -> List[str]:
+        """Speichert die qualifizierten Places einer Kachel und den Checkpoint in einer Transaktion
+
+        Liefert die place_ids, die neu sind oder sich seit einer Ablehnung geändert haben.
+        """
+        unique = {place['place_id']: place for place in places}
+        cursor = self.db_conn.cursor()
+        fresh = []
+        if unique:
+            query = RECORD_QUERY.format(recheck_days=int(self.recheck_days), run_id=int(run_id))
+            rows = execute_values(cursor, query, [
+                (place_id, place['name'], place.get('formatted_address'), place['score'],
+                 place_fingerprint(place), Json(place), place_geohash(place))
+                for place_id, place in unique.items()
+            ], template='(%s, %s, %s, %s::int, %s, %s::jsonb, %s)', page_size=len(unique), fetch=True)
+            fresh = [row[0] for row in rows]
+        cursor.execute("UPDATE campaign_runs SET tiles_done = %s WHERE id = %s", (tiles_done, run_id))
+        self.db_conn.commit()
+        cursor.close()
+        return fresh
+
+    def finish_run(self, run_id: int):
+        cursor = self.db_conn.cursor()
+        cursor.execute("UPDATE campaign_runs SET discovery_finished_at = NOW() WHERE id = %s", (run_id,))
+        self.db_conn.commit()
+        cursor.close()
+
+    def take_discovered(self, limit: int) -> List[Dict]:
+        """Markiert die besten noch nicht eingeplanten Places als 'planned' - ohne Commit
+
+        Der Aufrufer reiht sie in derselben Transaktion als Jobs ein (JobQueue.enqueue_many
+        committet), damit kein Place ohne Job im Zustand 'planned' zurückbleibt.
+        """
+        cursor = self.db_conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute("""
+            UPDATE campaign_places SET stage = 'planned', updated_at = NOW()
+            WHERE place_id IN (
+                SELECT place_id FROM campaign_places
+                WHERE stage = 'discovered'
+                ORDER BY score DESC
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING place_id, payload, score, revision
+        """, (limit,))
+        places = sorted(cursor.fetchall(), key=lambda place: -place['score'])
+        cursor.close()
+        return places
+
+    def places_near(self, cells: List[str], exclude: List[str]) -> List[Dict]:
+        """Bereits eingeplante oder bearbeitete Places in den angegebenen Geohash-Zellen"""
+        if not cells:
+            return []
+        cursor = self.db_conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute("""
+            SELECT place_id, payload FROM campaign_places
+            WHERE geohash = ANY(%s) AND stage IN ('planned', 'enriched', 'done')
+            AND NOT place_id = ANY(%s)
+        """, (cells, exclude))
+        places = cursor.fetchall()
+        cursor.close()
+        return places
+
+    def mark_duplicates(self, duplicates: Dict[str, Tuple[str, str]]):
+        """Lehnt Dubletten ab (place_id -> (Original, Grund)) - ohne Commit, wie take_discovered"""
+        if not duplicates:
+            return
+        cursor = self.db_conn.cursor()
+        execute_values(cursor, """
+            UPDATE campaign_places c
+            SET stage = 'rejected', outcome = 'duplicate_' || v.reason, duplicate_of = v.original, updated_at = NOW()
+            FROM (VALUES %s) AS v (place_id, original, reason)
+            WHERE c.place_id = v.place_id
+        """, [(place_id, original, reason) for place_id, (original, reason) in duplicates.items()],
+            page_size=len(duplicates))
+        cursor.close()
+
+    def known_domains(self, domains: List[str], exclude: List[str]) -> Dict[str, str]:
+        """Domains, die schon zu einem Lead oder einem anderen angereicherten Place gehören
+
+        Liefert Domain -> Lead-id bzw. place_id. exclude: die eigenen place_ids (erneute Prüfung).
+        """
+        if not domains:
+            return {}
+        cursor = self.db_conn.cursor()
+        # Beide Zweige per Index: idx_leads_domain bzw. idx_campaign_places_domain
+        cursor.execute("""
+            SELECT lead_domain(website), MIN(id)::text FROM leads_email_campaign
+            WHERE lead_domain(website) = ANY(%s) AND (place_id IS NULL OR NOT place_id = ANY(%s))
+            GROUP BY 1
+            UNION ALL
+            SELECT domain, MIN(place_id) FROM campaign_places
+            WHERE domain = ANY(%s) AND stage IN ('enriched', 'done') AND NOT place_id = ANY(%s)
+            GROUP BY 1
+        """, (domains, exclude, domains, exclude))
+        known = {}
+        for domain, owner in cursor.fetchall():
+            known.setdefault(domain, owner)
+        self.db_conn.commit()
+        cursor.close()
+        return known
+
+    def advance(self, updates: List[Tuple[str, str, Optional[str], Optional[int], Optional[str]]]):
+        """Setzt den Stand mehrerer Places: (place_id, stage, outcome, lead_id, domain)"""
+        if not updates:
+            return
+        cursor = self.db_conn.cursor()
+        execute_values(cursor, """
+            UPDATE campaign_places c
+            SET stage = v.stage, outcome = v.outcome, lead_id = COALESCE(v.lead_id, c.lead_id),
+                domain = COALESCE(v.domain, c.domain), updated_at = NOW()
+            FROM (VALUES %s) AS v (place_id, stage, outcome, lead_id, domain)
+            WHERE c.place_id = v.place_id
+        """, updates, template='(%s, %s, %s, %s::int, %s)', page_size=len(updates))
+        self.db_conn.commit()
+        cursor.close()
+
+    def counts(self) -> Dict[str, int]:
+        """Anzahl Places je Stand"""
+        cursor = self.db_conn.cursor()
+        cursor.execute("SELECT stage, COUNT(*) FROM campaign_places GROUP BY stage")
+        result = dict(cursor.fetchall())
+        self.db_conn.commit()
+        cursor.close()
+        return result
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+In-Process-Cache für Dashboard-Endpoints
+TTL pro Eintrag, Invalidierung über Tags, ETag pro Ergebnis, begrenzte Anzahl Einträge
+"""
+
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterable, Tuple
+
+
+class ResultCache:
+    """Speichert serialisierte Antworten mit ETag bis zum Ablauf oder zur Invalidierung"""
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, Tuple[float, str, str, frozenset]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, tags: Iterable[str], compute: Callable[[], str]) -> Tuple[str, str]:
+        """Liefert (body, etag) aus dem Cache oder berechnet und speichert neu"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+
+        body = compute()
+        etag = hashlib.sha1(body.encode('utf-8')).hexdigest()
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                self._prune(now)
+            self._entries[key] = (now + self.ttl, body, etag, frozenset(tags))
+        return body, etag
+
+    def _prune(self, now: float):
+        """Entfernt abgelaufene Einträge, dann die ältesten bis unter max_entries (Lock muss gehalten werden)"""
+        for key in [key for key, entry in self._entries.items() if entry[0] <= now]:
+            del self._entries[key]
+        # dict behält die Einfügereihenfolge: vorne stehen die ältesten Einträge
+        while len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    def invalidate(self, *tags: str) -> int:
+        """Entfernt alle Einträge mit einem der Tags"""
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[3] & set(tags)]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        """Leert den Cache komplett"""
+        with self._lock:
+            self._entries.clear()
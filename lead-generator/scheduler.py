@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+In-Process-Scheduler für den Daemon-Modus
+Cron-Ausdrücke (Minute Stunde Tag Monat Wochentag), persistenter Zustand
+für verpasste Läufe, sauberes Beenden über ein Stop-Event
+"""
+
+import json
+import os
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+
+from metrics import REGISTRY
+
+JOB_RUNS = REGISTRY.counter('leadgen_scheduler_runs_total', 'Ausgeführte Daemon-Jobs', ['job', 'result'])
+JOB_DURATION = REGISTRY.histogram(
+    'leadgen_scheduler_job_duration_seconds', 'Laufzeit der Daemon-Jobs', ['job'],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600))
+JOB_LAST_SUCCESS = REGISTRY.gauge(
+    'leadgen_scheduler_last_success_timestamp_seconds', 'Zeitpunkt des letzten erfolgreichen Laufs', ['job'])
+
+
+def _parse_field(field: str, low: int, high: int) -> Set[int]:
+    """Ein Cron-Feld: *, 5, 1-5, */15, 8-18/2, 1,3,5"""
+    values = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Ungültige Schrittweite: {field}")
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(v) for v in part.split('-', 1))
+        else:
+            start = end = int(part)
+            if step > 1:
+                end = high
+        if start < low or end > high or start > end:
+            raise ValueError(f"Wert außerhalb {low}-{high}: {field}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Cron-Ausdruck mit fünf Feldern (Wochentag 0 oder 7 = Sonntag)"""
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron-Ausdruck braucht 5 Felder: '{expression}'")
+        self.expression = expression
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12)
+        self.weekdays = {d % 7 for d in _parse_field(fields[4], 0, 7)}
+        # Wie cron: sind Tag und Wochentag eingeschränkt, genügt einer von beiden
+        self._day_any = fields[2] == '*'
+        self._weekday_any = fields[4] == '*'
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.isoweekday() % 7) in self.weekdays
+        if self._day_any or self._weekday_any:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, dt: datetime) -> datetime:
+        """Nächster Zeitpunkt strikt nach dt (minutengenau)"""
+        candidate = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year = candidate.year + (candidate.month == 12)
+                candidate = candidate.replace(year=year, month=candidate.month % 12 + 1, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"Cron-Ausdruck trifft nie zu: '{self.expression}'")
+
+    def last_before(self, dt: datetime, since: datetime) -> Optional[datetime]:
+        """Letzter Zeitpunkt in (since, dt] oder None"""
+        last = None
+        candidate = self.next_after(since)
+        while candidate <= dt:
+            last = candidate
+            candidate = self.next_after(candidate)
+        return last
+
+
+class ScheduledJob:
+    """Ein Job mit Zeitplan; catch_up = wie lange ein verpasster Lauf nachgeholt wird"""
+
+    def __init__(self, name: str, schedule: str, func: Callable[[], None], catch_up: timedelta = timedelta(0)):
+        self.name = name
+        self.schedule = CronSchedule(schedule)
+        self.func = func
+        self.catch_up = catch_up
+        self.next_run: Optional[datetime] = None
+        self.runs = 0
+        self.failures = 0
+
+
+class Scheduler:
+    """Führt Jobs nacheinander im aktuellen Thread aus, bis stop_event gesetzt ist"""
+
+    def __init__(self, jobs: List[ScheduledJob], state_path: str, stop_event: threading.Event = None,
+                 before_job: Callable[[ScheduledJob], None] = None,
+                 after_job: Callable[[ScheduledJob], None] = None):
+        self.jobs = jobs
+        self.state_path = state_path
+        self.stop_event = stop_event or threading.Event()
+        self.before_job = before_job
+        self.after_job = after_job
+
+    def _load_state(self) -> Dict[str, datetime]:
+        try:
+            with open(self.state_path) as f:
+                return {name: datetime.fromisoformat(value) for name, value in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state: Dict[str, datetime]):
+        # Erst in Temp-Datei schreiben, dann atomar ersetzen
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({name: value.isoformat() for name, value in state.items()}, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _plan(self, now: datetime, state: Dict[str, datetime]):
+        """Nächste Läufe festlegen; innerhalb catch_up verpasste Läufe sofort nachholen"""
+        for job in self.jobs:
+            job.next_run = job.schedule.next_after(now)
+            last = state.get(job.name)
+            if last is None or not job.catch_up:
+                continue
+            missed = job.schedule.last_before(now, since=max(last, now - job.catch_up))
+            if missed:
+                print(f"⏰ {job.name}: Lauf von {missed:%d.%m. %H:%M} verpasst - wird nachgeholt")
+                job.next_run = missed
+
+    def _run_job(self, job: ScheduledJob):
+        print(f"\n⏱️ [{datetime.now():%Y-%m-%d %H:%M:%S}] {job.name} gestartet")
+        start = time.perf_counter()
+        try:
+            if self.before_job:
+                self.before_job(job)
+            job.func()
+            job.runs += 1
+            JOB_RUNS.labels(job.name, 'success').inc()
+            JOB_LAST_SUCCESS.labels(job.name).set(time.time())
+            print(f"⏱️ {job.name} fertig nach {time.perf_counter() - start:.1f}s")
+        except Exception:
+            # Ein fehlgeschlagener Job darf den Daemon nicht beenden
+            job.failures += 1
+            JOB_RUNS.labels(job.name, 'failure').inc()
+            print(f"✗ {job.name} fehlgeschlagen:\n{traceback.format_exc()}")
+        finally:
+            JOB_DURATION.labels(job.name).observe(time.perf_counter() - start)
+            if self.after_job:
+                try:
+                    self.after_job(job)
+                except Exception as e:
+                    print(f"⚠️ after_job fehlgeschlagen: {e}")
+
+    def run(self):
+        """Hauptschleife"""
+        state = self._load_state()
+        self._plan(datetime.now(), state)
+        for job in self.jobs:
+            print(f"   {job.name:<16} {job.schedule.expression:<18} nächster Lauf {job.next_run:%d.%m. %H:%M}")
+
+        while not self.stop_event.is_set():
+            now = datetime.now()
+            for job in sorted(self.jobs, key=lambda j: j.next_run):
+                if self.stop_event.is_set() or job.next_run > now:
+                    break
+                self._run_job(job)
+                state[job.name] = job.next_run
+                self._save_state(state)
+                # Während eines langen Laufs verpasste Termine werden zusammengefasst
+                job.next_run = job.schedule.next_after(max(now, datetime.now()))
+
+            next_run = min(job.next_run for job in self.jobs)
+            self.stop_event.wait(max(0.0, (next_run - datetime.now()).total_seconds()))
+
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Lead-Scoring-Engine
+Keywords, Gewichte und Schwellwerte als Regelsatz (optional aus JSON-Datei)
+
+Beispiel scoring_rules.json:
+{
+  "keywords": ["steuerberater", "kanzlei"],
+  "keyword_weight": 30,
+  "rating_threshold": 4.0, "rating_weight": 10,
+  "reviews_threshold": 20, "reviews_weight": 10,
+  "min_score": 30, "min_final_score": 40
+}
+"""
+
+import json
+import os
+import re
+from typing import Dict, List
+
+# High-Potential Keywords für Branchen
+HIGH_POTENTIAL_KEYWORDS = [
+    'steuerberater', 'buchhaltung', 'accounting', 'tax',
+    'immobilien', 'hausverwaltung', 'property',
+    'personaldienstleister', 'recruiting', 'hr',
+    'versicherung', 'insurance',
+    'rechtsanwalt', 'law', 'kanzlei',
+    'marketing', 'werbeagentur', 'agency',
+    'logistik', 'spedition', 'transport'
+]
+
+DEFAULT_RULES = {
+    'keywords': HIGH_POTENTIAL_KEYWORDS,
+    'keyword_weight': 30,
+    'rating_threshold': 4.0,
+    'rating_weight': 10,
+    'reviews_threshold': 20,  # mehr als N Bewertungen = etabliert
+    'reviews_weight': 10,
+    'min_score': 30,  # Qualifizierung nach Places-Daten
+    'min_final_score': 40,  # inkl. Website-Analyse
+}
+
+
+class RuleSet:
+    """Kompilierter Scoring-Regelsatz"""
+
+    def __init__(self, **rules):
+        rules = {**DEFAULT_RULES, **rules}
+        self.keywords = [k.lower() for k in rules['keywords']]
+        self.keyword_weight = rules['keyword_weight']
+        self.rating_threshold = rules['rating_threshold']
+        self.rating_weight = rules['rating_weight']
+        self.reviews_threshold = rules['reviews_threshold']
+        self.reviews_weight = rules['reviews_weight']
+        self.min_score = rules['min_score']
+        self.min_final_score = rules['min_final_score']
+
+        # Alle Keywords in einem Regex: ein Durchlauf (in C) statt N Substring-Checks
+        pattern = '|'.join(re.escape(k) for k in sorted(self.keywords, key=len, reverse=True))
+        self._keyword_search = re.compile(pattern).search if pattern else (lambda name: None)
+
+    @classmethod
+    def load(cls, path: str = None) -> 'RuleSet':
+        """Lädt Regelsatz aus JSON-Datei (fehlende Keys = Defaults)"""
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                return cls(**json.load(f))
+        return cls()
+
+    def score(self, place: Dict) -> int:
+        """Bewertet einen einzelnen Place"""
+        return self.score_batch([place])[0]
+
+    def score_batch(self, places: List[Dict]) -> List[int]:
+        """Bewertet viele Places in einem Durchlauf"""
+        search = self._keyword_search
+        keyword_weight, rating_weight, reviews_weight = self.keyword_weight, self.rating_weight, self.reviews_weight
+        rating_threshold, reviews_threshold = self.rating_threshold, self.reviews_threshold
+
+        return [
+            (keyword_weight if search((place.get('name') or '').lower()) else 0)
+            + (rating_weight if (place.get('rating') or 0) >= rating_threshold else 0)
+            + (reviews_weight if (place.get('user_ratings_total') or 0) > reviews_threshold else 0)
+            for place in places
+        ]
+
+    def rescore_sql(self):
+        """UPDATE-Statement + Parameter, um alle gespeicherten Leads in der DB neu zu bewerten
+
+        Leads ohne user_ratings_total stammen aus der Zeit vor diesen Spalten - ohne Bewertungsdaten
+        bleibt ihr gespeicherter Score unverändert, statt Rating- und Review-Punkte zu verlieren.
+        """
+        patterns = ['%' + k.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+                    for k in self.keywords]
+        expression = """(
+            CASE WHEN lower(company_name) LIKE ANY(%(patterns)s) THEN %(keyword_weight)s ELSE 0 END
+            + CASE WHEN COALESCE(rating, 0) >= %(rating_threshold)s THEN %(rating_weight)s ELSE 0 END
+            + CASE WHEN user_ratings_total > %(reviews_threshold)s THEN %(reviews_weight)s ELSE 0 END
+        )"""
+        # Nur geänderte Zeilen schreiben
+        query = f"""
+        UPDATE leads_email_campaign
+        SET score = {expression}
+        WHERE user_ratings_total IS NOT NULL AND score IS DISTINCT FROM {expression}
+        """
+        params = {
+            'patterns': patterns,
+            'keyword_weight': self.keyword_weight,
+            'rating_threshold': self.rating_threshold,
+            'rating_weight': self.rating_weight,
+            'reviews_threshold': self.reviews_threshold,
+            'reviews_weight': self.reviews_weight,
+        }
+        return query, params
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Lead-Suche über pg_trgm
+Unscharfe Suche (Tippfehler, Umlaute) auf Firmenname, Adresse und Website
+sowie Präfix-Autocomplete auf dem Firmennamen
+"""
+
+import re
+from typing import Dict, List
+
+# Muss exakt zur SQL-Funktion lead_search_fold() in database_schema.sql passen
+UMLAUTS = {'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'}
+ACCENTS_FROM = 'àáâãåāăąçćčďèéêëēėęěìíîïīįłñńňòóôõøōőŕřśšşťùúûūůűųýÿźżž'
+ACCENTS_TO = 'aaaaaaaacccdeeeeeeeeiiiiiilnnnooooooorrssstuuuuuuuyyzzz'
+FOLD_TABLE = str.maketrans({**UMLAUTS, **dict(zip(ACCENTS_FROM, ACCENTS_TO))})
+NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+# Unter drei Zeichen gibt es keine verwertbaren Trigramme - dann Präfixsuche
+MIN_FUZZY_LENGTH = 3
+
+RESULT_COLUMNS = "id, company_name, address, score, status, website"
+
+FUZZY_QUERY = f"""
+    SELECT {RESULT_COLUMNS},
+        GREATEST(
+            word_similarity(%(q)s, lead_search_fold(company_name)),
+            word_similarity(%(q)s, lead_search_fold(address)),
+            word_similarity(%(q)s, lead_search_fold(website))
+        ) AS similarity
+    FROM leads_email_campaign
+    WHERE %(q)s <%% lead_search_fold(company_name)
+       OR %(q)s <%% lead_search_fold(address)
+       OR %(q)s <%% lead_search_fold(website)
+    ORDER BY similarity DESC, score DESC NULLS LAST
+    LIMIT %(limit)s
+"""
+
+# Reihenfolge = Indexreihenfolge von idx_leads_name_prefix, liest nur limit Zeilen
+PREFIX_QUERY = f"""
+    SELECT {RESULT_COLUMNS}, 1.0 AS similarity
+    FROM leads_email_campaign
+    WHERE lead_search_fold(company_name) COLLATE "C" LIKE %(prefix)s
+    ORDER BY lead_search_fold(company_name) COLLATE "C", score DESC NULLS LAST
+    LIMIT %(limit)s
+"""
+
+
+def fold(text: str) -> str:
+    """Normalisiert für die Suche: klein, Umlaute/Akzente ausgeschrieben, nur a-z0-9"""
+    return NON_ALNUM.sub(' ', (text or '').lower().translate(FOLD_TABLE)).strip()
+
+
+class LeadSearch:
+    """Führt Such- und Autocomplete-Abfragen auf leads_email_campaign aus"""
+
+    def __init__(self, threshold: float = 0.3, limit: int = 20):
+        self.threshold = threshold  # pg_trgm.word_similarity_threshold
+        self.limit = limit
+
+    def search(self, cursor, query: str, mode: str = 'fuzzy', limit: int = None) -> List[Dict]:
+        """Sucht Leads; mode 'fuzzy' (Standard) oder 'prefix' (Autocomplete)"""
+        folded = fold(query)
+        if not folded:
+            return []
+        limit = limit or self.limit
+
+        if mode == 'prefix' or len(folded) < MIN_FUZZY_LENGTH:
+            # fold() entfernt % und _, der Suchbegriff braucht kein LIKE-Escaping
+            cursor.execute(PREFIX_QUERY, {'prefix': folded + '%', 'limit': limit})
+        else:
+            # Gilt nur für die laufende Transaktion; der Pool rollt beim Zurückgeben zurück
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                           (str(self.threshold),))
+            cursor.execute(FUZZY_QUERY, {'q': folded, 'limit': limit})
+        return cursor.fetchall()
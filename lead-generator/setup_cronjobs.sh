@@ -4,6 +4,9 @@
 # Installation:
 # chmod +x setup_cronjobs.sh
 # ./setup_cronjobs.sh
+#
+# Alternative ohne Cron: python lead_generation.py --daemon
+# (ein Prozess mit internem Zeitplan, siehe QUICK_REFERENCE.md) - dann diese Cronjobs nicht installieren
 
 echo "🔧 Setting up cronjobs for Lead Generation..."
 
@@ -17,17 +20,21 @@ mkdir -p "$SCRIPT_DIR/logs"
 # Cronjob-Einträge
 CRON_CAMPAIGN="0 9 * * 1-5 cd $SCRIPT_DIR && $PYTHON_BIN lead_generation.py --campaign >> logs/campaign.log 2>&1"
 CRON_FOLLOWUP="0 14 * * * cd $SCRIPT_DIR && $PYTHON_BIN lead_generation.py --followup >> logs/followup.log 2>&1"
+# Versand aus der Warteschlange (flock verhindert parallele Versand-Prozesse)
+CRON_DELIVER="*/15 8-18 * * 1-5 cd $SCRIPT_DIR && flock -n /tmp/lead-deliver.lock $PYTHON_BIN lead_generation.py --deliver >> logs/deliver.log 2>&1"
 CRON_STATS="0 18 * * 5 cd $SCRIPT_DIR && $PYTHON_BIN lead_generation.py --stats >> logs/stats.log 2>&1"
 
 # Füge Cronjobs hinzu
 (crontab -l 2>/dev/null; echo "$CRON_CAMPAIGN") | crontab -
 (crontab -l 2>/dev/null; echo "$CRON_FOLLOWUP") | crontab -
+(crontab -l 2>/dev/null; echo "$CRON_DELIVER") | crontab -
 (crontab -l 2>/dev/null; echo "$CRON_STATS") | crontab -
 
 echo "✅ Cronjobs installiert:"
 echo ""
 echo "📧 Kampagne: Montag-Freitag, 9:00 Uhr"
 echo "📬 Follow-ups: Täglich, 14:00 Uhr"
+echo "📤 Versand: Montag-Freitag, 8-18 Uhr alle 15 Minuten"
 echo "📊 Statistiken: Freitag, 18:00 Uhr"
 echo ""
 echo "Logs verfügbar unter: $SCRIPT_DIR/logs/"
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Persistente SMTP-Verbindungen
+Hält authentifizierte Verbindungen offen und verbindet bei Abbruch neu
+"""
+
+import queue
+import smtplib
+import threading
+import time
+from email.message import Message
+
+from http_client import LatencyHistogram
+from metrics import REGISTRY
+
+SMTP_LATENCY = REGISTRY.histogram('leadgen_smtp_send_duration_seconds', 'Dauer eines SMTP-Versands')
+SMTP_CONNECT_LATENCY = REGISTRY.histogram(
+    'leadgen_smtp_connect_duration_seconds', 'Verbindungsaufbau inkl. STARTTLS und Login')
+SMTP_ERRORS = REGISTRY.counter('leadgen_smtp_errors_total', 'SMTP-Fehler', ['reason'])
+
+
+class TrackingSMTP(smtplib.SMTP):
+    """SMTP-Verbindung, die sich merkt, ob der Nachrichteninhalt (DATA) bereits übergeben wurde"""
+
+    data_started = False
+
+    def data(self, msg):
+        self.data_started = True
+        return super().data(msg)
+
+
+class PooledConnection:
+    """SMTP-Verbindung mit Zeitpunkt der letzten Nutzung"""
+
+    def __init__(self, smtp: TrackingSMTP):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    """Pool authentifizierter SMTP-Verbindungen (STARTTLS + Login einmal pro Verbindung)"""
+
+    def __init__(self, host: str, port: int, user: str, password: str, size: int = 1,
+                 starttls: bool = True, noop_after: float = 30.0, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.noop_after = noop_after  # Sekunden Leerlauf, nach denen die Verbindung geprüft wird
+        self.timeout = timeout
+        self.size = size
+        self.sent = 0
+        self.connects = 0
+        self.latency = LatencyHistogram()
+        self._idle = queue.LifoQueue()
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> PooledConnection:
+        """Baut eine neue Verbindung auf (Handshake, STARTTLS, Login)"""
+        start = time.perf_counter()
+        smtp = TrackingSMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.password:
+                smtp.login(self.user, self.password)
+        except Exception:
+            smtp.close()
+            SMTP_ERRORS.labels('connect').inc()
+            raise
+        SMTP_CONNECT_LATENCY.observe(time.perf_counter() - start)
+        with self._lock:
+            self.connects += 1
+        return PooledConnection(smtp)
+
+    def _is_alive(self, conn: PooledConnection) -> bool:
+        """NOOP-Check für länger ungenutzte Verbindungen"""
+        if time.monotonic() - conn.last_used < self.noop_after:
+            return True
+        try:
+            return conn.smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _discard(self, conn: PooledConnection):
+        """Schließt eine Verbindung ohne Fehler bei bereits getrennten Sockets"""
+        try:
+            conn.smtp.quit()
+        except Exception:
+            conn.smtp.close()
+        with self._lock:
+            self._open -= 1
+
+    def _checkout(self) -> PooledConnection:
+        """Liefert eine funktionierende Verbindung (wartet, wenn alle belegt sind)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_open = self._open < self.size
+                    if can_open:
+                        self._open += 1
+                if not can_open:
+                    conn = self._idle.get()
+                else:
+                    try:
+                        return self._connect()
+                    except Exception:
+                        with self._lock:
+                            self._open -= 1
+                        raise
+
+            if self._is_alive(conn):
+                return conn
+            self._discard(conn)
+
+    def _checkin(self, conn: PooledConnection):
+        """Gibt eine Verbindung an den Pool zurück"""
+        conn.last_used = time.monotonic()
+        self._idle.put(conn)
+
+    def send_message(self, msg: Message) -> float:
+        """Versendet eine Nachricht und liefert die Latenz in ms.
+
+        Ein Verbindungsabbruch vor DATA (z.B. Server-Timeout einer gepoolten
+        Verbindung) führt zu genau einem erneuten Versuch über eine frische
+        Verbindung. Bricht die Verbindung während oder nach DATA ab, kann der
+        Server die Nachricht bereits angenommen haben - kein erneuter Versuch,
+        sonst droht ein Doppelversand.
+        """
+        for attempt in range(2):
+            conn = self._checkout()
+            conn.smtp.data_started = False
+            start = time.perf_counter()
+            try:
+                conn.smtp.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                SMTP_ERRORS.labels('disconnected').inc()
+                self._discard(conn)
+                if attempt or conn.smtp.data_started:
+                    raise
+                continue
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+                # Abgelehnte Nachricht - die Verbindung selbst ist weiter nutzbar
+                SMTP_ERRORS.labels('refused').inc()
+                self._checkin(conn)
+                raise
+            except Exception:
+                SMTP_ERRORS.labels('other').inc()
+                self._discard(conn)
+                raise
+
+            elapsed = time.perf_counter() - start
+            SMTP_LATENCY.observe(elapsed)
+            ms = elapsed * 1000
+            self.latency.observe(ms)
+            with self._lock:
+                self.sent += 1
+            self._checkin(conn)
+            return ms
+
+    def close(self):
+        """Schließt alle offenen Verbindungen"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
+
+    def summary(self) -> str:
+        """Kurzstatistik für das Run-Log"""
+        return f"{self.sent} gesendet über {self.connects} Verbindung(en), {self.latency.summary()}"
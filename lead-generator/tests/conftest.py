@@ -0,0 +1,81 @@
+"""
+Gemeinsame Fixtures für die Tests
+Module liegen flach in lead-generator/ - wie in den Benchmarks über sys.path erreichbar
+
+Datenbank-Tests laufen gegen eine Wegwerf-Datenbank mit database_schema.sql
+(ThrowawayPostgres aus benchmarks/bench_e2e.py):
+  Standard: Server aus DB_HOST / DB_PORT / DB_USER / DB_PASSWORD (braucht CREATEDB)
+  TEST_PG_BIN=/usr/lib/postgresql/16/bin: eigener Cluster über initdb/pg_ctl
+Ist kein Server erreichbar, werden sie übersprungen.
+
+Externe Dienste (Websites, SMTP, DNS) kommen aus benchmarks/fakes.py, hier im
+Testprozess in einem Thread statt in eigenen Prozessen.
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+# Reihenfolge egal: TRUNCATE ... CASCADE erfasst die Fremdschlüssel
+TABLES = ('leads_email_campaign', 'lead_duplicates', 'email_queue', 'campaign_jobs', 'campaign_places',
+          'campaign_runs', 'campaign_totals', 'campaign_daily')
+
+
+@pytest.fixture(scope='session')
+def db_params():
+    """Verbindungsparameter einer frischen Test-Datenbank (eine pro Testlauf)"""
+    psycopg2 = pytest.importorskip('psycopg2')
+    from bench_e2e import ThrowawayPostgres
+
+    pg_bin = os.getenv('TEST_PG_BIN')
+    name = f"leadgen_test_{os.getpid()}"
+    with ThrowawayPostgres(initdb=bool(pg_bin), pg_bin=pg_bin) as postgres:
+        try:
+            params = postgres.create_database(name)
+        except psycopg2.OperationalError as e:
+            pytest.skip(f"Kein PostgreSQL erreichbar: {e}")
+        try:
+            yield params
+        finally:
+            postgres.drop_database(name)
+
+
+@pytest.fixture
+def db_conn(db_params):
+    """Verbindung auf eine geleerte Datenbank (laufende Statistik zurückgesetzt)"""
+    import psycopg2
+
+    conn = psycopg2.connect(**db_params)
+    cursor = conn.cursor()
+    cursor.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE")
+    # TRUNCATE löst keine Statement-Trigger für DELETE aus - Summen neu aufbauen
+    cursor.execute("SELECT campaign_stats_rebuild()")
+    conn.commit()
+    cursor.close()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def fake_server():
+    """Startet Fakes aus benchmarks/fakes.py im Thread: fake_server(kind, **options) -> Server"""
+    from fakes import _make_server
+
+    servers = []
+
+    def start(kind: str, **options):
+        server = _make_server(kind, '127.0.0.1', options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
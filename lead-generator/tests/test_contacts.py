@@ -0,0 +1,69 @@
+"""Kontaktsuche: Extraktion, Bewertung und Crawl gegen die Website-Farm"""
+
+import time
+
+from cache import ContactCache
+from contacts import ContactCrawler, HostThrottle, extract_emails, rank_emails
+from http_client import HttpClient
+
+
+def cfemail(email: str, key: int = 0x54) -> str:
+    """Kodierung wie beim Cloudflare-E-Mail-Schutz"""
+    return bytes([key, *(b ^ key for b in email.encode())]).hex()
+
+
+def test_extract_emails_decodes_obfuscation():
+    page = ('<a href="mailto:Info@Firma.de">Info@Firma.de</a> kontakt [at] firma [dot] de '
+            f'logo@2x.png <span data-cfemail="{cfemail("buero@firma.de")}">[email protected]</span> test@example.com')
+    found = extract_emails(page)
+    assert set(found) == {'info@firma.de', 'kontakt@firma.de', 'buero@firma.de'}
+    assert found['info@firma.de'] == {'count': 2, 'mailto': True}
+
+
+def test_rank_prefers_own_domain_and_skips_unwanted():
+    found = {
+        'noreply@firma.de': {'count': 3},
+        'inhaber@gmail.com': {'count': 1},
+        'info@firma.de': {'count': 1, 'pages': {'impressum'}},
+        'max.muster@firma.de': {'count': 1},
+        'datenschutz@firma.de': {'count': 5},
+    }
+    assert rank_emails(found, 'firma.de') == ['info@firma.de', 'max.muster@firma.de', 'inhaber@gmail.com']
+
+
+def test_crawl_finds_impressum_address_once_per_domain(tmp_path, fake_server):
+    from fakes import make_page
+
+    server = fake_server('sites', page_kb=4)
+    server.page = make_page(4)
+    website = f"http://127.0.0.1:{server.server_address[1]}/"
+    http = HttpClient()
+    crawler = ContactCrawler(http, ContactCache(str(tmp_path / 'cache.sqlite3'), 3600, 100, 60), host_delay=0)
+    try:
+        # Parallele Anfragen derselben Domain teilen sich einen Crawl
+        futures = [crawler.submit(website) for _ in range(3)]
+        assert all(future.result(timeout=10) == ['kontakt@site-127-0-0-1.de'] for future in futures)
+        assert crawler.submit(website).result() == ['kontakt@site-127-0-0-1.de']  # aus dem Cache
+        assert (crawler.stats['sites'], crawler.stats['pages']) == (1, 2)
+    finally:
+        crawler.close()
+        http.close()
+
+
+def test_throttle_spaces_requests_and_forgets_idle_hosts():
+    throttle = HostThrottle(0.05, prune_at=8)
+    start = time.monotonic()
+    for _ in range(2):
+        throttle.wait('a.de')
+        throttle.release('a.de')
+    assert time.monotonic() - start >= 0.05
+
+    throttle.wait('busy.de')  # laufender Abruf: darf nicht entfernt werden
+    for i in range(200):
+        throttle.wait(f"host{i}.de")
+        throttle.release(f"host{i}.de")
+        time.sleep(0.001)
+    # Nur Hosts innerhalb des Mindestabstands (und der laufende) bleiben erhalten
+    assert 'busy.de' in throttle._hosts and 'host0.de' not in throttle._hosts
+    assert len(throttle._hosts) < 200 // 2
+    throttle.release('busy.de')
@@ -0,0 +1,90 @@
+"""Dubletten-Erkennung: Namensvergleich und Cluster"""
+
+import pytest
+
+import lead_generation
+from dedupe import Candidate, DuplicateFinder, find_place_duplicates
+from progress import PlaceProgress
+
+
+def names_match(a: str, b: str) -> bool:
+    return DuplicateFinder().names_match(Candidate(1, 0, a), Candidate(2, 0, b))
+
+
+@pytest.mark.parametrize('a, b', [
+    ('Müller GmbH', 'Müller'),
+    ('Müller', 'Kanzlei Müller GmbH'),
+    ('Weber & Partner', 'Partner Weber'),
+    ('Friseur Salon Anna', 'Friseursalon Anna'),
+    ('Zahnarztpraxis Dr. Weber', 'Zahnarztpraxis Dr Weber'),
+    ('Steuerberatung Yilmaz', 'Steuerberatng Yilmaz'),  # Tippfehler
+])
+def test_names_match(a, b):
+    assert names_match(a, b)
+
+
+@pytest.mark.parametrize('a, b', [
+    ('Café Rosa', 'Rosarot Café'),
+    ('Auto Meier', 'Autohaus Meierhof'),
+    ('Bäckerei Schmidt', 'Bäckerei Schmidtke'),
+    ('Kanzlei Müller', 'Rechtsanwaltskanzlei Müllerhaus'),
+    ('Praxis 2', 'Praxis 12'),
+    ('Bäckerei Schmidt', 'Bäckerei Nowak'),
+])
+def test_near_misses_do_not_match(a, b):
+    assert not names_match(a, b)
+
+
+def place(place_id, name, address, lat=52.48, lng=13.43, **extra):
+    return {'place_id': place_id, 'score': 50, 'payload': {
+        'name': name, 'formatted_address': address, 'geometry': {'location': {'lat': lat, 'lng': lng}}, **extra}}
+
+
+def test_find_place_duplicates():
+    existing = [place('old', 'Kanzlei Müller GmbH', 'Karl-Marx-Str. 12, 12043 Berlin')]
+    places = [
+        place('same', 'Kanzlei Müller', 'Karl-Marx-Straße 12, 12043 Berlin'),
+        place('nearby', 'Kanzlei Müller', 'Karl-Marx-Str. 14, 12043 Berlin', lat=52.48001),
+        place('elsewhere', 'Kanzlei Müller', 'Sonnenallee 3, 12045 Berlin', lat=52.47),
+        place('near_miss', 'Kanzlei Müllerhaus', 'Karl-Marx-Str. 12, 12043 Berlin'),
+        place('domain', 'Ganz Anders', 'Weserstr. 1, 12047 Berlin', lat=52.49, website='https://www.x-kanzlei.de'),
+        place('domain_original', 'Noch Anders', 'Weserstr. 2, 12047 Berlin', lat=52.49,
+              website='http://x-kanzlei.de/kontakt'),
+    ]
+    places[-1]['score'] = 90
+    duplicates = find_place_duplicates(places, existing)
+    assert duplicates == {
+        'same': ('old', 'name_address'),
+        'nearby': ('old', 'name_nearby'),  # gleicher Name, Nachbarzelle: andere Hausnummer erlaubt
+        'domain': ('domain_original', 'domain'),
+    }
+
+
+def test_planned_duplicates_are_rejected_in_campaign_places(db_conn):
+    cursor = db_conn.cursor()
+    rows = [
+        place('done', 'Kanzlei Müller GmbH', 'Karl-Marx-Str. 12, 12043 Berlin'),
+        place('copy', 'Kanzlei Müller', 'Karl-Marx-Straße 12, 12043 Berlin'),
+        place('near_miss', 'Kanzlei Müllerhaus', 'Karl-Marx-Str. 12, 12043 Berlin'),
+        place('far_away', 'Kanzlei Müller', 'Sonnenallee 3, 12045 Berlin', lat=52.47),
+    ]
+    progress = PlaceProgress(db_conn)
+    run_id, _ = progress.start_run('raster')
+    progress.record_tile(run_id, 1, [dict(row['payload'], place_id=row['place_id'], score=50) for row in rows])
+    progress.advance([('done', 'done', 'lead', None, None)])
+
+    generator = lead_generation.LeadGenerator()
+    generator.__dict__['db_conn'] = db_conn
+    kept = generator.drop_duplicate_places(progress.take_discovered(10))
+    db_conn.commit()
+
+    assert sorted(place['place_id'] for place in kept) == ['far_away', 'near_miss']
+    cursor.execute("SELECT place_id, stage, outcome, duplicate_of FROM campaign_places ORDER BY place_id")
+    assert cursor.fetchall() == [
+        ('copy', 'rejected', 'duplicate_name_address', 'done'),
+        ('done', 'done', 'lead', None),
+        ('far_away', 'planned', None, None),
+        ('near_miss', 'planned', None, None),
+    ]
+    db_conn.commit()
+    cursor.close()
@@ -0,0 +1,76 @@
+"""MX-Prüfung gegen den DNS-Stub: Fallback auf A/AAAA, Null-MX, negatives Caching"""
+
+import time
+
+import pytest
+
+from cache import DomainCache
+from deliverability import MailDomainChecker, email_domain
+
+
+@pytest.fixture
+def dns_stub(fake_server):
+    return fake_server('dns', ttl=600, negative_ttl=120)
+
+
+@pytest.fixture
+def checker(dns_stub, tmp_path):
+    checker = MailDomainChecker(DomainCache(str(tmp_path / 'cache.sqlite3'), 86400, 1000), ['127.0.0.1'],
+                                port=dns_stub.server_address[1], timeout=2, min_ttl=0, negative_ttl=3600)
+    yield checker
+    checker.close()
+
+
+def test_email_domain():
+    assert email_domain(' Info@Firma.DE. ') == 'firma.de'
+
+
+def test_status_per_domain(checker):
+    results = checker.check_many(['firma.de', 'nomx.firma.de', 'v6only.firma.de', 'nullmx.firma.de',
+                                  'nxdomain.firma.de', 'norecords.firma.de', 'Firma.de'])
+    assert {domain: record['status'] for domain, record in results.items()} == {
+        'firma.de': 'mx',
+        'nomx.firma.de': 'a',  # implizites MX über A
+        'v6only.firma.de': 'a',  # implizites MX über AAAA
+        'nullmx.firma.de': 'null_mx',
+        'nxdomain.firma.de': 'nxdomain',
+        'norecords.firma.de': 'no_records',
+    }
+    assert results['firma.de']['hosts'] == ['mail.firma.de']
+    assert results['v6only.firma.de']['hosts'] == ['v6only.firma.de']
+    assert [domain for domain, record in results.items() if checker.deliverable(record)] == [
+        'firma.de', 'nomx.firma.de', 'v6only.firma.de']
+
+
+def test_positive_and_negative_ttls(checker):
+    now = time.time()
+    results = checker.check_many(['firma.de', 'nxdomain.firma.de', 'norecords.firma.de'])
+    # Positiv: TTL der Antwort; negativ: min(SOA-TTL, SOA-Minimum) statt negative_ttl
+    assert results['firma.de']['expires_at'] == pytest.approx(now + 600, abs=5)
+    assert results['nxdomain.firma.de']['expires_at'] == pytest.approx(now + 120, abs=5)
+    assert results['norecords.firma.de']['expires_at'] == pytest.approx(now + 120, abs=5)
+
+
+def test_cached_domains_are_not_resolved_again(checker):
+    checker.check_many(['firma.de', 'nxdomain.firma.de'])
+    assert checker.stats['lookups'] == 2
+    checker.check_many(['firma.de', 'nxdomain.firma.de', 'andere.de'])
+    assert checker.stats['lookups'] == 3
+
+    # Abgelaufener Eintrag wird neu aufgelöst
+    record = checker.cache.get_domain('firma.de')
+    checker.cache.set_domain('firma.de', dict(record, expires_at=time.time() - 1))
+    checker.check_many(['firma.de'])
+    assert checker.stats['lookups'] == 4
+
+
+def test_resolver_errors_are_not_cached(tmp_path):
+    # Kein Server auf dem Port: Timeout zählt als zustellbar und wird beim nächsten Mal erneut gefragt
+    checker = MailDomainChecker(DomainCache(str(tmp_path / 'cache.sqlite3'), 86400, 1000), ['127.0.0.1'],
+                                port=9, timeout=0.2)
+    try:
+        record = checker.check_many(['firma.de'])['firma.de']
+        assert record['status'] == 'error' and checker.deliverable(record)
+        assert checker.cache.get_domain('firma.de') is None
+    finally:
+        checker.close()
@@ -0,0 +1,137 @@
+"""Versand-Warteschlange: Slots, Takt und Tages-Limit nach der Uhr der Datenbank"""
+
+import psycopg2
+import pytest
+
+from delivery import DeliveryQueue, DeliveryScheduler
+from persistence import LeadWriter
+
+
+@pytest.fixture
+def skewed_conn(db_conn, db_params):
+    """Session-Zeitzone weit weg von der des Hosts - Python- und DB-Uhr weichen um Stunden ab (db_conn leert vorher die Tabellen)"""
+    conn = psycopg2.connect(options='-c TimeZone=Pacific/Kiritimati', **db_params)
+    yield conn
+    conn.close()
+
+
+def add_leads(conn, count):
+    return LeadWriter(conn).save_many([
+        {'name': f"Kanzlei {i}", 'address': f"Weserstr. {i}", 'place_id': f"p{i}", 'email': f"info@k{i}.de"}
+        for i in range(count)])
+
+
+def items(lead_ids, kind='initial'):
+    return [{'lead_id': lead_id, 'recipient': f"info@k{i}.de", 'subject': 'Betreff', 'body': 'Text', 'kind': kind}
+            for i, lead_id in enumerate(lead_ids)]
+
+
+class Outbox:
+    def __init__(self, fail_for=()):
+        self.sent = []
+        self.fail_for = fail_for
+
+    def __call__(self, recipient, subject, body):
+        if recipient in self.fail_for:
+            return False
+        self.sent.append(recipient)
+        return True
+
+
+def queue_states(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT status, COUNT(*) FROM email_queue GROUP BY status")
+    states = dict(cursor.fetchall())
+    conn.commit()
+    cursor.close()
+    return states
+
+
+def test_slots_are_spaced_by_delay(db_conn):
+    queue = DeliveryQueue(db_conn, 120)
+    ids = queue.enqueue_many(items(add_leads(db_conn, 3)))
+    queue.enqueue_many(items(add_leads(db_conn, 4)[3:], kind='followup'))
+    cursor = db_conn.cursor()
+    cursor.execute("SELECT scheduled_at FROM email_queue ORDER BY id")
+    slots = [row[0] for row in cursor.fetchall()]
+    assert [(b - a).total_seconds() for a, b in zip(slots, slots[1:])] == [120, 120, 120]
+    cursor.execute("SELECT DISTINCT status FROM leads_email_campaign WHERE id IN (SELECT lead_id FROM email_queue WHERE id = ANY(%s))",
+                   (ids,))
+    assert cursor.fetchall() == [('queued',)]
+    db_conn.commit()
+    cursor.close()
+
+
+def test_tick_without_wait_sends_due_mail_once_and_returns(skewed_conn):
+    queue = DeliveryQueue(skewed_conn, 0)
+    queue.enqueue_many(items(add_leads(skewed_conn, 3)))
+    outbox = Outbox()
+    # Takt 60 s: ein Tick ohne Warten versendet genau eine E-Mail und kehrt sofort zurück
+    scheduler = DeliveryScheduler(queue, outbox, max_per_day=10, delay_between_emails=60)
+    assert scheduler.run(wait=False) == 1
+    assert scheduler.run(wait=False) == 0
+    assert queue_states(skewed_conn) == {'sent': 1, 'queued': 2}
+
+    cursor = skewed_conn.cursor()
+    cursor.execute("""
+        SELECT q.sent_at = l.sent_at, q.sent_at BETWEEN LOCALTIMESTAMP - INTERVAL '1 minute' AND LOCALTIMESTAMP
+        FROM email_queue q JOIN leads_email_campaign l ON l.id = q.lead_id WHERE q.status = 'sent'
+    """)
+    assert cursor.fetchone() == (True, True)
+    skewed_conn.commit()
+    cursor.close()
+
+
+def test_daily_cap_and_failures(skewed_conn):
+    queue = DeliveryQueue(skewed_conn, 0)
+    queue.enqueue_many(items(add_leads(skewed_conn, 4)))
+    outbox = Outbox(fail_for={'info@k0.de'})
+    scheduler = DeliveryScheduler(queue, outbox, max_per_day=3, delay_between_emails=0)
+    # Fehlversuche zählen nicht gegen das Tages-Limit
+    assert scheduler.run(wait=False) == 3
+    assert outbox.sent == ['info@k1.de', 'info@k2.de', 'info@k3.de']
+    assert queue_states(skewed_conn) == {'failed': 1, 'sent': 3}
+    assert queue.used_today() == 3
+
+    queue.enqueue_many(items(add_leads(skewed_conn, 5)[4:]))
+    assert scheduler.run(wait=False) == 0
+    assert queue_states(skewed_conn) == {'failed': 1, 'sent': 3, 'queued': 1}
+
+
+def test_stale_claims_are_failed_not_resent(skewed_conn):
+    queue = DeliveryQueue(skewed_conn, 0)
+    queue.enqueue_many(items(add_leads(skewed_conn, 2)))
+    assert queue.claim_due()['recipient'] == 'info@k0.de'
+    assert queue.recover_stale() == 0
+    cursor = skewed_conn.cursor()
+    cursor.execute("UPDATE email_queue SET claimed_at = LOCALTIMESTAMP - INTERVAL '11 minutes' WHERE status = 'sending'")
+    skewed_conn.commit()
+    cursor.close()
+    assert queue.recover_stale() == 1
+    assert queue_states(skewed_conn) == {'failed': 1, 'queued': 1}
+
+
+def test_failed_enqueue_rolls_back_saved_leads(db_conn):
+    queue, writer = DeliveryQueue(db_conn, 0), LeadWriter(db_conn)
+    lead = {'name': 'Kanzlei Weber', 'address': 'Weserstr. 1', 'place_id': 'p1', 'email': 'info@weber.de'}
+
+    # Wie die Generierungs-Stufe: Lead speichern und einreihen in einer Transaktion
+    with pytest.raises(psycopg2.IntegrityError):
+        with queue.slot_lock():
+            lead_ids = writer.save_many([lead], commit=False)
+            queue.enqueue_many([{'lead_id': lead_ids[0], 'recipient': None, 'subject': 'Betreff', 'body': 'Text'}],
+                               commit=False)
+            db_conn.commit()
+    cursor = db_conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM leads_email_campaign")
+    assert cursor.fetchone()[0] == 0  # kein Lead ohne Eintrag in der Warteschlange
+    db_conn.commit()
+
+    with queue.slot_lock():
+        lead_ids = writer.save_many([lead], commit=False)
+        queue.enqueue_many(items(lead_ids), commit=False)
+        db_conn.commit()
+    cursor.execute("SELECT l.status, q.status FROM leads_email_campaign l JOIN email_queue q ON q.lead_id = l.id")
+    assert cursor.fetchall() == [('queued', 'queued')]
+    db_conn.commit()
+    cursor.close()
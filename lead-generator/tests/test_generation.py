@@ -0,0 +1,95 @@
+"""OpenAI-Generierung: Token-Bucket, Drosselung und Completion-Cache"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from generation import CompletionCache, GenerationPool, TokenBucket
+
+
+class FakeOpenAI:
+    """client.chat.completions.create wie im openai-Paket; zählt die Aufrufe"""
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, temperature, max_tokens=None):
+        with self._lock:
+            self.calls.append((model, messages[-1]['content'], temperature))
+        if self.fail_on and self.fail_on in messages[-1]['content']:
+            raise RuntimeError('rate limited')
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"Antwort auf {messages[-1]['content']}"))],
+            usage=SimpleNamespace(total_tokens=100))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CompletionCache(str(tmp_path / 'cache.sqlite3'), ttl=3600, max_entries=100)
+
+
+def prompt(text):
+    return {'messages': [{'role': 'user', 'content': text}]}
+
+
+def test_token_bucket_blocks_until_refilled():
+    bucket = TokenBucket(600)  # 10 pro Sekunde
+    start = time.monotonic()
+    bucket.acquire(600)
+    assert time.monotonic() - start < 0.05
+    bucket.acquire(3)
+    assert 0.25 <= time.monotonic() - start < 1.0
+
+
+def test_token_bucket_consume_can_go_negative():
+    bucket = TokenBucket(600)
+    bucket.acquire(600)
+    bucket.consume(5)  # tatsächlicher Verbrauch über der Schätzung
+    start = time.monotonic()
+    bucket.acquire(1)
+    assert time.monotonic() - start >= 0.5
+
+
+def test_requests_per_minute_throttle_parallel_calls(cache):
+    client = FakeOpenAI()
+    pool = GenerationPool(client, cache, concurrency=4, requests_per_minute=1200)  # 20 pro Sekunde
+    pool.request_bucket.tokens = 0
+    start = time.monotonic()
+    results = pool.complete_many([prompt(f"Firma {i}") for i in range(6)])
+    assert time.monotonic() - start >= 0.25
+    assert results == [f"Antwort auf Firma {i}" for i in range(6)]
+    assert (pool.api_calls, pool.tokens_used) == (6, 600)
+
+
+def test_cache_hit_skips_api_and_rate_limit(cache):
+    client = FakeOpenAI()
+    pool = GenerationPool(client, cache, requests_per_minute=60)
+    assert pool.complete(**prompt('Firma A')) == 'Antwort auf Firma A'
+    pool.request_bucket.tokens = 0  # weitere API-Aufrufe müssten eine Sekunde warten
+    start = time.monotonic()
+    assert pool.complete(**prompt('Firma A')) == 'Antwort auf Firma A'
+    assert time.monotonic() - start < 0.5
+    assert len(client.calls) == 1
+
+    # Andere Temperatur = anderer Schlüssel
+    pool.request_bucket.tokens = 60
+    pool.complete(temperature=0.2, **prompt('Firma A'))
+    assert len(client.calls) == 2
+    # Neuer Prozess, gleiche Cache-Datei
+    fresh = GenerationPool(client, CompletionCache(cache.path, ttl=3600, max_entries=100))
+    assert fresh.complete(**prompt('Firma A')) == 'Antwort auf Firma A'
+    assert len(client.calls) == 2
+
+
+def test_failed_completions_are_not_cached(cache):
+    client = FakeOpenAI(fail_on='Firma B')
+    pool = GenerationPool(client, cache, concurrency=2)
+    assert pool.complete_many([prompt('Firma A'), prompt('Firma B')]) == ['Antwort auf Firma A', None]
+    client.fail_on = None
+    assert pool.complete(**prompt('Firma B')) == 'Antwort auf Firma B'
+    assert len(client.calls) == 3
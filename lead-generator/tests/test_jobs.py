@@ -0,0 +1,126 @@
+"""Job-Warteschlange: paralleles Claiming, Leases und endgültiges Scheitern"""
+
+import threading
+
+import psycopg2
+from psycopg2.extras import Json
+
+from jobs import JobQueue
+
+
+def enqueue(conn, count, kind='enrich'):
+    return JobQueue(conn, 'planner').enqueue_many(kind, [
+        (f"p{i}:1", {'place_id': f"p{i}", 'name': f"Firma {i}"}, i) for i in range(count)])
+
+
+def job_states(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT dedupe_key, status, worker, attempts FROM campaign_jobs ORDER BY id")
+    rows = {key: (status, worker, attempts) for key, status, worker, attempts in cursor.fetchall()}
+    conn.commit()
+    cursor.close()
+    return rows
+
+
+def test_enqueue_skips_known_keys(db_conn):
+    assert enqueue(db_conn, 3) == 3
+    assert enqueue(db_conn, 5) == 2
+
+
+def test_concurrent_workers_never_claim_the_same_job(db_conn, db_params):
+    enqueue(db_conn, 200)
+    workers = 4
+    barrier = threading.Barrier(workers)
+    claimed = [[] for _ in range(workers)]
+
+    def work(index):
+        conn = psycopg2.connect(**db_params)
+        queue = JobQueue(conn, f"w{index}")
+        barrier.wait()
+        while True:
+            jobs = queue.claim('enrich', 7)
+            if not jobs:
+                break
+            claimed[index].extend(job['id'] for job in jobs)
+        conn.close()
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_ids = [job_id for ids in claimed for job_id in ids]
+    assert len(all_ids) == len(set(all_ids)) == 200
+    assert all(status == 'running' and attempts == 1 for status, _, attempts in job_states(db_conn).values())
+
+
+def test_claim_skips_locked_rows_and_takes_highest_priority(db_conn, db_params):
+    enqueue(db_conn, 5)
+    # Fremde Transaktion hält die zwei besten Jobs gesperrt (Worker mitten im Claim)
+    other = psycopg2.connect(**db_params)
+    cursor = other.cursor()
+    cursor.execute("SELECT id FROM campaign_jobs WHERE dedupe_key IN ('p4:1', 'p3:1') FOR UPDATE")
+    jobs = JobQueue(db_conn, 'w1').claim('enrich', 2)
+    other.rollback()
+    other.close()
+    assert [job['dedupe_key'] for job in jobs] == ['p2:1', 'p1:1']
+
+
+def test_expired_lease_is_requeued_for_another_worker(db_conn):
+    enqueue(db_conn, 2)
+    crashed = JobQueue(db_conn, 'crashed')
+    job = crashed.claim('enrich', 1)[0]
+    cursor = db_conn.cursor()
+    cursor.execute("UPDATE campaign_jobs SET lease_until = NOW() - INTERVAL '1 second' WHERE id = %s", (job['id'],))
+    db_conn.commit()
+
+    survivor = JobQueue(db_conn, 'survivor')
+    assert survivor.requeue_expired() == 1
+    assert job_states(db_conn)[job['dedupe_key']] == ('pending', None, 1)
+    reclaimed = survivor.claim('enrich', 1)[0]
+    assert (reclaimed['id'], reclaimed['attempts']) == (job['id'], 2)
+
+    # Der abgestürzte Worker kommt zurück: sein complete() trifft den Job nicht mehr
+    crashed.complete([job['id']])
+    assert job_states(db_conn)[job['dedupe_key']] == ('running', 'survivor', 2)
+    cursor.close()
+
+
+def test_jobs_that_run_out_of_attempts_close_their_place(db_conn):
+    cursor = db_conn.cursor()
+    cursor.executemany("""
+        INSERT INTO campaign_places (place_id, fingerprint, score, payload, stage) VALUES (%s, %s, 50, %s, 'planned')
+    """, [(place_id, 'f' * 40, Json({'place_id': place_id})) for place_id in ('p0', 'p1')])
+    db_conn.commit()
+    enqueue(db_conn, 2)
+    queue = JobQueue(db_conn, 'w1', max_attempts=2)
+
+    # p1: zweimal fehlgeschlagen - beim zweiten Mal endgültig
+    job = queue.claim('enrich', 1)[0]
+    assert not queue.fail(job['id'], 'Timeout', 'p1')
+    job = queue.claim('enrich', 1)[0]
+    assert queue.fail(job['id'], 'Timeout', 'p1')
+
+    # p0: Lease läuft im letzten Versuch ab
+    for _ in range(2):
+        job = queue.claim('enrich', 1)[0]
+        cursor.execute("UPDATE campaign_jobs SET lease_until = NOW() - INTERVAL '1 second' WHERE id = %s",
+                       (job['id'],))
+        db_conn.commit()
+        queue.requeue_expired()
+
+    states = job_states(db_conn)
+    assert states['p1:1'][0] == states['p0:1'][0] == 'failed'
+    cursor.execute("SELECT place_id, stage, outcome FROM campaign_places ORDER BY place_id")
+    assert cursor.fetchall() == [('p0', 'rejected', 'failed'), ('p1', 'rejected', 'failed')]
+    db_conn.commit()
+    cursor.close()
+
+
+def test_release_does_not_count_as_attempt(db_conn):
+    enqueue(db_conn, 1)
+    queue = JobQueue(db_conn, 'w1')
+    job = queue.claim('enrich', 1)[0]
+    queue.release([job['id']])
+    assert job_states(db_conn)['p0:1'] == ('pending', None, 0)
@@ -0,0 +1,115 @@
+"""Fortsetzbare Suchläufe und Vorfilter bereits bearbeiteter Places"""
+
+from psycopg2.extras import Json
+
+import lead_generation
+from progress import PlaceProgress, place_fingerprint
+
+
+def place(place_id, name='Steuerberater Weber', address=None, rating=4.5):
+    return {'place_id': place_id, 'name': name, 'formatted_address': address or f"Weserstr. {place_id}, 12047 Berlin",
+            'rating': rating, 'user_ratings_total': 30}
+
+
+class FakeSearch:
+    """Vier Kacheln mit je zwei Places; stop_after: Beenden nach dieser Kachel anfordern"""
+
+    def __init__(self, generator, stop_after=None):
+        self.generator = generator
+        self.stop_after = stop_after
+        self.fetched = []
+        self.tiles = [(f"52.4{i},13.4", 500) for i in range(4)]
+
+    def search_tiles(self):
+        return iter(self.tiles)
+
+    def fetch_tile(self, location, radius):
+        index = self.tiles.index((location, radius))
+        self.fetched.append(index)
+        if index == self.stop_after:
+            self.generator.stop_event.set()  # wie SIGTERM mitten in der Suche
+        # Kachel 3 überlappt mit Kachel 0
+        ids = ['t0a', 't3b'] if index == 3 else [f"t{index}a", f"t{index}b"]
+        return [place(place_id) for place_id in ids]
+
+
+def generator_with_search(db_conn, stop_after=None):
+    generator = lead_generation.LeadGenerator()
+    generator.__dict__['db_conn'] = db_conn
+    search = FakeSearch(generator, stop_after)
+    generator.search_tiles = search.search_tiles
+    generator._fetch_tile = search.fetch_tile
+    return generator, search
+
+
+def test_interrupted_discovery_resumes_after_last_tile(db_conn):
+    first, search = generator_with_search(db_conn, stop_after=1)
+    assert not first.discover()
+    assert search.fetched == [0, 1]
+
+    cursor = db_conn.cursor()
+    cursor.execute("SELECT id, tiles_done, discovery_finished_at FROM campaign_runs")
+    [(run_id, tiles_done, finished)] = cursor.fetchall()
+    assert (tiles_done, finished) == (2, None)
+
+    second, search = generator_with_search(db_conn)
+    assert second.discover()
+    assert search.fetched == [2, 3]
+
+    cursor.execute("SELECT id, tiles_done, discovery_finished_at IS NOT NULL FROM campaign_runs")
+    assert cursor.fetchall() == [(run_id, 4, True)]
+    # t0a aus Kachel 3 war schon bekannt - kein zweiter Eintrag, Revision unverändert
+    cursor.execute("SELECT place_id, revision, run_id FROM campaign_places ORDER BY place_id")
+    assert cursor.fetchall() == [(place_id, 1, run_id) for place_id in ('t0a', 't0b', 't1a', 't1b', 't2a', 't2b', 't3b')]
+    db_conn.commit()
+    cursor.close()
+
+
+def test_finished_run_starts_over(db_conn):
+    progress = PlaceProgress(db_conn)
+    run_id, _ = progress.start_run('raster')
+    progress.record_tile(run_id, 3, [])
+    progress.finish_run(run_id)
+    assert progress.start_run('raster')[1] == 0
+    # Anderes Raster setzt einen offenen Lauf nicht fort
+    open_run, _ = progress.start_run('raster')
+    assert progress.start_run('anderes-raster')[0] != open_run
+
+
+def test_record_tile_skips_known_places(db_conn):
+    progress = PlaceProgress(db_conn)
+    run_id, _ = progress.start_run('raster')
+    done, rejected, changed = place('done'), place('rejected'), place('changed')
+    for candidate in (done, rejected, changed):
+        candidate['score'] = 40
+    assert sorted(progress.record_tile(run_id, 1, [done, rejected, changed])) == ['changed', 'done', 'rejected']
+    progress.advance([('done', 'done', 'lead', None, None), ('rejected', 'rejected', 'low_score', None, None),
+                      ('changed', 'rejected', 'low_score', None, None)])
+
+    # Legacy-Lead ohne Adresse (vor campaign_places) zählt über den Namen als bekannt
+    legacy = place('legacy', name='Hausverwaltung Alt')
+    legacy['score'] = 40
+    cursor = db_conn.cursor()
+    cursor.execute("INSERT INTO leads_email_campaign (company_name) VALUES ('Hausverwaltung Alt')")
+    db_conn.commit()
+
+    changed['score'] = 50  # neue Bewertungsgrundlage: erneut prüfen
+    assert progress.record_tile(run_id, 2, [done, rejected, changed, legacy]) == ['changed']
+    cursor.execute("SELECT stage, revision, fingerprint FROM campaign_places WHERE place_id = 'changed'")
+    assert cursor.fetchone() == ('discovered', 2, place_fingerprint(changed))
+    db_conn.commit()
+    cursor.close()
+
+
+def test_take_discovered_hands_out_best_places_once(db_conn):
+    cursor = db_conn.cursor()
+    cursor.executemany("""
+        INSERT INTO campaign_places (place_id, fingerprint, score, payload) VALUES (%s, %s, %s, %s)
+    """, [(f"p{score}", 'f' * 40, score, Json({'place_id': f"p{score}"})) for score in (30, 70, 50)])
+    db_conn.commit()
+    progress = PlaceProgress(db_conn)
+    assert [row['place_id'] for row in progress.take_discovered(2)] == ['p70', 'p50']
+    db_conn.commit()
+    assert [row['place_id'] for row in progress.take_discovered(2)] == ['p30']
+    db_conn.commit()
+    cursor.close()
@@ -0,0 +1,59 @@
+"""SMTP-Pool gegen den SMTP-Sink: Wiederverwendung, Reconnect und kein Doppelversand"""
+
+import smtplib
+from email.message import EmailMessage
+
+import pytest
+
+from smtp_pool import SMTPPool
+
+
+def message(n=1):
+    msg = EmailMessage()
+    msg['From'] = 'vertrieb@celox.io'
+    msg['To'] = f"kontakt{n}@firma.de"
+    msg['Subject'] = 'Test'
+    msg.set_content('Hallo')
+    return msg
+
+
+def pool_for(server, **kwargs):
+    return SMTPPool('127.0.0.1', server.server_address[1], 'vertrieb@celox.io', '', starttls=False, **kwargs)
+
+
+def test_connection_is_reused(fake_server):
+    server = fake_server('smtp')
+    pool = pool_for(server)
+    for n in range(5):
+        pool.send_message(message(n))
+    pool.close()
+    assert (pool.sent, pool.connects, server.received) == (5, 1, 5)
+
+
+def test_reconnects_after_server_dropped_pooled_connection(fake_server):
+    server = fake_server('smtp', drop_after=1)
+    pool = pool_for(server)
+    for n in range(3):
+        pool.send_message(message(n))
+    pool.close()
+    # Jede gepoolte Verbindung ist beim nächsten Versand tot: MAIL FROM scheitert, ein neuer Versuch
+    assert (pool.sent, pool.connects, server.received) == (3, 3, 3)
+
+
+def test_idle_connection_is_checked_with_noop(fake_server):
+    server = fake_server('smtp', drop_after=1)
+    pool = pool_for(server, noop_after=0)
+    pool.send_message(message(1))
+    pool.send_message(message(2))
+    pool.close()
+    assert (pool.sent, pool.connects, server.received) == (2, 2, 2)
+
+
+def test_no_retry_when_connection_drops_during_data(fake_server):
+    server = fake_server('smtp', drop_in_data=True)
+    pool = pool_for(server)
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        pool.send_message(message())
+    # Der Server hat die Nachricht womöglich angenommen - ein zweiter Versuch wäre ein Doppelversand
+    assert (pool.sent, pool.connects, server.received) == (0, 1, 1)
+    assert pool._open == 0
@@ -0,0 +1,73 @@
+"""Laufende Kampagnen-Statistik: Trigger auf leads_email_campaign gegen campaign_stats_rebuild()"""
+
+from datetime import datetime
+
+from persistence import LeadWriter
+
+
+def totals(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT total_leads, emails_sent, responses, scored_leads, score_sum, last_email_sent
+        FROM campaign_totals
+    """)
+    row = cursor.fetchone()
+    cursor.execute("SELECT day, emails_sent, responses FROM campaign_daily WHERE emails_sent <> 0 OR responses <> 0 ORDER BY day")
+    daily = cursor.fetchall()
+    conn.commit()
+    cursor.close()
+    return row, daily
+
+
+def rebuilt(conn):
+    """Summen nach komplettem Neuaufbau - müssen den Trigger-Summen entsprechen"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT campaign_stats_rebuild()")
+    conn.commit()
+    cursor.close()
+    return totals(conn)
+
+
+def lead(i, score):
+    return {'name': f"Kanzlei {i}", 'address': f"Weserstr. {i}, 12047 Berlin", 'place_id': f"p{i}", 'score': score}
+
+
+def test_totals_follow_insert_update_delete(db_conn):
+    ids = LeadWriter(db_conn).save_many([lead(1, 40), lead(2, 60), lead(3, None), lead(4, 80)])
+    (total, sent, responses, scored, score_sum, last), daily = totals(db_conn)
+    assert (total, sent, responses, scored, score_sum, last) == (4, 0, 0, 3, 180, None)
+    assert daily == []
+
+    cursor = db_conn.cursor()
+    cursor.execute("UPDATE leads_email_campaign SET status = 'sent', sent_at = %s WHERE id = ANY(%s)",
+                   (datetime(2024, 5, 2, 9, 30), ids[:2]))
+    cursor.execute("UPDATE leads_email_campaign SET status = 'sent', sent_at = %s WHERE id = %s",
+                   (datetime(2024, 5, 3, 10, 0), ids[2]))
+    cursor.execute("UPDATE leads_email_campaign SET response_received = TRUE WHERE id = %s", (ids[0],))
+    db_conn.commit()
+    after_update = totals(db_conn)
+    assert after_update[0] == (4, 3, 1, 3, 180, datetime(2024, 5, 3, 10, 0))
+    assert [(str(day), sent, responses) for day, sent, responses in after_update[1]] == [
+        ('2024-05-02', 2, 1), ('2024-05-03', 1, 0)]
+    assert after_update == rebuilt(db_conn)
+
+    # Löschen des letzten Versands: last_email_sent wird neu bestimmt
+    cursor.execute("DELETE FROM leads_email_campaign WHERE id = ANY(%s)", ([ids[0], ids[2]],))
+    db_conn.commit()
+    cursor.close()
+    after_delete = totals(db_conn)
+    assert after_delete[0] == (2, 1, 0, 2, 140, datetime(2024, 5, 2, 9, 30))
+    assert [(str(day), sent, responses) for day, sent, responses in after_delete[1]] == [('2024-05-02', 1, 0)]
+    assert after_delete == rebuilt(db_conn)
+
+
+def test_rescore_updates_score_sum(db_conn):
+    ids = LeadWriter(db_conn).save_many([lead(1, 40), lead(2, 60)])
+    cursor = db_conn.cursor()
+    cursor.execute("UPDATE leads_email_campaign SET score = score + 5")
+    cursor.execute("UPDATE leads_email_campaign SET score = NULL WHERE id = %s", (ids[1],))
+    db_conn.commit()
+    cursor.close()
+    (total, _, _, scored, score_sum, _), _ = totals(db_conn)
+    assert (total, scored, score_sum) == (2, 1, 45)
+    assert totals(db_conn) == rebuilt(db_conn)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Streaming-Website-Analyse
+Liest Websites chunkweise bis zu einem Byte-Limit und bricht ab,
+sobald das Ergebnis feststeht
+"""
+
+import codecs
+from typing import Dict, Iterable, Set
+
+# Indikatoren für manuelle Prozesse (je +5 Punkte)
+MANUAL_INDICATORS = [
+    'anfrage', 'kontaktformular', 'telefonisch',
+    'manuell', 'persönlich', 'verwaltung'
+]
+
+# Moderne Web-Technologien
+MODERN_TECH = ['react', 'vue', 'angular', 'next.js']
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+EMPTY_ANALYSIS = {'automation_potential': 0, 'is_modern': False, 'length': 0}
+
+
+class KeywordMatcher:
+    """Sucht mehrere Keywords über gestreamte Text-Chunks hinweg.
+
+    Jeder Chunk wird nur noch nach den bisher nicht gefundenen Keywords
+    durchsucht. Das Ende des vorherigen Chunks wird vorangestellt, damit
+    auch Treffer über Chunk-Grenzen erkannt werden.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.remaining: Set[str] = {k.lower() for k in keywords}
+        self.found: Set[str] = set()
+        self._overlap = max((len(k) for k in self.remaining), default=1) - 1
+        self._tail = ''
+
+    def feed(self, chunk: str) -> Set[str]:
+        """Verarbeitet einen Chunk und liefert die neu gefundenen Keywords"""
+        text = self._tail + chunk.lower()
+        new = {keyword for keyword in self.remaining if keyword in text}
+        if new:
+            self.remaining -= new
+            self.found |= new
+        self._tail = text[-self._overlap:] if self._overlap else ''
+        return new
+
+    @property
+    def done(self) -> bool:
+        """True, sobald alle Keywords gefunden wurden"""
+        return not self.remaining
+
+
+def analyze_chunks(chunks: Iterable[str]) -> Dict:
+    """Bewertet eine Website anhand gestreamter Text-Chunks"""
+    matcher = KeywordMatcher(MANUAL_INDICATORS + MODERN_TECH)
+    manual = set(MANUAL_INDICATORS)
+    modern = set(MODERN_TECH)
+    length = 0
+
+    for chunk in chunks:
+        length += len(chunk)
+        matcher.feed(chunk)
+        # Ergebnis steht fest: alle Indikatoren gefunden und mind. eine Tech erkannt
+        if manual <= matcher.found and matcher.found & modern:
+            break
+
+    return {
+        'automation_potential': 5 * len(manual & matcher.found),
+        'is_modern': bool(modern & matcher.found),
+        'length': length
+    }
+
+
+def is_html_response(response) -> bool:
+    """Prüft den Content-Type (fehlender Header gilt als HTML)"""
+    content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+    return not content_type or content_type in HTML_CONTENT_TYPES
+
+
+def iter_raw_chunks(response, max_bytes: int, chunk_size: int = 16384) -> Iterable[bytes]:
+    """Liest den Response-Body chunkweise bis max_bytes"""
+    read = 0
+    for raw in response.iter_content(chunk_size=chunk_size):
+        if read + len(raw) > max_bytes:
+            raw = raw[:max_bytes - read]
+        read += len(raw)
+        yield raw
+        if read >= max_bytes:
+            return
+
+
+def decode_chunks(raw_chunks: Iterable[bytes], encoding: str = None) -> Iterable[str]:
+    """Dekodiert Byte-Chunks inkrementell (Multibyte-Zeichen über Chunk-Grenzen)"""
+    decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    for raw in raw_chunks:
+        yield decoder.decode(raw)
+    yield decoder.decode(b'', final=True)
+
+
+def iter_text_chunks(response, max_bytes: int, chunk_size: int = 16384) -> Iterable[str]:
+    """Dekodiert den Response-Body chunkweise bis max_bytes"""
+    return decode_chunks(iter_raw_chunks(response, max_bytes, chunk_size), response.encoding)